@@ -3,6 +3,12 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 
+# Fields an application record must have
+REQUIRED_APPLICATION_FIELDS = ("applicant_id", "status", "program", "submission_date")
+
+# Statuses an application can have
+APPLICATION_STATUSES = ("admitted", "rejected", "pending", "incomplete")
+
 
 class AdmissionRateCalculator:
     """
@@ -11,7 +17,7 @@ class AdmissionRateCalculator:
     
     def __init__(self):
         self.applications = []
-        self.application_statuses = ["admitted", "rejected", "pending", "incomplete"]
+        self.application_statuses = list(APPLICATION_STATUSES)
     
     def load_applications(self, applications: List[Dict]):
         """Load application data with validation and cleaning"""
@@ -21,7 +27,7 @@ class AdmissionRateCalculator:
         
         for app in applications:
             # Check for required fields
-            if not all(key in app for key in ["applicant_id", "status", "program", "submission_date"]):
+            if not all(key in app for key in REQUIRED_APPLICATION_FIELDS):
                 continue
                 
             # Handle duplicates (same applicant applying to same program)
@@ -94,6 +100,99 @@ class AdmissionRateCalculator:
         
         return admission_rate, details
     
+    def rate_from_status_counts(self, status_counts: Dict[str, int],
+                                exclude_incomplete=True) -> Tuple[float, Dict]:
+        """
+        Calculate admission rate from aggregated status counts, e.g. from the application_stats table
+        
+        Args:
+            status_counts: Dict of application counts by status
+            exclude_incomplete: Whether to exclude incomplete applications
+            
+        Returns:
+            Tuple of (admission_rate, details_dict) like calculate_admission_rate
+        """
+        total = sum(status_counts.values())
+        filtered = total - (status_counts.get("incomplete", 0) if exclude_incomplete else 0)
+        
+        # Count by status
+        status_breakdown = {status: status_counts.get(status, 0) for status in self.application_statuses}
+        if exclude_incomplete:
+            status_breakdown["incomplete"] = 0
+        
+        total_valid = sum(status_breakdown.values())
+        if total_valid == 0:
+            return 0.0, {"error": "No valid applications found"}
+        
+        admission_rate = status_breakdown["admitted"] / total_valid * 100
+        details = {
+            "total_applications": total,
+            "filtered_applications": filtered,
+            "status_breakdown": status_breakdown,
+            "admission_rate": admission_rate
+        }
+        
+        return admission_rate, details
+    
+    def stratified_rates_from_counts(self, counts_by_category: Dict[str, Dict[str, int]]) -> Dict:
+        """
+        Calculate admission rates per category from aggregated status counts
+        
+        Args:
+            counts_by_category: Dict of status counts per category (e.g. per program)
+            
+        Returns:
+            Dict of categories with their admission rates, like calculate_stratified_rates
+        """
+        overall_counts = {}
+        for status_counts in counts_by_category.values():
+            for status, count in status_counts.items():
+                overall_counts[status] = overall_counts.get(status, 0) + count
+        
+        results = {}
+        for category, status_counts in counts_by_category.items():
+            rate, details = self.rate_from_status_counts(status_counts)
+            if "total_applications" in details:
+                details["total_applications"] = sum(overall_counts.values())
+            results[category] = {
+                "admission_rate": rate,
+                "details": details
+            }
+        
+        # Calculate overall rate for comparison
+        overall_rate, overall_details = self.rate_from_status_counts(overall_counts)
+        results["overall"] = {
+            "admission_rate": overall_rate,
+            "details": overall_details
+        }
+        
+        return results
+    
+    def trends_from_counts(self, counts_by_period: Dict[str, Dict[str, int]]) -> Dict:
+        """
+        Admission rate per time period from aggregated status counts
+        
+        Args:
+            counts_by_period: Dict of status counts per period (e.g. per month)
+            
+        Returns:
+            Dict with time periods and corresponding rates, like analyze_trends
+        """
+        if not counts_by_period:
+            return {"error": "No application data loaded"}
+        
+        results = {}
+        for period in sorted(counts_by_period):
+            status_counts = counts_by_period[period]
+            rate, _ = self.rate_from_status_counts(status_counts)
+            results[str(period)] = {
+                "admission_rate": rate,
+                "application_count": sum(status_counts.values()),
+                "admitted_count": status_counts.get("admitted", 0)
+            }
+        
+        return results
+    
     def calculate_stratified_rates(self, stratify_by: str) -> Dict:
         """
         Calculate admission rates stratified by a given category
@@ -195,7 +294,7 @@ class AdmissionRateCalculator:
             issues.append({
                 "type": "invalid_status",
                 "count": len(invalid_status),
-                "examples": invalid_status[:3]
+                "examples": [dict(app) for app in invalid_status[:3]]
             })
             
         # Check for missing dates
@@ -204,7 +303,7 @@ class AdmissionRateCalculator:
             issues.append({
                 "type": "missing_dates",
                 "count": len(missing_dates),
-                "examples": missing_dates[:3]
+                "examples": [dict(app) for app in missing_dates[:3]]
             })
             
         # Check status distribution for outliers
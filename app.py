@@ -1,5 +1,6 @@
 import os
 from db import UniversityDatabase
+from catalog import UniversityCatalog
 from matcher import UniversityMatcher
 from visualizer import UniversityVisualizer
 
@@ -7,7 +8,8 @@ class UniversityMatcherApp:
     def __init__(self):
         """Initialize the application with its components"""
         self.db = UniversityDatabase()
-        self.matcher = UniversityMatcher(self.db)
+        self.catalog = UniversityCatalog(self.db)
+        self.matcher = UniversityMatcher(self.db, catalog=self.catalog)
         self.visualizer = UniversityVisualizer()
         
         # Initialize database with sample data if needed
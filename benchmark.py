@@ -0,0 +1,149 @@
+"""
+Benchmarks for the university matching engines
+
+Usage:
+    python benchmark.py --rows 1000000
+"""
+import argparse
+import time
+import tracemalloc
+import numpy as np
+from db import UniversityDatabase
+from records import fetch_records
+from matcher import UniversityMatcher
+from vectorized import UniversityFeatures, FEATURE_COLUMNS, weighted_match_scores
+
+BENCHMARK_PROFILE = {
+    "gpa": 3.8,
+    "sat_score": 1400,
+    "preferred_majors": ["Computer Science", "Engineering"],
+    "budget": 40000,
+    "preferred_locations": ["California", "Massachusetts"],
+    "preferred_environment": "Urban"
+}
+
+
+def synthetic_catalog(db: UniversityDatabase, rows: int):
+    """Tiles the sample universities up to the requested number of rows (without IDs)"""
+    sample = db.get_all_universities()
+    universities = []
+    for i in range(rows):
+        uni = dict(sample[i % len(sample)])
+        uni.pop("id")
+        uni["name"] = f"{uni['name']} #{i}"
+        universities.append(uni)
+    return universities
+
+
+def timed(func, *args):
+    """Runs func once and returns (result, seconds)"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def bench_engines(matcher: UniversityMatcher, universities, scalar_rows: int, workers: int = 0):
+    """Compares the scalar engine with the vectorized engine"""
+    print(f"== Scoring engines ({len(universities):,} universities) ==")
+
+    columns = {name: [uni.get(name) for uni in universities] for name in FEATURE_COLUMNS}
+    features, build_time = timed(UniversityFeatures, columns)
+    print(f"vectorized: encoded columns in {build_time:.3f}s")
+
+    scorer = matcher.vectorized_scorer
+    components, score_time = timed(scorer.component_scores, BENCHMARK_PROFILE, features)
+    weighted_match_scores(components, matcher.default_weights)
+    print(f"vectorized: scored {features.size:,} universities in {score_time:.3f}s "
+          f"({features.size / score_time:,.0f} universities/s)")
+
+    if workers > 1:
+        matcher.set_parallel(workers, min_universities=1)
+        _, publish_time = timed(matcher.parallel_scorer.component_scores, BENCHMARK_PROFILE, features)
+        _, parallel_time = timed(matcher.parallel_scorer.component_scores, BENCHMARK_PROFILE, features)
+        print(f"parallel:   scored {features.size:,} universities in {parallel_time:.3f}s with {workers} workers "
+              f"(first call incl. publishing and pool start: {publish_time:.3f}s)")
+        matcher.set_parallel(0)
+
+    subset = universities[:scalar_rows]
+    matcher.set_engine("scalar")
+    _, scalar_time = timed(matcher.match_universities, BENCHMARK_PROFILE, subset)
+    print(f"scalar:     scored {len(subset):,} universities in {scalar_time:.3f}s "
+          f"({len(subset) / scalar_time:,.0f} universities/s)")
+
+
+def synthetic_profiles(count: int):
+    """Variations of the benchmark profile with different GPAs, SAT scores and budgets"""
+    profiles = []
+    for i in range(count):
+        profile = dict(BENCHMARK_PROFILE)
+        profile["gpa"] = round(2.5 + (i % 16) * 0.1, 1)
+        profile["sat_score"] = 1000 + (i % 60) * 10
+        profile["budget"] = 20000 + (i % 7) * 5000
+        profiles.append(profile)
+    return profiles
+
+
+def bench_match_many(matcher: UniversityMatcher, universities, profile_count: int):
+    """Times match_many against calling match_universities once per profile"""
+    profiles = synthetic_profiles(profile_count)
+    print(f"== Batch matching ({len(profiles):,} profiles x {len(universities):,} universities) ==")
+
+    matcher.set_engine("vectorized")
+    out = np.empty((len(profiles), len(universities)), dtype=np.float32)
+    result, batch_time = timed(lambda: matcher.match_many(profiles, universities, out=out))
+    print(f"match_many:         {batch_time:.3f}s ({result.scores.size / batch_time:,.0f} scores/s)")
+
+    sample = profiles[:10]
+    _, loop_time = timed(lambda: [matcher.match_universities(p, universities) for p in sample])
+    per_profile = loop_time / len(sample)
+    print(f"match_universities: {per_profile:.3f}s per profile "
+          f"(~{per_profile * len(profiles):.1f}s for all profiles)")
+
+
+def row_memory(fetch) -> float:
+    """Bytes allocated per row by fetch(), which returns a list of rows"""
+    tracemalloc.start()
+    rows = fetch()
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return allocated / max(len(rows), 1)
+
+
+def bench_records(db: UniversityDatabase):
+    """Compares the memory of record rows with one dictionary per row"""
+    print("== Row memory (bytes per row, including values) ==")
+    for table, name in (("universities", "University"), ("applications", "Application")):
+        query = f"SELECT * FROM {table}"
+
+        def dict_rows():
+            cursor = db.read_conn.execute(query)
+            columns = [col[0] for col in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+        record_bytes = row_memory(lambda: fetch_records(db.read_conn.execute(query), name))
+        dict_bytes = row_memory(dict_rows)
+        print(f"{table + ':':14s}dictionaries {dict_bytes:,.0f}, records {record_bytes:,.0f} "
+              f"({dict_bytes / record_bytes:.1f}x less)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the university matcher")
+    parser.add_argument("--rows", type=int, default=1000000, help="Number of synthetic universities")
+    parser.add_argument("--scalar-rows", type=int, default=10000, help="Rows scored by the scalar engine")
+    parser.add_argument("--workers", type=int, default=0, help="Also time multi-process scoring with this many workers")
+    parser.add_argument("--profiles", type=int, default=1000, help="Profiles scored by match_many")
+    parser.add_argument("--batch-rows", type=int, default=5000, help="Universities scored by match_many")
+    args = parser.parse_args()
+
+    db = UniversityDatabase(":memory:")
+    db.insert_sample_data()
+    matcher = UniversityMatcher(db)
+
+    bench_records(db)
+    universities = synthetic_catalog(db, args.rows)
+    bench_engines(matcher, universities, args.scalar_rows, args.workers)
+    bench_match_many(matcher, universities[:args.batch_rows], args.profiles)
+
+
+if __name__ == "__main__":
+    main()
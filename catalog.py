@@ -0,0 +1,229 @@
+from typing import List, Dict, Optional, NamedTuple
+import threading
+from contextlib import contextmanager
+import numpy as np
+from db import UniversityDatabase
+from vectorized import UniversityFeatures, CATEGORICAL_COLUMNS
+from indexes import MajorIndex, LocationIndex, FilterIndex
+from records import record_type
+
+# Column types of the universities table
+NUMERIC_COLUMNS = ("acceptance_rate", "tuition_fee", "academic_rank", "scholarship_percent",
+                   "job_placement", "diversity_score", "year_founded")
+
+# Numeric columns with range indexes for filtering
+RANGE_INDEXED_COLUMNS = ("acceptance_rate", "tuition_fee")
+
+
+def _normalize_text(value):
+    """Strips surrounding whitespace from text values; empty strings become None"""
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+
+class CatalogSnapshot(NamedTuple):
+    """
+    One load of the universities table. A reload builds a new snapshot and
+    swaps it in with a single assignment, so readers never see the rows of
+    one version with the indexes of another.
+    """
+    version: Optional[int]
+    columns: Dict
+    records: List
+    index: Dict
+    features: Optional[UniversityFeatures]
+    filters: Optional[FilterIndex]
+
+    def rows_of_records(self, universities: List[Dict]) -> Optional[List[int]]:
+        """Row positions of a list of records of this snapshot, or None if any entry is not one"""
+        rows = []
+        for uni in universities:
+            row = self.index.get(uni.get("id")) if uni else None
+            if row is None or self.records[row] is not uni:
+                return None
+            rows.append(row)
+        return rows
+
+
+EMPTY_SNAPSHOT = CatalogSnapshot(None, {}, [], {}, None, None)
+
+
+class UniversityCatalog:
+    """
+    In-memory, columnar copy of the universities table.
+
+    The table is loaded once into typed columns (NumPy arrays for numeric
+    columns, normalized strings for text columns) together with row records,
+    an id -> row index and the encoded features used by the vectorized
+    scoring engine. The copy is reloaded only when the table's version in
+    table_versions changes.
+
+    Each access checks that version, except while the calling thread has the
+    catalog pinned (e.g. for the duration of a web request): the version is
+    then checked once, and every access sees the same snapshot.
+    """
+
+    def __init__(self, db: UniversityDatabase):
+        self.db = db
+        self._lock = threading.Lock()
+        self._snapshot = EMPTY_SNAPSHOT
+        self._pinned = threading.local()
+
+    @property
+    def version(self) -> int:
+        """Version of the universities table the catalog was loaded from"""
+        return self.snapshot().version
+
+    def snapshot(self) -> CatalogSnapshot:
+        """The calling thread's pinned snapshot, or the current one after a version check"""
+        pinned = getattr(self._pinned, "snapshot", None)
+        if pinned is not None:
+            return pinned
+        self.refresh()
+        return self._snapshot
+
+    def pin(self) -> CatalogSnapshot:
+        """Checks the version once and serves the resulting snapshot to the calling thread until unpin()"""
+        self.refresh()
+        self._pinned.snapshot = self._snapshot
+        return self._pinned.snapshot
+
+    def unpin(self):
+        """Returns the calling thread to checking the version on every access"""
+        self._pinned.snapshot = None
+
+    @contextmanager
+    def pinned(self):
+        """Context manager around pin() and unpin(); nested use keeps the outer snapshot"""
+        if getattr(self._pinned, "snapshot", None) is not None:
+            yield self._pinned.snapshot
+            return
+        try:
+            yield self.pin()
+        finally:
+            self.unpin()
+
+    def refresh(self) -> bool:
+        """
+        Reload the catalog if the universities table changed since the last load
+
+        Returns:
+            True if the catalog was reloaded
+        """
+        version = self.db.get_table_version("universities")
+        if version == self._snapshot.version:
+            return False
+
+        with self._lock:
+            if version == self._snapshot.version:
+                return False
+            self._snapshot = self._load(version)
+        return True
+
+    def invalidate(self):
+        """Force a reload on the next access"""
+        self._snapshot = self._snapshot._replace(version=None)
+
+    def _load(self, version: int) -> CatalogSnapshot:
+        """Loads the universities table into columns, records and indexes"""
+        cursor = self.db.read_conn.execute("SELECT * FROM universities ORDER BY id")
+        names = [col[0] for col in cursor.description]
+        rows = cursor.fetchall()
+        values = list(zip(*rows)) if rows else [()] * len(names)
+
+        columns = {}
+        for name, column in zip(names, values):
+            if name == "id":
+                columns[name] = np.array(column, dtype=np.int64)
+            elif name in NUMERIC_COLUMNS:
+                columns[name] = np.array([np.nan if v is None else v for v in column], dtype=np.float64)
+            else:
+                columns[name] = [_normalize_text(v) for v in column]
+
+        # Records keep Python values (None for NULL) for display and the scalar engine
+        university = record_type("University", tuple(names))
+        text = [name not in NUMERIC_COLUMNS and name != "id" for name in names]
+        records = [university(*[_normalize_text(value) if is_text else value for value, is_text in zip(row, text)])
+                   for row in rows]
+
+        features = UniversityFeatures(columns)
+        # Categorical filters reuse the dictionary encoding of the features
+        filters = FilterIndex(
+            {name: columns[name] for name in RANGE_INDEXED_COLUMNS},
+            {name: (features.codes[name], features.categories[name]) for name in CATEGORICAL_COLUMNS}
+        )
+        return CatalogSnapshot(
+            version=version,
+            columns=columns,
+            records=records,
+            index={record["id"]: row for row, record in enumerate(records)},
+            features=features,
+            filters=filters
+        )
+
+    @property
+    def columns(self) -> Dict:
+        """Typed columns keyed by column name"""
+        return self.snapshot().columns
+
+    @property
+    def records(self) -> List[Dict]:
+        """
+        One record (see records.Record) per university, in id order.
+
+        The records are shared between callers and must not be modified;
+        copy a record before adding fields to it.
+        """
+        return self.snapshot().records
+
+    @property
+    def features(self) -> UniversityFeatures:
+        """Encoded columns for the vectorized scoring engine"""
+        return self.snapshot().features
+
+    @property
+    def filters(self) -> FilterIndex:
+        """Range and hash indexes for filtering rows before scoring"""
+        return self.snapshot().filters
+
+    @property
+    def majors(self) -> MajorIndex:
+        """Inverted index of the majors offered by each university"""
+        return self.features.majors
+
+    @property
+    def locations(self) -> LocationIndex:
+        """Token index over the distinct university locations"""
+        return self.features.locations
+
+    def records_for_rows(self, rows) -> List[Dict]:
+        """Records of a list of row positions, in the given order"""
+        records = self.records
+        return [records[row] for row in rows]
+
+    def ids_for_rows(self, rows) -> set:
+        """University IDs of a list of row positions"""
+        return set(self.columns["id"][rows].tolist())
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def row_of(self, university_id: int) -> Optional[int]:
+        """Row position of a university ID, or None if it is not in the catalog"""
+        return self.snapshot().index.get(university_id)
+
+    def rows_of_records(self, universities: List[Dict]) -> Optional[List[int]]:
+        """Row positions of a list of catalog records, or None if any entry is not a current record"""
+        return self.snapshot().rows_of_records(universities)
+
+    def get(self, university_id: int) -> Optional[Dict]:
+        """Retrieves a university record by ID"""
+        snapshot = self.snapshot()
+        row = snapshot.index.get(university_id)
+        return snapshot.records[row] if row is not None else None
+
+    def distinct_values(self, column: str) -> List:
+        """Sorted distinct non-empty values of a text column"""
+        return sorted({value for value in self.columns[column] if value})
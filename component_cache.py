@@ -0,0 +1,60 @@
+from typing import Dict, Optional
+import os
+import threading
+from collections import OrderedDict
+
+# Default number of cached score sets, overridable with MATCHER_COMPONENT_CACHE_SIZE
+DEFAULT_MAX_ENTRIES = 8
+
+
+class ComponentCache:
+    """
+    In-memory LRU cache of the component scores of a list of universities.
+
+    The overall match score is a weighted combination of five component
+    scores, so while the profile and the data stay the same a weights-only
+    change can reuse them. Entries are tagged with the data version they were
+    computed from; storing an entry for a newer version drops all older ones.
+    """
+
+    def __init__(self, max_entries: int = None):
+        if max_entries is None:
+            max_entries = int(os.environ.get("MATCHER_COMPONENT_CACHE_SIZE", DEFAULT_MAX_ENTRIES))
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key, version) -> Optional[Dict]:
+        """Cached value of a key, or None if missing or computed from another data version"""
+        if key is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, version, value: Dict):
+        """Stores a value, evicting stale versions and the least recently used entries"""
+        if key is None or self.max_entries <= 0:
+            return
+        with self._lock:
+            for stale in [k for k, entry in self._entries.items() if entry[0] != version]:
+                del self._entries[stale]
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Removes all entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
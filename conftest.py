@@ -0,0 +1,38 @@
+import pytest
+from db import UniversityDatabase
+from matcher import UniversityMatcher
+
+
+@pytest.fixture
+def make_db(tmp_path):
+    """Opens databases in the test's temporary directory and closes them after the test"""
+    opened = []
+
+    def make_db(name: str = "universities.db", sample_data: bool = True, **kwargs) -> UniversityDatabase:
+        db = UniversityDatabase(str(tmp_path / name), **kwargs)
+        opened.append(db)
+        if sample_data:
+            db.insert_sample_data()
+        return db
+
+    yield make_db
+    for db in opened:
+        db.close()
+
+
+@pytest.fixture
+def db(make_db):
+    """Database with the sample data"""
+    return make_db()
+
+
+@pytest.fixture
+def university_with_applications(db) -> int:
+    """ID of a university with application data, read through the catalog connection"""
+    return db.read_conn.execute("SELECT university_id FROM applications LIMIT 1").fetchone()[0]
+
+
+@pytest.fixture
+def matcher(db):
+    """Scalar-engine matcher over the sample data"""
+    return UniversityMatcher(db)
@@ -1,14 +1,368 @@
 import sqlite3
-from typing import List, Dict
+from typing import List, Dict, Tuple
 import datetime
-import hashlib
+import hmac
 import os
 import uuid
+import threading
+import weakref
+from records import Record, fetch_records
+from password_hashing import PasswordHasher, PasswordHasherBusy
+
+# Connection settings, overridable through environment variables
+DEFAULT_BUSY_TIMEOUT = 5.0              # SQLITE_BUSY_TIMEOUT: seconds to wait for a locked database
+DEFAULT_CACHE_SIZE_KB = 16 * 1024       # SQLITE_CACHE_SIZE_KB: page cache per connection
+DEFAULT_MMAP_SIZE = 256 * 1024 * 1024   # SQLITE_MMAP_SIZE: bytes of the database file memory-mapped
+
+# Schema migrations, applied in order; the schema version is the number applied so far.
+# Append new migrations, never change or reorder applied ones. Each migration names the
+# method that applies it and the (query, index) pairs whose query plan must use the index.
+SCHEMA_MIGRATIONS = (
+    ("_create_tables", ()),
+    ("_create_user_indexes", (
+        ("SELECT id FROM saved_recommendations WHERE user_id = ? AND profile_id = ? AND university_id = ?",
+         "idx_saved_recommendations_user_profile_university"),
+        ("""SELECT r.id, u.name FROM saved_recommendations r JOIN universities u ON r.university_id = u.id
+            WHERE r.user_id = ? AND r.profile_id = ? ORDER BY r.match_score DESC""",
+         "idx_saved_recommendations_user_profile_university"),
+        ("SELECT * FROM user_profiles WHERE user_id = ? ORDER BY updated_at DESC",
+         "idx_user_profiles_user_updated"),
+    )),
+    ("_create_application_stats", (
+        ("SELECT program, status, SUM(count) FROM application_stats WHERE university_id = ? GROUP BY 1, 2",
+         "PRIMARY KEY"),
+    )),
+    ("_create_application_indexes", (
+        ("SELECT id FROM applications WHERE applicant_id = ? AND university_id = ? AND program = ?",
+         "idx_applications_applicant_university_program"),
+    )),
+    ("_add_password_iterations", ()),
+    ("_create_row_counts", ()),
+)
+
+# Version of the sample data; bump it to reseed existing databases
+SAMPLE_DATA_VERSION = 1
+
+# Tables copied into the in-memory read replica
+REPLICA_TABLES = ("universities", "applications", "application_stats", "table_versions", "schema_versions")
+
+# Columns of an application row, in the order insert_applications expects
+APPLICATION_COLUMNS = ("applicant_id", "university_id", "program", "status", "submission_date",
+                       "gpa", "sat_score", "extracurricular_score")
+
+# Groupings of application counts: SQL expression over application_stats per group name
+APPLICATION_STATS_GROUPS = {None: "NULL", "program": "program", "month": "month", "year": "substr(month, 1, 4)"}
 
 class UniversityDatabase:
-    def __init__(self, db_name="universities.db"):
-        self.conn = sqlite3.connect(db_name, check_same_thread=False)
-        self._create_tables()
+    """
+    SQLite database of universities, applications, users and their profiles.
+    
+    Every thread gets its own connection, so readers do not wait on each
+    other. File databases use WAL journaling: reads run alongside a write,
+    and writers wait up to the busy timeout for each other. Connections of
+    finished threads are reused by new threads.
+    
+    In read-replica mode, the catalog tables (universities and applications)
+    are copied into a shared-cache in-memory database on first use and again
+    after every catalog write made through this class. Catalog and analytics
+    reads then go to the replica and never touch the database file. Each
+    thread reads through its own connection to the replica; these share one
+    page cache, so SQLite still serializes their page accesses, but queries
+    are prepared and their rows built in parallel.
+    
+    Passwords are hashed on a bounded PasswordHasher pool, with the PBKDF2
+    iteration count stored per user.
+    """
+    
+    def __init__(self, db_name="universities.db", read_replica: bool = False):
+        self.db_name = db_name
+        self.read_replica = read_replica
+        self.busy_timeout = float(os.environ.get("SQLITE_BUSY_TIMEOUT", DEFAULT_BUSY_TIMEOUT))
+        self.cache_size_kb = int(os.environ.get("SQLITE_CACHE_SIZE_KB", DEFAULT_CACHE_SIZE_KB))
+        self.mmap_size = int(os.environ.get("SQLITE_MMAP_SIZE", DEFAULT_MMAP_SIZE))
+        
+        self._local = threading.local()
+        self._connections_lock = threading.Lock()
+        self._connections = []  # (weak reference to the owning thread, connection)
+        self._replica = None  # (URI, connection keeping the in-memory database alive)
+        self._replica_lock = threading.Lock()
+        self._replica_connections = []  # (weak reference to the owning thread, URI, connection)
+        self.password_hasher = PasswordHasher.from_env()
+        
+        # An in-memory database only exists within its connection, so it stays shared
+        self._shared_conn = None
+        if db_name == ":memory:":
+            self._shared_conn = self._connect()
+        else:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self._migrate()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Opens a connection with the busy timeout and tuned pragmas"""
+        # Connections are handed to a new thread once their own thread has finished
+        # URI filenames let the connection attach the in-memory read replica
+        conn = sqlite3.connect(self.db_name, timeout=self.busy_timeout, check_same_thread=False, uri=True)
+        conn.execute("PRAGMA synchronous=NORMAL")  # Durable in WAL mode, without a sync per commit
+        conn.execute(f"PRAGMA cache_size=-{self.cache_size_kb}")
+        conn.execute(f"PRAGMA mmap_size={self.mmap_size}")
+        return conn
+    
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Connection of the calling thread, opened or taken over from a finished thread on first use"""
+        if self._shared_conn is not None:
+            return self._shared_conn
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        
+        thread = threading.current_thread()
+        with self._connections_lock:
+            for i, (owner, idle_conn) in enumerate(self._connections):
+                if owner() is None or not owner().is_alive():
+                    conn = idle_conn
+                    self._connections[i] = (weakref.ref(thread), conn)
+                    break
+            else:
+                conn = self._connect()
+                self._connections.append((weakref.ref(thread), conn))
+        if conn.in_transaction:
+            conn.rollback()  # Left open by a thread that did not finish its write
+        self._local.conn = conn
+        return conn
+    
+    @property
+    def read_conn(self) -> sqlite3.Connection:
+        """Connection for catalog reads: the calling thread's replica connection in read-replica mode, else conn"""
+        if not self.read_replica:
+            return self.conn
+        replica = self._replica
+        if replica is None:
+            with self._replica_lock:
+                if self._replica is None:
+                    self._replica = self._build_replica()
+                replica = self._replica
+        uri = replica[0]
+        
+        local = getattr(self._local, "replica", None)
+        if local is not None and local[0] == uri:
+            return local[1]
+        
+        # First read of this thread, or the replica was refreshed since its last read
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        conn.execute("PRAGMA query_only = ON")
+        thread = threading.current_thread()
+        with self._connections_lock:
+            stale = [c for owner, u, c in self._replica_connections
+                     if owner() is None or not owner().is_alive() or owner() is thread]
+            self._replica_connections = [(owner, u, c) for owner, u, c in self._replica_connections
+                                         if c not in stale] + [(weakref.ref(thread), uri, conn)]
+        # Only connections of finished threads and this thread's own are closed, so no read is cut off
+        for old in stale:
+            old.close()
+        self._local.replica = (uri, conn)
+        return conn
+    
+    def refresh_replica(self):
+        """Copies the catalog tables into a new read replica, e.g. after writes by another process"""
+        if not self.read_replica:
+            return
+        with self._replica_lock:
+            # Readers keep using the previous replica until the new one is complete; its
+            # memory is freed once the last thread reading it has moved on or finished
+            previous, self._replica = self._replica, self._build_replica()
+        if previous is not None:
+            previous[1].close()
+    
+    def _build_replica(self) -> Tuple[str, sqlite3.Connection]:
+        """
+        Copies the catalog tables into a new shared-cache in-memory database
+        
+        Only the schema of REPLICA_TABLES is created, and the rows are copied
+        with INSERT ... SELECT from the database attached to conn, all within
+        one read transaction. Indexes are created after the rows are in.
+        
+        Returns:
+            (URI, connection) of the replica; the connection keeps it alive
+        """
+        uri = f"file:replica-{uuid.uuid4().hex}?mode=memory&cache=shared"
+        replica = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        placeholders = ", ".join("?" * len(REPLICA_TABLES))
+        schema = self.conn.execute(
+            f"""SELECT type, sql FROM sqlite_master
+                WHERE tbl_name IN ({placeholders}) AND type IN ('table', 'index') AND sql IS NOT NULL""",
+            REPLICA_TABLES
+        ).fetchall()
+        for kind, sql in schema:
+            if kind == "table":
+                replica.execute(sql)
+        replica.commit()
+        
+        conn = self.conn
+        if conn.in_transaction:
+            conn.commit()
+        conn.execute("ATTACH DATABASE ? AS replica", (uri,))
+        try:
+            with conn:
+                for table in REPLICA_TABLES:
+                    conn.execute(f"INSERT INTO replica.{table} SELECT * FROM main.{table}")
+        finally:
+            conn.execute("DETACH DATABASE replica")
+        
+        for kind, sql in schema:
+            if kind == "index":
+                replica.execute(sql)
+        replica.commit()
+        return uri, replica
+    
+    def _write_transaction(self):
+        """Starts a transaction that holds the write lock, so concurrent processes take turns"""
+        if self.conn.in_transaction:
+            self.conn.commit()
+        self.conn.execute("BEGIN IMMEDIATE")
+    
+    def _get_schema_version(self, name: str) -> int:
+        cursor = self.conn.execute("SELECT version FROM schema_versions WHERE name = ?", (name,))
+        row = cursor.fetchone()
+        return row[0] if row else 0
+    
+    def _set_schema_version(self, name: str, version: int):
+        self.conn.execute('''INSERT INTO schema_versions (name, version) VALUES (?, ?)
+            ON CONFLICT(name) DO UPDATE SET version = excluded.version''', (name, version))
+    
+    def _migrate(self):
+        """Applies the schema migrations the database has not had yet"""
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS schema_versions
+            (name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL);''')
+        self.conn.commit()
+        if self._get_schema_version("schema") >= len(SCHEMA_MIGRATIONS):
+            return
+        
+        self._write_transaction()
+        try:
+            # Another process may have migrated while this one waited for the lock
+            version = self._get_schema_version("schema")
+            for migration, _ in SCHEMA_MIGRATIONS[version:]:
+                getattr(self, migration)()
+            self._set_schema_version("schema", len(SCHEMA_MIGRATIONS))
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        
+        for _, index_checks in SCHEMA_MIGRATIONS[version:]:
+            self.check_query_plans(index_checks)
+    
+    def explain_query_plan(self, query: str) -> List[str]:
+        """
+        Get the query plan SQLite chooses for a query
+        
+        Args:
+            query: SQL query, with NULL bound to every parameter
+            
+        Returns:
+            Detail line of every step of the plan
+        """
+        cursor = self.conn.execute(f"EXPLAIN QUERY PLAN {query}", (None,) * query.count("?"))
+        return [row[3] for row in cursor.fetchall()]
+    
+    def check_query_plans(self, index_checks) -> bool:
+        """
+        Checks that queries use their expected indexes
+        
+        Args:
+            index_checks: (query, index name) pairs
+            
+        Returns:
+            True if every query plan uses its index, False otherwise
+        """
+        all_used = True
+        for query, index in index_checks:
+            plan = self.explain_query_plan(query)
+            if not any(index in step for step in plan):
+                print(f"Warning: query does not use index {index}: {' '.join(query.split())}")
+                print(f"Query plan: {plan}")
+                all_used = False
+        return all_used
+    
+    def _create_user_indexes(self):
+        """Creates the indexes behind the user profile and saved recommendation lookups"""
+        # Keep the latest of duplicate saved recommendations, which the unique index forbids
+        self.conn.execute('''DELETE FROM saved_recommendations WHERE id NOT IN
+            (SELECT MAX(id) FROM saved_recommendations GROUP BY user_id, profile_id, university_id)''')
+        self.conn.execute('''CREATE UNIQUE INDEX IF NOT EXISTS idx_saved_recommendations_user_profile_university
+            ON saved_recommendations (user_id, profile_id, university_id)''')
+        self.conn.execute('''CREATE INDEX IF NOT EXISTS idx_user_profiles_user_updated
+            ON user_profiles (user_id, updated_at)''')
+    
+    def _create_application_stats(self):
+        """Creates the application_stats table, kept current by triggers on applications"""
+        # Application counts per university, program, submission month (YYYY-MM) and status
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS application_stats
+            (university_id INTEGER NOT NULL,
+            program TEXT NOT NULL,
+            month TEXT NOT NULL,
+            status TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (university_id, program, month, status)) WITHOUT ROWID;''')
+        self.conn.execute("DELETE FROM application_stats")
+        self.conn.execute('''INSERT INTO application_stats
+            SELECT university_id, program, substr(submission_date, 1, 7), status, COUNT(*)
+            FROM applications GROUP BY 1, 2, 3, 4''')
+        
+        add = '''INSERT INTO application_stats
+                        VALUES (NEW.university_id, NEW.program, substr(NEW.submission_date, 1, 7), NEW.status, 1)
+                    ON CONFLICT(university_id, program, month, status) DO UPDATE SET count = count + 1;'''
+        key = '''university_id = OLD.university_id AND program = OLD.program
+                        AND month = substr(OLD.submission_date, 1, 7) AND status = OLD.status'''
+        remove = f'''UPDATE application_stats SET count = count - 1 WHERE {key};
+                    DELETE FROM application_stats WHERE {key} AND count <= 0;'''
+        statements = {
+            "INSERT": add,
+            "UPDATE": remove + "\n                    " + add,
+            "DELETE": remove
+        }
+        for event, statement in statements.items():
+            self.conn.execute(f'''CREATE TRIGGER IF NOT EXISTS applications_stats_{event.lower()}
+                AFTER {event} ON applications
+                BEGIN
+                    {statement}
+                END;''')
+    
+    def _create_application_indexes(self):
+        """Creates the unique index an applicant's application to a program is deduplicated on"""
+        # Keep the first of duplicate applications, which the unique index forbids
+        self.conn.execute('''DELETE FROM applications WHERE id NOT IN
+            (SELECT MIN(id) FROM applications GROUP BY applicant_id, university_id, program)''')
+        self.conn.execute('''CREATE UNIQUE INDEX IF NOT EXISTS idx_applications_applicant_university_program
+            ON applications (applicant_id, university_id, program)''')
+    
+    def _add_password_iterations(self):
+        """Stores the PBKDF2 iteration count of every password hash"""
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(users)").fetchall()]
+        if "password_iterations" not in columns:
+            # Hashes created before this migration used 100,000 iterations
+            self.conn.execute("ALTER TABLE users ADD COLUMN password_iterations INTEGER NOT NULL DEFAULT 100000")
+    
+    def _create_row_counts(self):
+        """Keeps the number of cached match scores in row_counts, so eviction does not count the table"""
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS row_counts
+            (table_name TEXT PRIMARY KEY,
+            count INTEGER NOT NULL);''')
+        self.conn.execute('''INSERT OR REPLACE INTO row_counts (table_name, count)
+            SELECT 'match_score_cache', COUNT(*) FROM match_score_cache''')
+        for event, change in (("INSERT", "+ 1"), ("DELETE", "- 1")):
+            self.conn.execute(f'''CREATE TRIGGER IF NOT EXISTS match_score_cache_count_{event.lower()}
+                AFTER {event} ON match_score_cache
+                BEGIN
+                    UPDATE row_counts SET count = count {change} WHERE table_name = 'match_score_cache';
+                END;''')
+    
+    def get_schema_versions(self) -> Dict[str, int]:
+        """Applied schema and sample data versions"""
+        cursor = self.conn.execute("SELECT name, version FROM schema_versions")
+        return dict(cursor.fetchall())
     
     def _create_tables(self):
         """Creates the necessary tables if they don't exist"""
@@ -87,11 +441,108 @@ class UniversityDatabase:
             FOREIGN KEY (user_id) REFERENCES users(id),
             FOREIGN KEY (profile_id) REFERENCES user_profiles(id),
             FOREIGN KEY (university_id) REFERENCES universities(id));''')
+        
+        # Table versions, bumped by triggers whenever a versioned table changes
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS table_versions
+            (table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0);''')
+        self._create_version_triggers("universities")
+        self._create_version_triggers("applications")
+        
+        # Acceptance rates calculated from application data, one row per university with
+        # applications. Triggers reset a university's rate (and bump its generation) whenever
+        # its applications change; a NULL rate means it must be recalculated.
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS acceptance_rate_cache
+            (university_id INTEGER PRIMARY KEY,
+            acceptance_rate REAL,
+            generation INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT);''')
+        self.conn.execute('''INSERT OR IGNORE INTO acceptance_rate_cache (university_id)
+            SELECT DISTINCT university_id FROM applications''')
+        self._create_acceptance_rate_cache_triggers()
+        
+        # Match scores returned by the Deepseek API, keyed by profile hash and university
+        # row hash so that a changed profile or university row never hits a stale score
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS match_score_cache
+            (profile_hash TEXT NOT NULL,
+            university_key TEXT NOT NULL,
+            match_score REAL NOT NULL,
+            created_at REAL NOT NULL,
+            last_used REAL NOT NULL,
+            PRIMARY KEY (profile_hash, university_key));''')
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_match_score_cache_last_used ON match_score_cache (last_used)")
+    
+    def _create_version_triggers(self, table_name: str):
+        """Creates triggers that bump the table_versions entry of a table on every change"""
+        self.conn.execute("INSERT OR IGNORE INTO table_versions (table_name, version) VALUES (?, 0)", (table_name,))
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            self.conn.execute(f'''CREATE TRIGGER IF NOT EXISTS {table_name}_version_{event.lower()}
+                AFTER {event} ON {table_name}
+                BEGIN
+                    UPDATE table_versions SET version = version + 1 WHERE table_name = '{table_name}';
+                END;''')
+    
+    def _create_acceptance_rate_cache_triggers(self):
+        """Creates triggers that invalidate a university's cached acceptance rate when its applications change"""
+        invalidate = '''INSERT INTO acceptance_rate_cache (university_id) VALUES ({row}.university_id)
+                    ON CONFLICT(university_id) DO UPDATE SET acceptance_rate = NULL, generation = generation + 1;'''
+        statements = {
+            "INSERT": invalidate.format(row="NEW"),
+            "UPDATE": invalidate.format(row="OLD") + "\n                    " + invalidate.format(row="NEW"),
+            "DELETE": invalidate.format(row="OLD")
+        }
+        for event, statement in statements.items():
+            self.conn.execute(f'''CREATE TRIGGER IF NOT EXISTS applications_acceptance_rate_{event.lower()}
+                AFTER {event} ON applications
+                BEGIN
+                    {statement}
+                END;''')
+    
+    def get_table_version(self, table_name: str) -> int:
+        """
+        Get the change counter of a versioned table
+        
+        Args:
+            table_name: The name of the table
             
-        self.conn.commit()
+        Returns:
+            A number that changes whenever the table's rows change
+        """
+        cursor = self.read_conn.execute("SELECT version FROM table_versions WHERE table_name = ?", (table_name,))
+        row = cursor.fetchone()
+        return row[0] if row else 0
     
-    def insert_sample_data(self):
-        """Inserts sample university data"""
+    def insert_sample_data(self, force: bool = False):
+        """
+        Inserts sample university data, applications and the demo user
+        
+        Seeding only runs when the database's sample data is older than
+        SAMPLE_DATA_VERSION, so it is cheap to call on every start. All rows
+        are written in one transaction that holds the write lock, so only
+        one of several processes starting together seeds.
+        
+        Args:
+            force: Reseed even if the sample data is up to date
+        """
+        if not force and self._get_schema_version("sample_data") >= SAMPLE_DATA_VERSION:
+            return
+        
+        self._write_transaction()
+        try:
+            # Another process may have seeded while this one waited for the lock
+            seeded = force or self._get_schema_version("sample_data") < SAMPLE_DATA_VERSION
+            if seeded:
+                self._insert_sample_data()
+                self._set_schema_version("sample_data", SAMPLE_DATA_VERSION)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        if seeded:
+            self.refresh_replica()
+    
+    def _insert_sample_data(self):
+        """Replaces the universities with the sample data, within the caller's transaction"""
         # First, remove any existing data to avoid duplicates
         self.conn.execute("DELETE FROM universities")
         
@@ -307,9 +758,7 @@ class UniversityDatabase:
         self._insert_sample_application_data()
         
         # Insert sample user for testing
-        self.register_user("demo_user", "demo@example.com", "password123")
-        
-        self.conn.commit()
+        self._insert_user("demo_user", "demo@example.com", "password123")
     
     def _insert_sample_application_data(self):
         """Insert sample application data for more accurate admission rate calculations"""
@@ -402,89 +851,239 @@ class UniversityDatabase:
             sample_data
         )
     
-    def get_all_universities(self) -> List[Dict]:
-        """Retrieves all universities from the database"""
-        cursor = self.conn.execute("SELECT * FROM universities")
-        columns = [col[0] for col in cursor.description]
-        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    def insert_applications(self, applications: List[Tuple], refresh_replica: bool = True) -> int:
+        """
+        Insert a batch of applications in one transaction, skipping duplicates
+        
+        Args:
+            applications: Application rows with the values of APPLICATION_COLUMNS
+            refresh_replica: Whether to refresh the read replica after the batch; a caller
+                inserting many batches can pass False and call refresh_replica() once at the end
+            
+        Returns:
+            Number of applications inserted; an application is a duplicate if its
+            applicant already applied to the program at that university
+        """
+        with self.conn:
+            cursor = self.conn.executemany(
+                f"""INSERT INTO applications ({', '.join(APPLICATION_COLUMNS)})
+                    VALUES ({', '.join('?' * len(APPLICATION_COLUMNS))})
+                    ON CONFLICT(applicant_id, university_id, program) DO NOTHING""",
+                applications
+            )
+        if refresh_replica and cursor.rowcount:
+            self.refresh_replica()
+        return cursor.rowcount
+    
+    def get_all_universities(self) -> List[Record]:
+        """Retrieves all universities from the database, as read-mostly records"""
+        cursor = self.read_conn.execute("SELECT * FROM universities")
+        return fetch_records(cursor, "University")
+    
+    def get_cached_acceptance_rate(self, university_id: int):
+        """
+        Retrieves the cached acceptance rate of a university with application data
+        
+        Args:
+            university_id: The ID of the university
+            
+        Returns:
+            (acceptance_rate, generation) tuple, with a None rate if it must be
+            recalculated, or None if the university has no application data
+        """
+        cursor = self.conn.execute(
+            "SELECT acceptance_rate, generation FROM acceptance_rate_cache WHERE university_id = ?",
+            (university_id,)
+        )
+        return cursor.fetchone()
+    
+    def get_cached_acceptance_rates(self) -> Dict[int, tuple]:
+        """Retrieves all cached acceptance rates as {university_id: (acceptance_rate, generation)}"""
+        cursor = self.conn.execute("SELECT university_id, acceptance_rate, generation FROM acceptance_rate_cache")
+        return {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+    
+    def save_cached_acceptance_rate(self, university_id: int, acceptance_rate: float, generation: int) -> bool:
+        """
+        Stores a calculated acceptance rate, unless the university's applications
+        changed since the given generation was read
+        
+        Returns:
+            True if the rate was stored
+        """
+        cursor = self.conn.execute(
+            "UPDATE acceptance_rate_cache SET acceptance_rate = ?, updated_at = ? WHERE university_id = ? AND generation = ?",
+            (acceptance_rate, datetime.datetime.now().isoformat(), university_id, generation)
+        )
+        self.conn.commit()
+        return cursor.rowcount > 0
+    
+    def delete_cached_acceptance_rate(self, university_id: int, generation: int):
+        """Removes the cache entry of a university that no longer has application data"""
+        self.conn.execute(
+            "DELETE FROM acceptance_rate_cache WHERE university_id = ? AND generation = ?",
+            (university_id, generation)
+        )
+        self.conn.commit()
+    
+    def get_cached_match_scores(self, profile_hash: str, university_keys: List[str], min_created_at: float) -> Dict[str, tuple]:
+        """
+        Retrieves cached match scores of one profile
+        
+        Args:
+            profile_hash: Hash of the user profile
+            university_keys: Keys of the universities to look up
+            min_created_at: Entries created before this time are expired and ignored
+            
+        Returns:
+            Dictionary mapping university key to (match score, last used time), for the keys found
+        """
+        scores = {}
+        # Stay well below SQLite's limit on bound parameters
+        for start in range(0, len(university_keys), 500):
+            chunk = university_keys[start:start + 500]
+            cursor = self.conn.execute(
+                f'''SELECT university_key, match_score, last_used FROM match_score_cache
+                WHERE profile_hash = ? AND created_at >= ? AND university_key IN ({','.join('?' * len(chunk))})''',
+                [profile_hash, min_created_at] + chunk
+            )
+            scores.update((key, (score, last_used)) for key, score, last_used in cursor.fetchall())
+        return scores
+    
+    def touch_cached_match_scores(self, profile_hash: str, university_keys: List[str], last_used: float):
+        """Marks cached match scores as recently used"""
+        self.conn.executemany(
+            "UPDATE match_score_cache SET last_used = ? WHERE profile_hash = ? AND university_key = ?",
+            [(last_used, profile_hash, key) for key in university_keys]
+        )
+        self.conn.commit()
+    
+    def save_cached_match_scores(self, profile_hash: str, scores: Dict[str, float], now: float):
+        """Stores match scores of one profile, keyed by university key"""
+        # An upsert rather than INSERT OR REPLACE, whose implicit delete skips the row count trigger
+        self.conn.executemany(
+            """INSERT INTO match_score_cache VALUES (?, ?, ?, ?, ?)
+               ON CONFLICT(profile_hash, university_key) DO UPDATE SET
+                   match_score = excluded.match_score, created_at = excluded.created_at, last_used = excluded.last_used""",
+            [(profile_hash, key, score, now, now) for key, score in scores.items()]
+        )
+        self.conn.commit()
+    
+    def evict_cached_match_scores(self, max_entries: int, min_created_at: float) -> int:
+        """
+        Removes expired match scores, then the least recently used ones beyond max_entries
+        
+        Returns:
+            The number of entries removed
+        """
+        removed = self.conn.execute("DELETE FROM match_score_cache WHERE created_at < ?", (min_created_at,)).rowcount
+        excess = self.count_cached_match_scores() - max_entries
+        if excess > 0:
+            removed += self.conn.execute(
+                '''DELETE FROM match_score_cache WHERE rowid IN
+                (SELECT rowid FROM match_score_cache ORDER BY last_used LIMIT ?)''',
+                (excess,)
+            ).rowcount
+        self.conn.commit()
+        return removed
+    
+    def count_cached_match_scores(self) -> int:
+        """Number of cached match scores, kept current by triggers"""
+        return self.conn.execute("SELECT count FROM row_counts WHERE table_name = 'match_score_cache'").fetchone()[0]
+    
+    def clear_cached_match_scores(self):
+        """Removes all cached match scores"""
+        self.conn.execute("DELETE FROM match_score_cache")
+        self.conn.commit()
     
     def get_university(self, uni_id: int) -> Dict:
         """Retrieves a specific university by ID"""
-        cursor = self.conn.execute("SELECT * FROM universities WHERE id = ?", (uni_id,))
+        cursor = self.read_conn.execute("SELECT * FROM universities WHERE id = ?", (uni_id,))
         columns = [col[0] for col in cursor.description]
         row = cursor.fetchone()
         return dict(zip(columns, row)) if row else None
     
-    def get_university_applications(self, university_id: int) -> List[Dict]:
+    def get_university_applications(self, university_id: int, use_replica: bool = True) -> List[Record]:
         """
         Retrieves application data for a specific university
         
         Args:
             university_id: The ID of the university
+            use_replica: Whether the read replica may serve the read; pass False to read
+                the database file, e.g. to match a generation read from acceptance_rate_cache
             
         Returns:
-            List of application dictionaries
+            List of application records
         """
-        cursor = self.conn.execute(
+        conn = self.read_conn if use_replica else self.conn
+        cursor = conn.execute(
             "SELECT * FROM applications WHERE university_id = ?", 
             (university_id,)
         )
-        columns = [col[0] for col in cursor.description]
-        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        return fetch_records(cursor, "Application")
     
-    def get_application_statistics(self, university_id: int) -> Dict:
+    def get_application_status_counts(self, university_id: int, group_by: str = None) -> Dict:
         """
-        Get application statistics for a university
+        Get a university's application counts by status from the application_stats table
         
         Args:
             university_id: The ID of the university
+            group_by: None, "program", "month" (YYYY-MM) or "year"
             
         Returns:
-            Dictionary with application statistics
+            Dictionary of status counts, or of status counts per group with group_by
         """
-        cursor = self.conn.execute(
-            """
-            SELECT 
-                COUNT(*) as total_applications,
-                SUM(CASE WHEN status = 'admitted' THEN 1 ELSE 0 END) as admitted_count,
-                SUM(CASE WHEN status = 'rejected' THEN 1 ELSE 0 END) as rejected_count,
-                SUM(CASE WHEN status = 'pending' THEN 1 ELSE 0 END) as pending_count,
-                SUM(CASE WHEN status = 'incomplete' THEN 1 ELSE 0 END) as incomplete_count
-            FROM applications 
-            WHERE university_id = ?
-            """, 
+        if group_by not in APPLICATION_STATS_GROUPS:
+            raise ValueError(f"Unknown application stats grouping: {group_by}")
+        cursor = self.read_conn.execute(
+            f"""SELECT {APPLICATION_STATS_GROUPS[group_by]}, status, SUM(count) FROM application_stats
+                WHERE university_id = ? GROUP BY 1, 2""",
             (university_id,)
         )
+        counts = {}
+        for group, status, count in cursor.fetchall():
+            counts.setdefault(group, {})[status] = count
+        return counts.get(None, {}) if group_by is None else counts
+    
+    def get_application_statistics(self, university_id: int) -> Dict:
+        """
+        Get application statistics for a university
         
-        row = cursor.fetchone()
-        if not row or row[0] == 0:
+        Args:
+            university_id: The ID of the university
+            
+        Returns:
+            Dictionary with application statistics
+        """
+        counts = self.get_application_status_counts(university_id)
+        total = sum(counts.values())
+        if total == 0:
             return {
                 "total_applications": 0,
                 "admission_rate": 0,
                 "has_application_data": False
             }
             
-        total = row[0]
-        admitted = row[1]
+        admitted = counts.get("admitted", 0)
         
         return {
             "total_applications": total,
             "admitted_count": admitted,
-            "rejected_count": row[2],
-            "pending_count": row[3],
-            "incomplete_count": row[4],
+            "rejected_count": counts.get("rejected", 0),
+            "pending_count": counts.get("pending", 0),
+            "incomplete_count": counts.get("incomplete", 0),
             "admission_rate": (admitted / total) * 100 if total > 0 else 0,
             "has_application_data": True
         }
     
     # User authentication methods
-    def _hash_password(self, password: str, salt: str = None) -> tuple:
+    def _hash_password(self, password: str, salt: str = None, iterations: int = None) -> tuple:
         """
-        Hash a password with a salt using PBKDF2
+        Hash a password with a salt using PBKDF2 on the password hashing pool
         
         Args:
             password: The plain text password
             salt: Optional salt, generated if not provided
+            iterations: Optional PBKDF2 iteration count, the configured count if not provided
             
         Returns:
             Tuple of (password_hash, salt)
@@ -492,13 +1091,8 @@ class UniversityDatabase:
         if salt is None:
             salt = uuid.uuid4().hex
             
-        # Use PBKDF2 with SHA-256, 100,000 iterations
-        password_hash = hashlib.pbkdf2_hmac(
-            'sha256', 
-            password.encode('utf-8'), 
-            salt.encode('utf-8'), 
-            100000
-        ).hex()
+        # Use PBKDF2 with SHA-256 (raises PasswordHasherBusy when the pool is saturated)
+        password_hash = self.password_hasher.hash(password, salt, iterations)
         
         return password_hash, salt
     
@@ -515,33 +1109,39 @@ class UniversityDatabase:
             True if registration successful, False otherwise
         """
         try:
-            # Check if username or email already exists
-            cursor = self.conn.execute(
-                "SELECT id FROM users WHERE username = ? OR email = ?", 
-                (username, email)
-            )
-            if cursor.fetchone():
-                return False
-                
-            # Hash password
-            password_hash, salt = self._hash_password(password)
-            
-            # Get current timestamp
-            now = datetime.datetime.now().isoformat()
-            
-            # Insert new user
-            self.conn.execute(
-                "INSERT INTO users (username, email, password_hash, salt, created_at) VALUES (?, ?, ?, ?, ?)",
-                (username, email, password_hash, salt, now)
-            )
+            created = self._insert_user(username, email, password)
             self.conn.commit()
-            
-            return True
-            
+            return created
+        
+        except PasswordHasherBusy:
+            raise
         except Exception as e:
             print(f"Error registering user: {e}")
             return False
     
+    def _insert_user(self, username: str, email: str, password: str) -> bool:
+        """Inserts a user without committing; returns False if the username or email is taken"""
+        # Check if username or email already exists
+        cursor = self.conn.execute(
+            "SELECT id FROM users WHERE username = ? OR email = ?",
+            (username, email)
+        )
+        if cursor.fetchone():
+            return False
+        
+        # Hash password
+        password_hash, salt = self._hash_password(password)
+        
+        # Get current timestamp
+        now = datetime.datetime.now().isoformat()
+        
+        # Insert new user
+        self.conn.execute(
+            "INSERT INTO users (username, email, password_hash, salt, password_iterations, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (username, email, password_hash, salt, self.password_hasher.iterations, now)
+        )
+        return True
+    
     def authenticate_user(self, username: str, password: str) -> Dict:
         """
         Authenticate a user
@@ -552,11 +1152,14 @@ class UniversityDatabase:
             
         Returns:
             User dictionary if authentication successful, None otherwise
+            
+        Raises:
+            PasswordHasherBusy: If the password hashing pool is saturated
         """
         try:
             # Get user by username
             cursor = self.conn.execute(
-                "SELECT id, username, email, password_hash, salt FROM users WHERE username = ?", 
+                "SELECT id, username, email, password_hash, salt, password_iterations FROM users WHERE username = ?", 
                 (username,)
             )
             user_data = cursor.fetchone()
@@ -564,15 +1167,28 @@ class UniversityDatabase:
             if not user_data:
                 return None
                 
-            user_id, username, email, stored_hash, salt = user_data
+            user_id, username, email, stored_hash, salt, iterations = user_data
             
-            # Hash the provided password with the stored salt
-            password_hash, _ = self._hash_password(password, salt)
+            # Hash the provided password with the stored salt and iteration count
+            password_hash, _ = self._hash_password(password, salt, iterations)
             
             # Check if password matches
-            if password_hash != stored_hash:
+            if not hmac.compare_digest(password_hash, stored_hash):
                 return None
                 
+            # Rehash with the configured iteration count once it has changed; the
+            # password is already verified, so a busy pool only postpones this
+            if iterations != self.password_hasher.iterations:
+                try:
+                    password_hash, salt = self._hash_password(password)
+                except PasswordHasherBusy:
+                    pass
+                else:
+                    self.conn.execute(
+                        "UPDATE users SET password_hash = ?, salt = ?, password_iterations = ? WHERE id = ?",
+                        (password_hash, salt, self.password_hasher.iterations, user_id)
+                    )
+                
             # Update last login timestamp
             now = datetime.datetime.now().isoformat()
             self.conn.execute(
@@ -588,6 +1204,8 @@ class UniversityDatabase:
                 "email": email
             }
             
+        except PasswordHasherBusy:
+            raise
         except Exception as e:
             print(f"Error authenticating user: {e}")
             return None
@@ -681,11 +1299,10 @@ class UniversityDatabase:
             "SELECT * FROM user_profiles WHERE user_id = ? ORDER BY updated_at DESC", 
             (user_id,)
         )
-        columns = [col[0] for col in cursor.description]
         profiles = []
         
-        for row in cursor.fetchall():
-            profile = dict(zip(columns, row))
+        for record in fetch_records(cursor, "UserProfile"):
+            profile = record.copy()
             
             # Convert comma-separated strings back to lists
             if profile.get("preferred_majors"):
@@ -716,37 +1333,45 @@ class UniversityDatabase:
         Returns:
             True if successful, False otherwise
         """
-        try:
-            # Get current timestamp
-            now = datetime.datetime.now().isoformat()
-            
-            # Check if this recommendation already exists
-            cursor = self.conn.execute(
-                "SELECT id FROM saved_recommendations WHERE user_id = ? AND profile_id = ? AND university_id = ?",
-                (user_id, profile_id, university_id)
-            )
+        return self.save_recommendations_bulk(user_id, profile_id, [
+            {"university_id": university_id, "match_score": match_score, "notes": notes}
+        ])
+    
+    def save_recommendations_bulk(self, user_id: int, profile_id: int, recommendations: List[Dict]) -> bool:
+        """
+        Save many university recommendations for a user profile in one transaction
+        
+        Recommendations already saved for the profile are updated in place.
+        
+        Args:
+            user_id: The user's ID
+            profile_id: The profile ID
+            recommendations: Dictionaries with university_id, match_score and optional notes
             
-            if cursor.fetchone():
-                # Update existing recommendation
-                self.conn.execute(
-                    "UPDATE saved_recommendations SET match_score = ?, notes = ?, created_at = ? WHERE user_id = ? AND profile_id = ? AND university_id = ?",
-                    (match_score, notes, now, user_id, profile_id, university_id)
-                )
-            else:
-                # Insert new recommendation
-                self.conn.execute(
-                    "INSERT INTO saved_recommendations (user_id, profile_id, university_id, match_score, notes, created_at) VALUES (?, ?, ?, ?, ?, ?)",
-                    (user_id, profile_id, university_id, match_score, notes, now)
+        Returns:
+            True if successful, False otherwise
+        """
+        # Get current timestamp
+        now = datetime.datetime.now().isoformat()
+        rows = [(user_id, profile_id, rec["university_id"], rec["match_score"], rec.get("notes"), now)
+                for rec in recommendations]
+        
+        try:
+            with self.conn:
+                self.conn.executemany(
+                    """INSERT INTO saved_recommendations (user_id, profile_id, university_id, match_score, notes, created_at)
+                       VALUES (?, ?, ?, ?, ?, ?)
+                       ON CONFLICT(user_id, profile_id, university_id) DO UPDATE SET
+                           match_score = excluded.match_score, notes = excluded.notes, created_at = excluded.created_at""",
+                    rows
                 )
-                
-            self.conn.commit()
             return True
             
         except Exception as e:
-            print(f"Error saving recommendation: {e}")
+            print(f"Error saving recommendations: {e}")
             return False
     
-    def get_saved_recommendations(self, user_id: int, profile_id: int = None) -> List[Dict]:
+    def get_saved_recommendations(self, user_id: int, profile_id: int = None) -> List[Record]:
         """
         Get saved recommendations for a user
         
@@ -755,7 +1380,7 @@ class UniversityDatabase:
             profile_id: Optional profile ID to filter by
             
         Returns:
-            List of recommendation dictionaries
+            List of recommendation records
         """
         query = """
             SELECT r.id, r.user_id, r.profile_id, r.university_id, r.match_score, r.notes, r.created_at,
@@ -773,8 +1398,7 @@ class UniversityDatabase:
         query += " ORDER BY r.match_score DESC"
         
         cursor = self.conn.execute(query, params)
-        columns = [col[0] for col in cursor.description]
-        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        return fetch_records(cursor, "SavedRecommendation")
     
     def delete_user_profile(self, user_id, profile_id):
         """Delete a user profile and associated saved recommendations"""
@@ -797,7 +1421,7 @@ class UniversityDatabase:
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             return False
-
+    
     def delete_saved_recommendation(self, user_id, rec_id):
         """Delete a single saved recommendation"""
         try:
@@ -814,6 +1438,18 @@ class UniversityDatabase:
             return False
     
     def close(self):
-        """Closes the database connection"""
-        if self.conn:
-            self.conn.close() 
\ No newline at end of file
+        """Closes the database connections of all threads"""
+        with self._connections_lock:
+            connections = [conn for _, conn in self._connections]
+            connections += [conn for _, _, conn in self._replica_connections]
+            self._connections = []
+            self._replica_connections = []
+        if self._shared_conn is not None:
+            connections.append(self._shared_conn)
+        if self._replica is not None:
+            connections.append(self._replica[1])
+            self._replica = None
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+        self.password_hasher.close()
\ No newline at end of file
@@ -0,0 +1,312 @@
+from typing import List, Dict, Optional
+import os
+import json
+import gzip
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+import requests
+from requests.adapters import HTTPAdapter
+
+# Defaults, overridable through environment variables
+DEFAULT_MAX_CONCURRENCY = 8         # DEEPSEEK_MAX_CONCURRENCY: requests in flight at once
+DEFAULT_TIMEOUT = 5.0               # DEEPSEEK_TIMEOUT: seconds per request
+DEFAULT_LATENCY_BUDGET = 10.0       # DEEPSEEK_LATENCY_BUDGET: seconds for a whole batch
+DEFAULT_FAILURE_THRESHOLD = 5       # DEEPSEEK_FAILURE_THRESHOLD: consecutive failures that open the circuit
+DEFAULT_COOLDOWN = 30.0             # DEEPSEEK_COOLDOWN: seconds the circuit stays open
+DEFAULT_BATCH_SIZE = 1              # DEEPSEEK_BATCH_SIZE: universities per request (1 sends one pair per request)
+DEFAULT_GZIP = False                # DEEPSEEK_GZIP: gzip request bodies
+
+# University columns the remote scorer uses; everything else is left out of requests
+UNIVERSITY_FIELDS = (
+    "id", "name", "acceptance_rate", "tuition_fee", "academic_rank", "location", "environment",
+    "scholarship_percent", "job_placement", "diversity_score", "major_strengths", "university_type",
+    "region", "country", "campus_size", "religious_affiliation"
+)
+
+
+# Profile preferences the remote scorer uses; weights, filters and UI fields stay local
+PROFILE_FIELDS = (
+    "gpa", "sat_score", "budget", "preferred_majors", "preferred_locations", "preferred_environment",
+    "preferred_size", "preferred_region", "preferred_country", "preferred_university_type",
+    "preferred_religious_affiliation"
+)
+
+
+def trim_profile(user_profile: Dict) -> Dict:
+    """User profile with only the preferences the remote scorer uses, leaving out empty ones"""
+    return {field: user_profile[field] for field in PROFILE_FIELDS
+            if user_profile.get(field) not in (None, "", [], {})}
+
+
+def trim_university(university: Dict) -> Dict:
+    """University with only the fields the remote scorer uses, leaving out missing values"""
+    return {field: university[field] for field in UNIVERSITY_FIELDS if university.get(field) is not None}
+
+
+class CircuitBreaker:
+    """
+    Stops calls to a failing service for a cool-down period.
+
+    The circuit opens after failure_threshold consecutive failures. Once the
+    cool-down has passed, a single trial call is let through: success closes
+    the circuit, failure opens it for another cool-down.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 cooldown: float = DEFAULT_COOLDOWN, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if self.clock() - self._opened_at >= self.cooldown:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self) -> bool:
+        """Whether a call may be made now"""
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = self.clock()
+            self._trial_in_flight = False
+
+
+class DeepseekClient:
+    """
+    Client for the Deepseek match API.
+
+    Requests reuse keep-alive connections from a pooled session and are sent
+    concurrently, at most max_concurrency at a time. Every request has a
+    timeout, a batch has an overall latency budget, and a circuit breaker
+    skips the API after repeated failures. Scores that could not be fetched
+    are returned as None so callers can fall back to local scoring.
+    """
+
+    def __init__(self, api_url: str, api_key: str, max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 timeout: float = DEFAULT_TIMEOUT, latency_budget: float = DEFAULT_LATENCY_BUDGET,
+                 breaker: CircuitBreaker = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                 compress: bool = DEFAULT_GZIP):
+        self.api_url = api_url
+        self.api_key = api_key
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout = timeout
+        self.latency_budget = latency_budget
+        self.breaker = breaker or CircuitBreaker()
+        self.batch_size = max(1, batch_size)
+        self.compress = compress
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        })
+
+        self._executor = None
+        self._lock = threading.Lock()
+
+        # Traffic counters
+        self.requests_sent = 0
+        self.bytes_sent = 0
+
+    @classmethod
+    def from_env(cls, api_url: str, api_key: str) -> "DeepseekClient":
+        """Creates a client with limits read from the DEEPSEEK_* environment variables"""
+        return cls(
+            api_url, api_key,
+            max_concurrency=int(os.environ.get("DEEPSEEK_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)),
+            timeout=float(os.environ.get("DEEPSEEK_TIMEOUT", DEFAULT_TIMEOUT)),
+            latency_budget=float(os.environ.get("DEEPSEEK_LATENCY_BUDGET", DEFAULT_LATENCY_BUDGET)),
+            breaker=CircuitBreaker(
+                failure_threshold=int(os.environ.get("DEEPSEEK_FAILURE_THRESHOLD", DEFAULT_FAILURE_THRESHOLD)),
+                cooldown=float(os.environ.get("DEEPSEEK_COOLDOWN", DEFAULT_COOLDOWN))
+            ),
+            batch_size=int(os.environ.get("DEEPSEEK_BATCH_SIZE", DEFAULT_BATCH_SIZE)),
+            compress=os.environ.get("DEEPSEEK_GZIP", str(DEFAULT_GZIP)).lower() == "true"
+        )
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_concurrency, thread_name_prefix="deepseek")
+            return self._executor
+
+    def _post(self, payload: Dict) -> Optional[Dict]:
+        """Sends one request through the circuit breaker; returns the JSON object response or None on failure"""
+        if not self.breaker.allow():
+            return None
+
+        body = json.dumps(payload, separators=(",", ":"), default=str).encode()
+        headers = {}
+        if self.compress:
+            body = gzip.compress(body)
+            headers["Content-Encoding"] = "gzip"
+        with self._lock:
+            self.requests_sent += 1
+            self.bytes_sent += len(body)
+
+        try:
+            response = self.session.post(self.api_url, data=body, headers=headers, timeout=self.timeout)
+            if response.status_code != 200:
+                print(f"Deepseek API error: {response.status_code}, {response.text}")
+                self.breaker.record_failure()
+                return None
+            result = response.json()
+            if not isinstance(result, dict):
+                raise ValueError(f"expected a JSON object, got {type(result).__name__}")
+        except Exception as e:
+            print(f"Error calling Deepseek API: {str(e)}")
+            self.breaker.record_failure()
+            return None
+
+        self.breaker.record_success()
+        return result
+
+    def score(self, user_profile: Dict, university: Dict) -> Optional[float]:
+        """
+        Fetch the match score of one university
+
+        Args:
+            user_profile: Dictionary with user preferences
+            university: Dictionary with university data
+
+        Returns:
+            Match score between 0-1, or None if the API is unavailable or failed
+        """
+        result = self._post({
+            "user_profile": trim_profile(user_profile),
+            "university": trim_university(university)
+        })
+        if result is None:
+            return None
+        # Assuming API returns a match_score field with value between 0-1
+        return result.get("match_score", 0.5)
+
+    def _score_single(self, user_profile: Dict, batch: List[Dict]) -> List[Optional[float]]:
+        """Scores a one-university batch with the single-pair protocol"""
+        return [self.score(user_profile, batch[0])]
+
+    def score_batch(self, user_profile: Dict, universities: List[Dict]) -> List[Optional[float]]:
+        """
+        Fetch the match scores of several universities in one request
+
+        The request carries the profile once and the universities as a list;
+        the response's match_scores entries are mapped back by university ID.
+
+        Args:
+            user_profile: Dictionary with user preferences
+            universities: List of university dictionaries
+
+        Returns:
+            Match score per university, None where the response had no score for it
+        """
+        result = self._post({
+            "user_profile": trim_profile(user_profile),
+            "universities": [trim_university(university) for university in universities]
+        })
+        if result is None:
+            return [None] * len(universities)
+
+        # Assuming API returns match_scores as [{"id": ..., "match_score": ...}]
+        scores = {}
+        entries = result.get("match_scores")
+        for entry in entries if isinstance(entries, list) else []:
+            if isinstance(entry, dict) and "id" in entry:
+                scores[entry["id"]] = entry.get("match_score")
+        return [scores.get(university.get("id")) for university in universities]
+
+    def score_many(self, user_profile: Dict, universities: List[Dict]) -> List[Optional[float]]:
+        """
+        Fetch the match scores of many universities concurrently
+
+        With a batch size above 1, universities are sent batch_size per request.
+        Requests still pending when the latency budget runs out are cancelled.
+
+        Args:
+            user_profile: Dictionary with user preferences
+            universities: List of university dictionaries
+
+        Returns:
+            Match score per university, None where it could not be fetched
+        """
+        # While the circuit is open, skip the API without queueing any request
+        if not universities or self.breaker.state == CircuitBreaker.OPEN:
+            return [None] * len(universities)
+
+        executor = self._get_executor()
+        if self.batch_size > 1:
+            batches = [universities[start:start + self.batch_size]
+                       for start in range(0, len(universities), self.batch_size)]
+            request = self.score_batch
+        else:
+            batches = [[university] for university in universities]
+            request = self._score_single
+        futures = [executor.submit(request, user_profile, batch) for batch in batches]
+        done, not_done = wait(futures, timeout=self.latency_budget)
+        for future in not_done:
+            future.cancel()
+        if not_done:
+            skipped = sum(len(batch) for batch, future in zip(batches, futures) if future in not_done)
+            print(f"Deepseek API latency budget exceeded, {skipped} universities scored locally")
+
+        scores = []
+        for batch, future in zip(batches, futures):
+            scores.extend(future.result() if future in done else [None] * len(batch))
+        return scores
+
+    def close(self):
+        """Stops the worker threads and closes pooled connections"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+        self.session.close()
+
+
+# Clients shared by all matchers, so connections and circuit state survive matcher re-creation
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_deepseek_client(api_url: str, api_key: str) -> DeepseekClient:
+    """Shared client for an API URL and key, created from the environment on first use"""
+    with _clients_lock:
+        client = _clients.get((api_url, api_key))
+        if client is None:
+            client = _clients[(api_url, api_key)] = DeepseekClient.from_env(api_url, api_key)
+        return client
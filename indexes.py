@@ -0,0 +1,367 @@
+from typing import List, Dict, Optional, Sequence, Tuple
+from functools import lru_cache
+import numpy as np
+
+# Upper bound on memoized per-major lookups kept by each index
+MAX_CACHED_LOOKUPS = 4096
+
+
+@lru_cache(maxsize=65536)
+def split_majors(major_strengths: str) -> Tuple[str, ...]:
+    """Splits a comma-separated major_strengths value into stripped, lower-cased majors"""
+    return tuple(m.strip().lower() for m in major_strengths.split(","))
+
+
+@lru_cache(maxsize=65536)
+def major_words(major: str) -> frozenset:
+    """Set of words in a normalized major"""
+    return frozenset(major.split())
+
+
+@lru_cache(maxsize=65536)
+def majors_overlap(user_major: str, uni_major: str) -> bool:
+    """
+    Partial match rule used by the academic match: two different majors match
+    when they share more than 30% of the words of the longer one
+    """
+    if user_major == uni_major:
+        return False
+    user_words = major_words(user_major)
+    uni_words = major_words(uni_major)
+    common_words = user_words.intersection(uni_words)
+    return bool(common_words) and len(common_words) / max(len(user_words), len(uni_words)) > 0.3
+
+
+@lru_cache(maxsize=65536)
+def location_tokens(location: Optional[str]) -> Tuple[str, frozenset]:
+    """Lower-cased text of a location and its set of city/state/country tokens (", " separated parts)"""
+    text = (location or "").lower()
+    return text, frozenset(text.split(", "))
+
+
+@lru_cache(maxsize=65536)
+def location_text_points(location: Optional[str], locations: Tuple[str, ...],
+                         location_components: Tuple[Tuple[str, ...], ...]) -> int:
+    """
+    Location text rule of calculate_location_match for one location value
+
+    A location containing any preferred location earns 25 points; otherwise it
+    earns 15 points for every preferred location sharing a token with it.
+
+    Args:
+        location: University location
+        locations: Lower-cased preferred locations
+        location_components: The ", " separated components of each preferred location
+    """
+    text, tokens = location_tokens(location)
+    if any(preferred in text for preferred in locations):
+        return 25
+    return 15 * sum(1 for components in location_components if not tokens.isdisjoint(components))
+
+
+def _cached_lookup(cache: Dict, key, compute):
+    """Memoizes a lookup in a dictionary that is cleared once it holds MAX_CACHED_LOOKUPS entries"""
+    result = cache.get(key)
+    if result is None:
+        if len(cache) >= MAX_CACHED_LOOKUPS:
+            cache.clear()
+        result = cache[key] = compute(key)
+    return result
+
+
+def normalize_user_majors(preferred_majors) -> List[str]:
+    """Normalizes preferred_majors (comma-separated string or list) into lower-cased majors"""
+    if isinstance(preferred_majors, str):
+        return [m.strip().lower() for m in preferred_majors.split(",")]
+    return [m.strip().lower() for m in preferred_majors]
+
+
+class MajorIndex:
+    """
+    Inverted index over the majors offered by each university.
+
+    Majors are tokenized once into a vocabulary. The index maps each major to
+    the rows (universities) offering it, and each word to the majors that
+    contain it, so match scores for a profile are computed from postings of
+    the few majors the profile actually touches.
+    """
+
+    def __init__(self, major_strengths: Sequence[Optional[str]]):
+        """
+        Args:
+            major_strengths: Comma-separated majors per university (None or empty for none)
+        """
+        vocab = {}
+        raw_entries = {}
+        parsed = {}
+        rows, major_ids, counts = [], [], []
+        for row, strengths in enumerate(major_strengths):
+            if not strengths:
+                continue
+            entries = parsed.get(strengths)
+            if entries is None:
+                entry_counts = {}
+                for raw_major in strengths.split(","):
+                    major_id = vocab.setdefault(raw_major.strip().lower(), len(vocab))
+                    raw_entries.setdefault(raw_major.lower(), major_id)
+                    entry_counts[major_id] = entry_counts.get(major_id, 0) + 1
+                entries = parsed[strengths] = list(entry_counts.items())
+            for major_id, count in entries:
+                rows.append(row)
+                major_ids.append(major_id)
+                counts.append(count)
+
+        self._init(
+            size=len(major_strengths),
+            has_majors=np.array([bool(m) for m in major_strengths], dtype=bool),
+            vocab=list(vocab),
+            raw_entries=raw_entries,
+            rows=np.array(rows, dtype=np.int64),
+            major_ids=np.array(major_ids, dtype=np.int64),
+            counts=np.array(counts, dtype=np.float64)
+        )
+
+    def _init(self, size, has_majors, vocab, raw_entries, rows, major_ids, counts):
+        """Builds the postings lists from (row, major, count) pairs"""
+        # Postings: rows offering each major, grouped by major ID
+        order = np.argsort(major_ids, kind="stable")
+        self._set_postings(size, has_majors, vocab, raw_entries, rows[order], counts[order],
+                           np.searchsorted(major_ids[order], np.arange(len(vocab) + 1)))
+
+    def _set_postings(self, size, has_majors, vocab, raw_entries, posting_rows, posting_counts, offsets):
+        """Sets the postings arrays and builds the lookup tables over the vocabulary"""
+        self.size = size
+        self.has_majors = has_majors
+        self.vocab = vocab
+        self.vocab_ids = {major: major_id for major_id, major in enumerate(vocab)}
+        self.raw_entries = raw_entries
+        self._posting_rows = posting_rows
+        self._posting_counts = posting_counts
+        self._offsets = offsets
+
+        # Word -> majors containing it
+        self.token_index = {}
+        for major_id, major in enumerate(vocab):
+            for word in major_words(major):
+                self.token_index.setdefault(word, []).append(major_id)
+
+        self._partial_cache = {}
+        self._related_cache = {}
+
+    @classmethod
+    def from_postings(cls, size: int, has_majors: np.ndarray, vocab: List[str], raw_entries: Dict[str, int],
+                      posting_rows: np.ndarray, posting_counts: np.ndarray, offsets: np.ndarray) -> "MajorIndex":
+        """Rebuilds an index from the arrays of postings_arrays() without copying them"""
+        index = object.__new__(cls)
+        index._set_postings(size, has_majors, vocab, raw_entries, posting_rows, posting_counts, offsets)
+        return index
+
+    def postings_arrays(self) -> Dict[str, np.ndarray]:
+        """The arrays backing the index, by name"""
+        return {"has_majors": self.has_majors, "posting_rows": self._posting_rows,
+                "posting_counts": self._posting_counts, "offsets": self._offsets}
+
+    def take(self, rows: Sequence[int]) -> "MajorIndex":
+        """Index restricted to a subset of rows, renumbered in the given order"""
+        rows = np.asarray(rows, dtype=np.int64)
+        position = np.full(self.size, -1, dtype=np.int64)
+        position[rows] = np.arange(len(rows))
+
+        major_ids = np.repeat(np.arange(len(self.vocab)), np.diff(self._offsets))
+        new_rows = position[self._posting_rows]
+        keep = new_rows >= 0
+
+        subset = object.__new__(MajorIndex)
+        subset._init(len(rows), self.has_majors[rows], self.vocab, self.raw_entries,
+                     new_rows[keep], major_ids[keep], self._posting_counts[keep])
+        return subset
+
+    def slice(self, start: int, stop: int) -> "MajorIndex":
+        """Index restricted to rows start:stop, without the full-size arrays take() builds"""
+        keep = np.flatnonzero((self._posting_rows >= start) & (self._posting_rows < stop))
+        major_ids = np.searchsorted(self._offsets, keep, side="right") - 1
+
+        subset = object.__new__(MajorIndex)
+        subset._set_postings(stop - start, self.has_majors[start:stop], self.vocab, self.raw_entries,
+                             self._posting_rows[keep] - start, self._posting_counts[keep],
+                             np.searchsorted(major_ids, np.arange(len(self.vocab) + 1)))
+        return subset
+
+    def postings(self, major_id: int):
+        """Rows offering a major and how many times each lists it"""
+        start, end = self._offsets[major_id], self._offsets[major_id + 1]
+        return self._posting_rows[start:end], self._posting_counts[start:end]
+
+    def _cached(self, cache: Dict, key: str, compute):
+        """Memoizes a per-major lookup with a bounded cache"""
+        return _cached_lookup(cache, key, compute)
+
+    def partial_matches(self, user_major: str) -> List[int]:
+        """Majors that partially match a user major, found through the word index"""
+        def compute(major):
+            candidates = set()
+            for word in major_words(major):
+                candidates.update(self.token_index.get(word, ()))
+            return sorted(c for c in candidates if majors_overlap(major, self.vocab[c]))
+        return self._cached(self._partial_cache, user_major, compute)
+
+    def related_majors(self, user_major: str) -> List[int]:
+        """Majors that contain, or are contained in, a user major (career match rule)"""
+        def compute(major):
+            return [major_id for major_id, uni_major in enumerate(self.vocab)
+                    if uni_major and (major in uni_major or uni_major in major)]
+        return self._cached(self._related_cache, user_major, compute)
+
+    def academic_match_scores(self, user_majors: List[str]) -> np.ndarray:
+        """
+        Major match score per university, as used by calculate_academic_match
+
+        Exact matches count once per university; partial matches earn half
+        credit for every listed major that shares enough words.
+        """
+        total_matches = np.zeros(self.size)
+        for user_major in user_majors:
+            major_id = self.vocab_ids.get(user_major)
+            if major_id is not None:
+                rows, _ = self.postings(major_id)
+                total_matches[rows] += 1
+            for partial_id in self.partial_matches(user_major):
+                rows, counts = self.postings(partial_id)
+                total_matches[rows] += 0.5 * counts
+        return np.minimum(total_matches / max(len(user_majors), 1), 1.0)
+
+    def career_match_counts(self, user_majors: List[str]) -> np.ndarray:
+        """Number of user majors related to at least one major of each university"""
+        major_matches = np.zeros(self.size)
+        for user_major in user_majors:
+            related = np.zeros(self.size, dtype=bool)
+            for major_id in self.related_majors(user_major):
+                rows, _ = self.postings(major_id)
+                related[rows] = True
+            major_matches += related
+        return major_matches
+
+    def rows_containing(self, text: str) -> np.ndarray:
+        """
+        Rows whose major_strengths contain text (case-insensitive), as used by
+        the major filter. Matching is done on individual listed majors.
+        """
+        text = text.lower()
+        major_ids = {major_id for raw_major, major_id in self.raw_entries.items() if text in raw_major}
+        matched = np.zeros(self.size, dtype=bool)
+        for major_id in major_ids:
+            rows, _ = self.postings(major_id)
+            matched[rows] = True
+        return np.flatnonzero(matched)
+
+
+class LocationIndex:
+    """
+    Index over the distinct location values of a set of universities.
+
+    Each location is parsed once into its lower-cased text and its
+    city/state/country tokens (the ", " separated parts). Token postings map
+    each token to the locations containing it, so the location text points of
+    a profile are computed once per distinct location from set lookups and
+    then broadcast to universities through their location codes.
+    """
+
+    def __init__(self, locations: Sequence[Optional[str]]):
+        """
+        Args:
+            locations: Distinct location values (e.g. the categories of the location column)
+        """
+        self.size = len(locations)
+        self.location_ids = {}
+        self.texts = []
+        self.token_index = {}
+        for location_id, location in enumerate(locations):
+            self.location_ids.setdefault(location, location_id)
+            text, tokens = location_tokens(location)
+            self.texts.append(text)
+            for token in tokens:
+                self.token_index.setdefault(token, []).append(location_id)
+
+        self._text_cache = {}
+        self._points_cache = {}
+
+    def text_matches(self, preferred_location: str) -> np.ndarray:
+        """Locations whose text contains a lower-cased preferred location"""
+        def compute(location):
+            return np.array([location in text for text in self.texts], dtype=bool)
+        return _cached_lookup(self._text_cache, preferred_location, compute)
+
+    def text_points(self, locations: Tuple[str, ...], location_components: Tuple[Tuple[str, ...], ...]) -> np.ndarray:
+        """Points of location_text_points for every location, from the token postings"""
+        def compute(key):
+            text_match = np.zeros(self.size, dtype=bool)
+            for location in locations:
+                text_match |= self.text_matches(location)
+            component_matches = np.zeros(self.size, dtype=np.int64)
+            for components in location_components:
+                matched = np.zeros(self.size, dtype=bool)
+                for component in components:
+                    matched[self.token_index.get(component, [])] = True
+                component_matches += matched
+            return np.where(text_match, 25, 15 * component_matches)
+        return _cached_lookup(self._points_cache, (locations, location_components), compute)
+
+    def matches_any(self, location: Optional[str], locations: Sequence[str]) -> bool:
+        """Whether a location value contains any of the lower-cased preferred locations"""
+        location_id = self.location_ids.get(location)
+        if location_id is None:
+            text, _ = location_tokens(location)
+            return any(preferred in text for preferred in locations)
+        return any(self.text_matches(preferred)[location_id] for preferred in locations)
+
+
+def intersect_rows(row_sets: List[np.ndarray]) -> np.ndarray:
+    """Intersection of sorted, unique row arrays, smallest first"""
+    row_sets = sorted(row_sets, key=len)
+    rows = row_sets[0]
+    for other in row_sets[1:]:
+        if not len(rows):
+            break
+        rows = np.intersect1d(rows, other, assume_unique=True)
+    return rows
+
+
+class FilterIndex:
+    """
+    Range and hash indexes over filterable university columns.
+
+    Numeric columns are kept as sorted value arrays (missing values left
+    out) searched by bisection, and categorical columns as hash buckets of
+    rows per value, so filters select rows without scanning the catalog.
+    Every lookup returns sorted row positions.
+    """
+
+    def __init__(self, numeric: Dict[str, np.ndarray], categorical: Dict[str, Tuple[np.ndarray, List]]):
+        """
+        Args:
+            numeric: Float columns by name, with NaN for missing values
+            categorical: (codes, categories) dictionary-encoded columns by name
+        """
+        self._sorted = {}
+        for name, values in numeric.items():
+            rows = np.flatnonzero(~np.isnan(values))
+            order = rows[np.argsort(values[rows], kind="stable")]
+            self._sorted[name] = (values[order], order)
+
+        self._buckets = {}
+        for name, (codes, categories) in categorical.items():
+            order = np.argsort(codes, kind="stable")
+            offsets = np.searchsorted(codes[order], np.arange(len(categories) + 1))
+            self._buckets[name] = {value: order[offsets[code]:offsets[code + 1]]
+                                   for code, value in enumerate(categories)}
+
+    def range_rows(self, column: str, low: float = None, high: float = None) -> np.ndarray:
+        """Rows with low <= value <= high (either bound optional); missing values never match"""
+        values, rows = self._sorted[column]
+        start = 0 if low is None else np.searchsorted(values, low, side="left")
+        stop = len(values) if high is None else np.searchsorted(values, high, side="right")
+        return np.sort(rows[start:stop])
+
+    def equal_rows(self, column: str, value) -> np.ndarray:
+        """Rows whose value equals value (None selects missing values)"""
+        return self._buckets[column].get(value, np.zeros(0, dtype=np.int64))
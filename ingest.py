@@ -0,0 +1,175 @@
+"""
+Streaming import of application records from CSV or JSONL exports
+
+Rows are validated with the required-field and status rules of
+AdmissionRateCalculator, deduplicated on (applicant_id, university_id,
+program) by the database and inserted in batched transactions. The read
+replica, if the database has one, is refreshed once at the end.
+
+Usage:
+    python ingest.py applications.csv --batch-size 10000
+"""
+import argparse
+import csv
+import json
+import os
+import time
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Iterator, Optional, Tuple
+from db import UniversityDatabase
+from admission_analytics import REQUIRED_APPLICATION_FIELDS, APPLICATION_STATUSES
+
+# Applications inserted per transaction
+DEFAULT_BATCH_SIZE = int(os.environ.get("INGEST_BATCH_SIZE", "10000"))
+
+# Rows read between progress reports
+DEFAULT_PROGRESS_EVERY = 100000
+
+
+def read_rows(path: str, file_format: str = None) -> Iterator[Dict]:
+    """
+    Streams the rows of a CSV file (with a header row) or a JSONL file
+
+    Args:
+        path: File to read
+        file_format: "csv" or "jsonl"; by default taken from the file extension
+
+    Returns:
+        Iterator of row dictionaries; unparseable JSONL lines are yielded as empty rows
+    """
+    if file_format is None:
+        file_format = "csv" if path.lower().endswith(".csv") else "jsonl"
+
+    with open(path, newline="", encoding="utf-8") as f:
+        if file_format == "csv":
+            yield from csv.DictReader(f)
+            return
+
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                row = None
+            yield row if isinstance(row, dict) else {}
+
+
+def _optional_number(value, number_type):
+    """Converts an optional numeric field; raises ValueError for values that are not numbers"""
+    if value is None or value == "":
+        return None
+    return number_type(value)
+
+
+def clean_application(row: Dict) -> Optional[Tuple]:
+    """
+    Validates an application row and converts it for insert_applications
+
+    Args:
+        row: Application fields as read from the export
+
+    Returns:
+        Tuple of the APPLICATION_COLUMNS values, or None if the row is invalid
+    """
+    # Check for required fields
+    if any(row.get(key) in (None, "") for key in REQUIRED_APPLICATION_FIELDS + ("university_id",)):
+        return None
+
+    status = str(row["status"]).strip().lower()
+    if status not in APPLICATION_STATUSES:
+        return None
+
+    try:
+        submission_date = datetime.strptime(str(row["submission_date"]).strip(), "%Y-%m-%d").date()
+        return (
+            str(row["applicant_id"]).strip(),
+            int(row["university_id"]),
+            str(row["program"]).strip(),
+            status,
+            submission_date.isoformat(),
+            _optional_number(row.get("gpa"), float),
+            _optional_number(row.get("sat_score"), int),
+            _optional_number(row.get("extracurricular_score"), float)
+        )
+    except (TypeError, ValueError):
+        return None
+
+
+def ingest(db: UniversityDatabase, rows: Iterator[Dict], batch_size: int = DEFAULT_BATCH_SIZE,
+           progress_every: int = DEFAULT_PROGRESS_EVERY) -> Dict:
+    """
+    Inserts application rows in batches as they are read
+
+    Args:
+        db: Database to insert into
+        rows: Application rows, e.g. from read_rows
+        batch_size: Valid applications inserted per transaction
+        progress_every: Rows read between progress reports (0 for none)
+
+    Returns:
+        Dict with the counts of rows read, inserted, duplicate and invalid, and the rate
+    """
+    stats = {"read": 0, "inserted": 0, "duplicates": 0, "invalid": 0}
+    start = time.perf_counter()
+    next_report = progress_every
+
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, batch_size))
+        if not chunk:
+            break
+        stats["read"] += len(chunk)
+
+        batch = []
+        for row in chunk:
+            application = clean_application(row)
+            if application is None:
+                stats["invalid"] += 1
+            else:
+                batch.append(application)
+
+        if batch:
+            inserted = db.insert_applications(batch, refresh_replica=False)
+            stats["inserted"] += inserted
+            stats["duplicates"] += len(batch) - inserted
+
+        if progress_every and stats["read"] >= next_report:
+            elapsed = time.perf_counter() - start
+            print(f"{stats['read']:,} rows read, {stats['inserted']:,} inserted "
+                  f"({stats['read'] / elapsed:,.0f} rows/s)")
+            next_report += progress_every
+
+    # Make the new applications visible to reads served by the read replica
+    if stats["inserted"]:
+        db.refresh_replica()
+
+    stats["seconds"] = time.perf_counter() - start
+    stats["rows_per_second"] = stats["read"] / stats["seconds"] if stats["seconds"] > 0 else 0.0
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import application records from a CSV or JSONL export")
+    parser.add_argument("path", help="CSV file with a header row, or JSONL file with one application per line")
+    parser.add_argument("--db", default="universities.db", help="SQLite database to import into")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="File format (default: from the extension)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="Applications inserted per transaction")
+    parser.add_argument("--progress-every", type=int, default=DEFAULT_PROGRESS_EVERY,
+                        help="Rows read between progress reports (0 for none)")
+    args = parser.parse_args()
+
+    db = UniversityDatabase(args.db)
+    try:
+        stats = ingest(db, read_rows(args.path, args.format), max(1, args.batch_size), args.progress_every)
+    finally:
+        db.close()
+
+    print(f"Read {stats['read']:,} rows in {stats['seconds']:.2f}s ({stats['rows_per_second']:,.0f} rows/s): "
+          f"{stats['inserted']:,} inserted, {stats['duplicates']:,} duplicates, {stats['invalid']:,} invalid")
+
+
+if __name__ == "__main__":
+    main()
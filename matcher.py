@@ -1,14 +1,49 @@
-from typing import List, Dict
+from typing import List, Dict, NamedTuple
 from db import UniversityDatabase
-import requests
-import json
 import os
 import math
+import heapq
+import numpy as np
 from admission_analytics import AdmissionRateCalculator
+from catalog import UniversityCatalog
+from deepseek_client import DeepseekClient, get_deepseek_client
+from score_cache import ScoreCache
+from component_cache import ComponentCache
+from scoring_plan import scoring_plan
+from parallel import ParallelScorer, PARALLEL_MIN_UNIVERSITIES
+from indexes import split_majors, majors_overlap, location_text_points
+from profile_features import compile_profile
+from vectorized import (UniversityFeatures, VectorizedScorer, COMPONENTS, validate_acceptance_rates,
+                        weighted_match_scores, sigmoid_match_scores, top_k_indices)
+
+# Scoring engines selectable on UniversityMatcher
+ENGINES = ("scalar", "vectorized")
+
+# Divisors converting raw component scores to 0-1 (location and campus are scored 0-100)
+COMPONENT_SCALES = {"academic": 1, "financial": 1, "location": 100, "career": 1, "campus": 100}
+
+# Components whose upper bound is looser than the exact score
+BOUNDED_COMPONENTS = ("academic", "career")
+
+# Default working memory for one match_many chunk, and the approximate
+# bytes of scoring temporaries needed per university in a chunk
+MATCH_MANY_MEMORY_BUDGET = 64 * 1024 * 1024
+MATCH_MANY_BYTES_PER_UNIVERSITY = 512
+
+
+class BatchMatchResult(NamedTuple):
+    """Result of UniversityMatcher.match_many"""
+    universities: List[Dict]   # Scored universities (columns of scores)
+    scores: np.ndarray         # Match scores (0-1), one row per profile
+    top_indices: np.ndarray    # Per profile, indices of the best universities, best first
+    top_scores: np.ndarray     # Per profile, match scores of those universities
 
 class UniversityMatcher:
-    def __init__(self, db: UniversityDatabase):
+    def __init__(self, db: UniversityDatabase, engine: str = None, catalog: UniversityCatalog = None,
+                 score_cache: ScoreCache = None):
         self.db = db
+        # Shared in-memory copy of the universities table
+        self.catalog = catalog or UniversityCatalog(db)
         self.default_weights = {
             "academic": 0.35,    # Academic match (ranks, acceptance rate)
             "financial": 0.30,   # Financial match (tuition, scholarships)
@@ -20,9 +55,51 @@ class UniversityMatcher:
         self.use_deepseek = os.environ.get("USE_DEEPSEEK_API", "false").lower() == "true"
         self.deepseek_api_key = os.environ.get("DEEPSEEK_API_KEY", "")
         self.deepseek_api_url = os.environ.get("DEEPSEEK_API_URL", "https://api.deepseek.com/v1/match")
+        # Persistent cache of Deepseek API scores, shareable between matchers
+        self.score_cache = score_cache or ScoreCache.from_env(db)
         
         # Initialize admission calculator
         self.admission_calculator = AdmissionRateCalculator()
+        
+        # Scoring engine: "scalar" scores one university at a time, "vectorized"
+        # scores the whole catalog at once from column arrays
+        self.set_engine(engine or os.environ.get("MATCHER_ENGINE", "scalar"))
+        self.vectorized_scorer = VectorizedScorer()
+        
+        # Optional process pool for the vectorized engine (MATCHER_WORKERS > 1 enables it)
+        self.parallel_scorer = None
+        self.set_parallel(int(os.environ.get("MATCHER_WORKERS", "0") or 0))
+        
+        # Component scores of recent profiles, so weights-only changes skip rescoring
+        self.component_cache = ComponentCache()
+        
+        # Universities pruned by upper bounds in the last get_recommendations call
+        self.last_pruned = 0
+    
+    def set_engine(self, engine: str):
+        """Selects the scoring engine used by match_universities and get_recommendations"""
+        engine = engine.lower()
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown matcher engine '{engine}', expected one of {ENGINES}")
+        self.engine = engine
+    
+    def set_parallel(self, workers: int, min_universities: int = PARALLEL_MIN_UNIVERSITIES):
+        """
+        Enables or disables multi-process scoring for the vectorized engine
+
+        Args:
+            workers: Number of worker processes; 0 or 1 scores in-process
+            min_universities: Smaller university lists are always scored in-process
+        """
+        if self.parallel_scorer is not None:
+            self.parallel_scorer.close()
+            self.parallel_scorer = None
+        if workers > 1:
+            self.parallel_scorer = ParallelScorer(workers, min_universities)
+    
+    def _vectorized(self):
+        """Scorer used by the vectorized engine"""
+        return self.parallel_scorer or self.vectorized_scorer
     
     def set_weights(self, weights: Dict[str, float]):
         """Updates the weights used for matching"""
@@ -30,50 +107,67 @@ class UniversityMatcher:
         total = sum(weights.values())
         self.weights = {k: v/total for k, v in weights.items()}
     
+    def _component_cache_key(self, engine: str, profile, universities: List[Dict]):
+        """
+        Key and data version under which the component scores of a university list are cached
+        
+        Returns:
+            (key, version) tuple; the key is None if the list is not made of current catalog records
+        """
+        snapshot = self.catalog.snapshot()
+        version = (snapshot.version, self.db.get_table_version("applications"))
+        rows = None
+        if universities is not snapshot.records:
+            rows = snapshot.rows_of_records(universities)
+            if rows is None:
+                return None, version
+            rows = tuple(rows)
+        return (engine, profile.scoring_key(), rows), version
+    
+    def _deepseek_client(self) -> DeepseekClient:
+        """Pooled Deepseek API client shared by matchers with the same URL and key"""
+        return get_deepseek_client(self.deepseek_api_url, self.deepseek_api_key)
+    
     def calculate_match_score_with_deepseek(self, user_profile: Dict, university: Dict) -> float:
         """Calculate match score using Deepseek API"""
         if not self.deepseek_api_key:
             print("Warning: Deepseek API key not set. Using fallback algorithm.")
             return self.calculate_match_score(user_profile, university)
-            
-        try:
-            # Prepare data for API request
-            payload = {
-                "user_profile": user_profile,
-                "university": university
-            }
-            
-            headers = {
-                "Authorization": f"Bearer {self.deepseek_api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            # Make API request
-            response = requests.post(
-                self.deepseek_api_url,
-                headers=headers,
-                data=json.dumps(payload)
-            )
-            
-            # Check if request was successful
-            if response.status_code == 200:
-                result = response.json()
-                # Assuming API returns a match_score field with value between 0-1
-                return result.get("match_score", 0.5)
-            else:
-                print(f"Deepseek API error: {response.status_code}, {response.text}")
-                # Fallback to regular algorithm if API fails
-                return self.calculate_match_score(user_profile, university)
-                
-        except Exception as e:
-            print(f"Error calling Deepseek API: {str(e)}")
-            # Fallback to regular algorithm if API fails
+        
+        score = self._fetch_deepseek_scores(user_profile, [university]).get(id(university))
+        if score is None:
+            # Fallback to regular algorithm if API fails or the circuit is open
             return self.calculate_match_score(user_profile, university)
+        return score
+    
+    def _fetch_deepseek_scores(self, user_profile: Dict, universities: List[Dict]) -> Dict[int, float]:
+        """
+        Deepseek API scores for many universities, from the score cache or fetched concurrently
+        
+        Returns:
+            Dictionary mapping id() of each university dictionary to its score;
+            universities missing from it must be scored locally
+        """
+        if not self.deepseek_api_key:
+            print("Warning: Deepseek API key not set. Using fallback algorithm.")
+            return {}
+        
+        profile = compile_profile(user_profile)
+        api_scores = self.score_cache.get_many(profile, universities)
+        missing = [university for university in universities if id(university) not in api_scores]
+        if missing:
+            scores = self._deepseek_client().score_many(profile.to_dict(), missing)
+            self.score_cache.put_many(profile, missing, scores)
+            api_scores.update((id(university), score) for university, score in zip(missing, scores) if score is not None)
+        return api_scores
     
     def get_accurate_acceptance_rate(self, university_id: int) -> float:
         """
         Get accurate acceptance rate for a university using the advanced calculator
         
+        Rates calculated from application data are kept in the acceptance_rate_cache
+        table until that university's applications change.
+        
         Args:
             university_id: The ID of the university
             
@@ -81,12 +175,30 @@ class UniversityMatcher:
             Accurate acceptance rate as a percentage
         """
         # Check if we have application data for this university
-        university_applications = self.db.get_university_applications(university_id)
+        cached = self.db.get_cached_acceptance_rate(university_id)
+        
+        if cached is None:
+            return self._get_stored_acceptance_rate(university_id)
+        
+        acceptance_rate, generation = cached
+        if acceptance_rate is None:
+            acceptance_rate = self._calculate_accurate_acceptance_rate(university_id, generation)
+        return acceptance_rate
+    
+    def _get_stored_acceptance_rate(self, university_id: int) -> float:
+        """Fallback to stored rate if no application data"""
+        university = self.catalog.get(university_id)
+        return self._validate_acceptance_rate(university.get("acceptance_rate", 0.0))
+    
+    def _calculate_accurate_acceptance_rate(self, university_id: int, generation: int) -> float:
+        """Calculates a university's acceptance rate from its applications and caches it"""
+        # Read from the database file, where the generation was read; the replica may lag behind
+        university_applications = self.db.get_university_applications(university_id, use_replica=False)
         
         if not university_applications:
-            # Fallback to stored rate if no application data
-            university = self.db.get_university(university_id)
-            return self._validate_acceptance_rate(university.get("acceptance_rate", 0.0))
+            # All applications were removed
+            self.db.delete_cached_acceptance_rate(university_id, generation)
+            return self._get_stored_acceptance_rate(university_id)
         
         # Load and validate application data
         self.admission_calculator.load_applications(university_applications)
@@ -100,7 +212,9 @@ class UniversityMatcher:
         admission_rate, details = self.admission_calculator.calculate_admission_rate()
         
         # Validate and adjust the calculated rate
-        return self._validate_acceptance_rate(admission_rate)
+        acceptance_rate = self._validate_acceptance_rate(admission_rate)
+        self.db.save_cached_acceptance_rate(university_id, acceptance_rate, generation)
+        return acceptance_rate
     
     def _validate_acceptance_rate(self, rate: float) -> float:
         """
@@ -136,58 +250,85 @@ class UniversityMatcher:
         
         return rate
     
-    def calculate_academic_match(self, user_profile: Dict, university: Dict) -> float:
-        """Calculate the academic compatibility score between user and university"""
-            academic_score = 0
-        
-        # Calculate academic strength based on GPA and SAT
-        if "gpa" in user_profile and "sat_score" in user_profile:
-            # Enhanced normalization of GPA with non-linear scaling (gives bonus to very high GPAs)
-            gpa = user_profile["gpa"]
-            if gpa > 4.0:  # Handle weighted GPAs gracefully
-                gpa = 4.0
-            
-            gpa_normalized = (gpa / 4.0) ** 0.8  # Non-linear scaling gives more weight to higher GPAs
+    def get_acceptance_rate_array(self, features: UniversityFeatures) -> np.ndarray:
+        """
+        Acceptance rates used by the academic match for every row of a feature set,
+        matching what calculate_academic_match would look up one university at a time
+        
+        Args:
+            features: Encoded university columns
             
-            # Enhanced SAT normalization with percentile approximation
-            sat = user_profile["sat_score"]
-            # SAT score percentile approximation (rough mapping of scores to percentiles)
-            if sat >= 1500: sat_percentile = 0.99
-            elif sat >= 1400: sat_percentile = 0.94
-            elif sat >= 1300: sat_percentile = 0.86
-            elif sat >= 1200: sat_percentile = 0.74
-            elif sat >= 1100: sat_percentile = 0.58
-            elif sat >= 1000: sat_percentile = 0.40
-            elif sat >= 900: sat_percentile = 0.27
-            elif sat >= 800: sat_percentile = 0.15
-            else: sat_percentile = max(0.01, sat / 1600 * 0.15)  # Minimum percentile
+        Returns:
+            Array of acceptance rates as percentages
+        """
+        # Universities without an ID use their own stored rate
+        rates = features.acceptance_rate.copy()
+        if not features.has_id.any():
+            return rates
+        
+        # Universities with an ID but no application data use the validated catalog rate
+        columns = self.catalog.columns
+        stored_ids, stored_rates = columns.get("id"), columns.get("acceptance_rate")
+        if stored_ids is not None and len(stored_ids):
+            positions = np.minimum(np.searchsorted(stored_ids, features.ids), len(stored_ids) - 1)
+            in_db = features.has_id & (stored_ids[positions] == features.ids)
+            rates[in_db] = validate_acceptance_rates(stored_rates[positions[in_db]])
+        
+        # Universities with application data use the cached calculator results
+        cache = self.db.get_cached_acceptance_rates()
+        if cache:
+            cached_ids = np.array(sorted(cache), dtype=np.int64)
+            cached_rates = np.array([np.nan if cache[uid][0] is None else cache[uid][0] for uid in cached_ids.tolist()])
+            positions = np.minimum(np.searchsorted(cached_ids, features.ids), len(cached_ids) - 1)
+            in_cache = features.has_id & (cached_ids[positions] == features.ids)
+            stale = in_cache & np.isnan(cached_rates[positions])
+            fresh = in_cache & ~stale
+            rates[fresh] = cached_rates[positions[fresh]]
             
-            # Academic strength combines GPA and SAT with greater weight to GPA
-            academic_strength = (gpa_normalized * 0.6) + (sat_percentile * 0.4)
+            # Only rates invalidated since they were cached are recalculated
+            for row in np.flatnonzero(stale):
+                university_id = int(features.ids[row])
+                try:
+                    rates[row] = self.get_accurate_acceptance_rate(university_id)
+                except Exception as e:
+                    print(f"Error calculating accurate acceptance rate for university {university_id}: {e}")
+        
+        return rates
+    
+    def _rank_match(self, academic_rank) -> float:
+        """Scales a university's academic rank to 0-1 (higher is better)"""
+        # Handle None values or invalid ranks for academic_rank
+        if academic_rank is None or not isinstance(academic_rank, (int, float)) or academic_rank <= 0:
+            # Default to median rank if not available or invalid
+            return 0.5
+        
+        # Validate rank is within reasonable bounds
+        # Some ranking systems use higher numbers for better schools,
+        # so we'll detect and correct this if needed
+        if academic_rank > 1000:
+            # Likely a points-based ranking system, higher is better
+            # Convert to a percentile (assuming max around 1500)
+            return min(academic_rank / 1500, 1.0)
+        
+        # Standard ranking, lower is better
+        # Cap at 200 for normalization
+        rank = min(max(1, academic_rank), 200)
+        # Logarithmic rank scaling (difference between #1 and #10 is more significant than #90 and #100)
+        return 1 - (math.log10(rank) / math.log10(200))
+    
+    def calculate_academic_match(self, user_profile: Dict, university: Dict) -> float:
+        """Calculate the academic compatibility score between user and university"""
+        profile = compile_profile(user_profile)
+        academic_score = 0
+        
+        # Academic strength based on GPA and SAT is derived once per profile
+        if profile.has_test_scores:
+            academic_strength = profile.academic_strength
             
             # Get university rank and scale it properly
-            academic_rank = university.get("academic_rank")
+            rank_match = self._rank_match(university.get("academic_rank"))
             
-            # Handle None values or invalid ranks for academic_rank
-            if academic_rank is None or not isinstance(academic_rank, (int, float)) or academic_rank <= 0:
-                # Default to median rank if not available or invalid
-                rank_match = 0.5
-            else:
-                # Validate rank is within reasonable bounds
-                # Some ranking systems use higher numbers for better schools,
-                # so we'll detect and correct this if needed
-                if academic_rank > 1000:
-                    # Likely a points-based ranking system, higher is better
-                    # Convert to a percentile (assuming max around 1500)
-                    rank_match = min(academic_rank / 1500, 1.0)
-                else:
-                    # Standard ranking, lower is better
-                    # Cap at 200 for normalization
-                    rank = min(max(1, academic_rank), 200)
-                    # Logarithmic rank scaling (difference between #1 and #10 is more significant than #90 and #100)
-                    rank_match = 1 - (math.log10(rank) / math.log10(200))
-                
-                # Use accurate acceptance rate if available
+            # Use accurate acceptance rate if available
             if "id" in university:
                 try:
                     acceptance_rate = self.get_accurate_acceptance_rate(university["id"])
@@ -210,21 +351,18 @@ class UniversityMatcher:
             academic_score = (rank_match * 0.55) + (admit_match * 0.45)
         
         # Major preferences match with more sophisticated analysis
-        if "preferred_majors" in user_profile and university.get("major_strengths"):
+        if profile.has_preferred_majors and university.get("major_strengths"):
             major_strengths = university.get("major_strengths", "")
             
             # Skip if major_strengths is None or empty
             if not major_strengths:
                 return academic_score
             
-            university_majors = [m.strip().lower() for m in major_strengths.split(",")]
-            user_majors = []
+            # Majors are tokenized once per distinct string and cached
+            university_majors = split_majors(major_strengths)
             
-            # Handle both string and list formats for user majors (for API flexibility)
-            if isinstance(user_profile["preferred_majors"], str):
-                user_majors = [m.strip().lower() for m in user_profile["preferred_majors"].split(",")]
-            else:
-                user_majors = [m.strip().lower() for m in user_profile["preferred_majors"]]
+            # User majors are normalized once per profile
+            user_majors = profile.majors
             
             # Skip if no valid majors
             if not user_majors:
@@ -237,17 +375,9 @@ class UniversityMatcher:
             partial_matches = 0
             for user_major in user_majors:
                 for uni_major in university_majors:
-                    # Skip if already counted as exact match
-                    if user_major == uni_major:
-                        continue
-                    
-                    # Check for partial matches with shared words
-                    user_words = set(user_major.split())
-                    uni_words = set(uni_major.split())
-                    common_words = user_words.intersection(uni_words)
-                    
-                    if common_words and len(common_words) / max(len(user_words), len(uni_words)) > 0.3:
-                        partial_matches += 0.5  # Half credit for partial matches
+                    # Half credit for different majors sharing enough words
+                    if majors_overlap(user_major, uni_major):
+                        partial_matches += 0.5
             
             # Calculate total match score, giving more weight to exact matches
             total_matches = exact_matches + partial_matches
@@ -260,10 +390,11 @@ class UniversityMatcher:
     
     def calculate_financial_match(self, user_profile: Dict, university: Dict) -> float:
         """Calculate the financial compatibility score between user and university"""
-        if "budget" not in user_profile:
+        profile = compile_profile(user_profile)
+        if not profile.has_budget:
             return 0.5  # Default mid-range score if no budget specified
             
-        budget = user_profile["budget"]
+        budget = profile.budget
         tuition = university.get("tuition_fee", 0)
         
         # Handle None value for tuition
@@ -311,8 +442,10 @@ class UniversityMatcher:
         Returns:
             Match score as a percentage (0-100)
         """
+        profile = compile_profile(user_profile)
+        
         # Default if no preferences
-        if not user_profile.get("preferred_locations"):
+        if not profile.locations:
             return 70  # Neutral score
         
         match_score = 0
@@ -325,17 +458,13 @@ class UniversityMatcher:
         uni_region = university.get("region", "")
         uni_country = university.get("country", "")
         
-        # Extract user location preferences
-        preferred_locations = user_profile["preferred_locations"]
-        if isinstance(preferred_locations, str):
-            preferred_locations = [loc.strip() for loc in preferred_locations.split(',')]
-        
-        # Preferred environment from user profile
-        preferred_environment = user_profile.get("preferred_environment", "")
+        # User location preferences (lower-cased when the profile is compiled)
+        preferred_locations = profile.locations
         
-        # Preferred region and country
-        preferred_region = user_profile.get("preferred_region", "")
-        preferred_country = user_profile.get("preferred_country", "")
+        # Preferred environment, region and country from user profile
+        preferred_environment = profile.environment
+        preferred_region = profile.region
+        preferred_country = profile.country
         
         # Country match
         if preferred_country and uni_country:
@@ -350,29 +479,13 @@ class UniversityMatcher:
             elif uni_country and preferred_country and uni_country == preferred_country:
                 match_score += 15
                 
-        # Location text match
-        location_match = False
-        for loc in preferred_locations:
-            if loc.lower() in uni_location.lower():
-                location_match = True
-                match_score += 25
-                break
-        
-        # City/state match if no direct match found
-        if not location_match and preferred_locations:
-            # Check if any city/state components match
-            for loc in preferred_locations:
-                location_components = loc.lower().split(", ")
-                uni_location_components = uni_location.lower().split(", ")
-                
-                for component in location_components:
-                    if component in uni_location_components:
-                        match_score += 15
-                        break
+        # Location text match (25 points), or 15 points per preferred location sharing a
+        # city/state component; locations are tokenized once and memoized per profile
+        match_score += location_text_points(uni_location, preferred_locations, profile.location_components)
         
         # Environment match
         if preferred_environment and uni_environment:
-            if preferred_environment.lower() == uni_environment.lower():
+            if profile.environment_lower == uni_environment.lower():
                 match_score += 20
             # Partial environment matches
             elif (("Urban" in preferred_environment and "Suburban" in uni_environment) or
@@ -389,6 +502,8 @@ class UniversityMatcher:
     
     def calculate_career_prospects_match(self, user_profile: Dict, university: Dict) -> float:
         """Calculate the career prospects compatibility score"""
+        profile = compile_profile(user_profile)
+        
         # Base job placement rate
         job_placement = university.get("job_placement", 80)  # Default to 80% if not specified
         
@@ -399,20 +514,15 @@ class UniversityMatcher:
         job_placement_score = job_placement / 100
         
         # Adjust based on major-specific career outcomes (if we have user's preferred majors)
-        if "preferred_majors" in user_profile and university.get("major_strengths"):
+        if profile.has_preferred_majors and university.get("major_strengths"):
             major_strengths = university.get("major_strengths", "")
             
             # Handle None value
             if major_strengths is None:
                 major_strengths = ""
                 
-            university_majors = [m.strip().lower() for m in major_strengths.split(",") if m.strip()]
-            
-            user_majors = []
-            if isinstance(user_profile["preferred_majors"], str):
-                user_majors = [m.strip().lower() for m in user_profile["preferred_majors"].split(",")]
-            else:
-                user_majors = [m.strip().lower() for m in user_profile["preferred_majors"]]
+            university_majors = [m for m in split_majors(major_strengths) if m]
+            user_majors = profile.majors
             
             # Check how well the university's major strengths align with user preferences
             major_matches = 0
@@ -436,22 +546,23 @@ class UniversityMatcher:
         Returns:
             Match score as a percentage (0-100)
         """
+        profile = compile_profile(user_profile)
         base_score = 70  # Start with a neutral score
         
         # Match campus environment and type
-        preferred_environment = user_profile.get("preferred_environment", "")
+        preferred_environment = profile.environment_lower
         university_environment = university.get("environment", "")
         
         if preferred_environment and university_environment:
-            if preferred_environment.lower() == university_environment.lower():
+            if preferred_environment == university_environment.lower():
                 base_score += 20
             # Partial matches for similar environments
-            elif (preferred_environment.lower() in university_environment.lower() or 
-                  university_environment.lower() in preferred_environment.lower()):
+            elif (preferred_environment in university_environment.lower() or 
+                  university_environment.lower() in preferred_environment):
                 base_score += 10
                 
         # Match campus size if specified in user profile
-        preferred_size = user_profile.get("preferred_size", "")
+        preferred_size = profile.size
         campus_size = university.get("campus_size", "")
         
         if preferred_size and campus_size:
@@ -464,7 +575,7 @@ class UniversityMatcher:
                 base_score += 10
                 
         # Consider university type match
-        preferred_type = user_profile.get("preferred_university_type", "")
+        preferred_type = profile.university_type
         university_type = university.get("university_type", "")
         
         if preferred_type and university_type:
@@ -472,7 +583,7 @@ class UniversityMatcher:
                 base_score += 20
                 
         # Consider religious affiliation if specified
-        preferred_religious = user_profile.get("preferred_religious_affiliation", "")
+        preferred_religious = profile.religious_affiliation
         university_religious = university.get("religious_affiliation", "")
         
         if preferred_religious:
@@ -493,30 +604,70 @@ class UniversityMatcher:
         # Cap at 100%
         return min(100, base_score)
     
-    def calculate_match_score(self, user_profile: Dict, university: Dict, weights=None) -> float:
-        """Calculates a match score between a user profile and a university"""
-        # Use custom weights if provided, otherwise use default
-        weights = weights or self.default_weights
+    def calculate_component_scores(self, user_profile: Dict, university: Dict, components=COMPONENTS) -> Dict[str, float]:
+        """
+        Calculates the raw component scores of a university
+        
+        Args:
+            user_profile: Dictionary with user preferences
+            university: Dictionary with university data
+            components: Components to calculate (defaults to all five)
+
+        Returns:
+            Dictionary of academic, financial and career scores (0-1) and
+            location and campus scores (0-100)
+        """
+        profile = compile_profile(user_profile)
+        scorers = {
+            "academic": self.calculate_academic_match,
+            "financial": self.calculate_financial_match,
+            "location": self.calculate_location_match,
+            "career": self.calculate_career_prospects_match,
+            "campus": self.calculate_campus_match
+        }
+        return {component: scorers[component](profile, university) for component in components}
+    
+    def calculate_component_upper_bounds(self, user_profile: Dict, university: Dict, components=COMPONENTS) -> Dict[str, float]:
+        """
+        Upper bounds of the raw component scores of a university, computed without
+        acceptance rate lookups or major matching
         
-        # Calculate individual component scores using enhanced methods
-        academic_score = self.calculate_academic_match(user_profile, university)
-        financial_score = self.calculate_financial_match(user_profile, university)
-        location_score = self.calculate_location_match(user_profile, university)
-        career_score = self.calculate_career_prospects_match(user_profile, university)
-        campus_score = self.calculate_campus_match(user_profile, university)
+        Returns:
+            Dictionary like calculate_component_scores, with exact financial,
+            location and campus scores, the academic score bounded by its rank
+            term and the career score by the job placement rate
+        """
+        profile = compile_profile(user_profile)
+        bounds = {}
+        for component in components:
+            if component == "academic":
+                # Selectivity and major matches are assumed perfect
+                academic = 0
+                if profile.has_test_scores:
+                    academic = (self._rank_match(university.get("academic_rank")) * 0.55) + 0.45
+                if profile.has_preferred_majors and university.get("major_strengths") and profile.majors:
+                    academic = (academic * 0.65) + 0.35
+                bounds[component] = academic
+            elif component == "career":
+                # The major factor (0.8 to 1) can only lower a non-negative placement score
+                job_placement = university.get("job_placement", 80)
+                if job_placement is None:
+                    job_placement = 80
+                bounds[component] = min(max(job_placement / 100, job_placement / 100 * 0.8), 1.0)
+            else:
+                bounds.update(self.calculate_component_scores(profile, university, (component,)))
+        return bounds
+    
+    def combine_component_scores(self, component_scores: Dict[str, float], weights=None) -> float:
+        """Combines raw component scores into a 0-1 match score"""
+        weights = weights or self.default_weights
         
-        # Combine scores according to weights
+        # Combine scores according to weights, in a fixed order so that partially
+        # calculated scores (see scoring_plan) add up exactly like complete ones
         total_score = 0
-        if "academic" in weights:
-            total_score += academic_score * weights["academic"]
-        if "financial" in weights:
-            total_score += financial_score * weights["financial"]
-        if "location" in weights:
-            total_score += location_score * weights["location"]
-        if "career" in weights:
-            total_score += career_score * weights["career"]
-        if "campus" in weights:
-            total_score += campus_score * weights["campus"]
+        for component in COMPONENTS:
+            if component in component_scores and component in weights:
+                total_score += component_scores[component] * weights[component]
         
         # Apply final sigmoid normalization to ensure scores are well-distributed
         # between 0-1 with a concentration around 0.5 for better discrimination
@@ -525,16 +676,28 @@ class UniversityMatcher:
         # Ensure score is between 0 and 1
         return min(max(normalized_score, 0), 1)
     
+    def calculate_match_score(self, user_profile: Dict, university: Dict, weights=None) -> float:
+        """Calculates a match score between a user profile and a university"""
+        # Components without weight do not change the score and are skipped
+        plan = scoring_plan(weights or self.default_weights)
+        component_scores = self.calculate_component_scores(user_profile, university, plan.active)
+        return self.combine_component_scores(component_scores, weights)
+    
     def get_recommendations(self, user_profile: Dict, weights=None, top_n=5) -> List[Dict]:
         """Returns a list of recommended universities based on the user profile"""
+        # Profile-side values are derived once and reused for every university
+        profile = compile_profile(user_profile)
+        self.last_pruned = 0
+        
         # Dynamic weights based on user profile if not explicitly provided
-        if weights is None and "importance_weights" in user_profile:
+        if weights is None and profile.importance_weights is not None:
+            importance_weights = dict(profile.importance_weights)
             weights = {
-                "academic": user_profile["importance_weights"].get("academic", 0.35),
-                "financial": user_profile["importance_weights"].get("financial", 0.30),
-                "location": user_profile["importance_weights"].get("location", 0.15),
-                "career": user_profile["importance_weights"].get("career", 0.15),
-                "campus": user_profile["importance_weights"].get("campus", 0.05)
+                "academic": importance_weights.get("academic", 0.35),
+                "financial": importance_weights.get("financial", 0.30),
+                "location": importance_weights.get("location", 0.15),
+                "career": importance_weights.get("career", 0.15),
+                "campus": importance_weights.get("campus", 0.05)
             }
             # Normalize weights
             total = sum(weights.values())
@@ -543,27 +706,77 @@ class UniversityMatcher:
             else:
                 weights = self.default_weights
         
-        all_unis = self.db.get_all_universities()
-        scored_unis = []
         seen_names = set()  # Track university names to avoid duplicates
         
-        # Pre-filter universities if we have strong constraints
-        filtered_unis = all_unis
-        if "budget" in user_profile and user_profile.get("strict_budget", False):
-            max_budget = user_profile["budget"] * 1.2  # Allow 20% over budget
-            filtered_unis = [uni for uni in all_unis if uni.get("tuition_fee") is not None and uni["tuition_fee"] <= max_budget]
+        # Pre-filter universities if we have strong constraints, through the catalog's range index
+        filtered_unis = self.catalog.records
+        if profile.has_budget and profile.strict_budget:
+            max_budget = profile.budget * 1.2  # Allow 20% over budget
+            filtered_unis = self.catalog.records_for_rows(
+                self.catalog.filters.range_rows("tuition_fee", high=max_budget))
+        
+        if self.engine == "vectorized" and not self.use_deepseek:
+            return self._get_recommendations_vectorized(profile, filtered_unis, weights, top_n)
+        
+        # Deepseek API scores are fetched concurrently up front for every candidate
+        api_scores = {}
+        if self.use_deepseek:
+            candidates = []
+            candidate_names = set()
+            for uni in filtered_unis:
+                if uni and "name" in uni and uni["name"] not in candidate_names:
+                    candidates.append(uni)
+                    candidate_names.add(uni["name"])
+            api_scores = self._fetch_deepseek_scores(profile, candidates)
         
-        for uni in filtered_unis:
+        # Raw component scores by position, cached while only the weights change
+        key, version = self._component_cache_key("scalar", profile, filtered_unis) if not self.use_deepseek else (None, None)
+        cached = self.component_cache.get(key, version)
+        fill_cache = cached is None
+        if fill_cache:
+            cached = {"components": [None] * len(filtered_unis), "accurate_rates": [None] * len(filtered_unis)}
+        
+        # Components without weight do not change the ranking and are only scored for the results
+        plan = scoring_plan(weights or self.default_weights)
+        
+        # Once the heap is full, universities whose upper bound cannot beat its weakest entry
+        # skip the expensive components; bounds only hold for non-negative weights
+        can_prune = not self.use_deepseek and all(w >= 0 for w in (weights or self.default_weights).values())
+        pruned = 0
+        
+        # Bounded min-heap of the best top_n (score, -position, university, components);
+        # the root is the weakest entry, and on equal scores the earlier university wins
+        heap = []
+        for position, uni in enumerate(filtered_unis):
             # Skip if we've already seen this university name or if university data is invalid
             if not uni or "name" not in uni or uni["name"] in seen_names:
                 continue
                 
             try:
-            # Use Deepseek API if enabled, otherwise use regular algorithm
-            if self.use_deepseek:
-                score = self.calculate_match_score_with_deepseek(user_profile, uni)
-            else:
-                score = self.calculate_match_score(user_profile, uni, weights)
+                # Use Deepseek API if enabled, otherwise use regular algorithm
+                component_scores = None
+                if self.use_deepseek:
+                    # Fallback to regular algorithm where the API gave no score
+                    score = api_scores.get(id(uni))
+                    if score is None:
+                        score = self.calculate_match_score(profile, uni)
+                else:
+                    component_scores = cached["components"][position] or {}
+                    missing = [c for c in plan.active if c not in component_scores]
+                    if missing:
+                        upper_bounds = dict(component_scores)
+                        upper_bounds.update(self.calculate_component_upper_bounds(profile, uni, missing))
+                        # Later universities only enter the heap with a strictly higher score
+                        if (can_prune and top_n > 0 and len(heap) == top_n and
+                                self.combine_component_scores(upper_bounds, weights) <= heap[0][0]):
+                            pruned += 1
+                            seen_names.add(uni["name"])
+                            continue
+                        component_scores = upper_bounds
+                        component_scores.update(self.calculate_component_scores(
+                            profile, uni, [c for c in missing if c in BOUNDED_COMPONENTS]))
+                        cached["components"][position] = component_scores
+                    score = self.combine_component_scores(component_scores, weights)
                 
                 # Validate score before adding
                 if not isinstance(score, (int, float)) or math.isnan(score):
@@ -572,73 +785,209 @@ class UniversityMatcher:
                     
                 # Ensure score is within valid range
                 score = min(max(score, 0), 1)
-                    
-            scored_unis.append((uni, score))
-            seen_names.add(uni["name"])
+                seen_names.add(uni["name"])
             except Exception as e:
                 print(f"Error scoring university {uni.get('name', 'Unknown')}: {e}")
                 continue
+            
+            if top_n <= 0:
+                continue
+            entry = (score, -position, uni, component_scores)
+            if len(heap) < top_n:
+                heapq.heappush(heap, entry)
+            elif entry[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, entry)
+            
+            # Later universities can only tie a full heap of perfect scores, and ties keep the earlier one
+            if len(heap) == top_n and heap[0][0] >= 1:
+                break
+        
+        # Positions skipped by an early stop or pruned stay None and are scored when needed
+        if fill_cache:
+            self.component_cache.put(key, version, cached)
+        self.last_pruned = pruned
         
-        # Sort by score in descending order
-        scored_unis.sort(key=lambda x: x[1], reverse=True)
+        # Best first
+        heap.sort(key=lambda entry: entry[:2], reverse=True)
         
-        # Return top N results with scores and component scores for more transparency
+        # Only the top N results get scores, component scores and acceptance rates attached
         recommendations = []
-        for uni, score in scored_unis[:top_n]:
+        for score, _, uni, component_scores in heap:
             try:
-            uni_with_score = uni.copy()
+                uni_with_score = uni.copy()
                 uni_with_score["match_score"] = round(score * 100, 1)  # Convert to percentage and round
                 
-                # Add component scores for transparency
-                if not self.use_deepseek:
-                    # Calculate component scores
-                    academic = self.calculate_academic_match(user_profile, uni)
-                    financial = self.calculate_financial_match(user_profile, uni)
-                    location = self.calculate_location_match(user_profile, uni) / 100  # Convert from 0-100 to 0-1
-                    career = self.calculate_career_prospects_match(user_profile, uni)
-                    campus = self.calculate_campus_match(user_profile, uni) / 100  # Convert from 0-100 to 0-1
+                # Add component scores from the scoring pass for transparency
+                if component_scores is not None:
+                    # Components skipped by the scoring plan are only scored for the results
+                    skipped = [c for c in COMPONENTS if c not in component_scores]
+                    if skipped:
+                        component_scores.update(self.calculate_component_scores(profile, uni, skipped))
                     
                     # Ensure all scores are valid and within range
                     uni_with_score["component_scores"] = {
-                        "academic": round(min(max(academic, 0), 1) * 100, 1),
-                        "financial": round(min(max(financial, 0), 1) * 100, 1),
-                        "location": round(min(max(location, 0), 1) * 100, 1),
-                        "career": round(min(max(career, 0), 1) * 100, 1),
-                        "campus": round(min(max(campus, 0), 1) * 100, 1)
+                        component: round(min(max(component_scores[component] / scale, 0), 1) * 100, 1)
+                        for component, scale in COMPONENT_SCALES.items()
                     }
-            
-            # Add accurate acceptance rate if available
-            if "id" in uni:
+                
+                # Add accurate acceptance rate if available
+                if "id" in uni:
                     try:
-                uni_with_score["accurate_acceptance_rate"] = self.get_accurate_acceptance_rate(uni["id"])
+                        uni_with_score["accurate_acceptance_rate"] = self.get_accurate_acceptance_rate(uni["id"])
                     except Exception as e:
                         print(f"Error getting acceptance rate for {uni.get('name', 'Unknown')}: {e}")
                         uni_with_score["accurate_acceptance_rate"] = uni.get("acceptance_rate", 50.0)
                 
-            recommendations.append(uni_with_score)
+                recommendations.append(uni_with_score)
             except Exception as e:
                 print(f"Error processing university {uni.get('name', 'Unknown')} for recommendations: {e}")
                 continue
             
         return recommendations 
     
-    def match_universities(self, user_profile: Dict, universities: List[Dict]) -> List[Dict]:
+    def _features_for(self, universities: List[Dict]) -> UniversityFeatures:
+        """Column arrays for a list of universities, reusing the catalog's encoding for catalog records"""
+        snapshot = self.catalog.snapshot()
+        if universities is snapshot.records:
+            return snapshot.features
+        
+        rows = snapshot.rows_of_records(universities)
+        if rows is not None:
+            return snapshot.features.take(rows)
+        return UniversityFeatures.from_records(universities)
+    
+    def _score_vectorized(self, user_profile: Dict, universities: List[Dict], components=COMPONENTS):
+        """
+        Calculates component scores for a list of universities at once, reusing cached ones
+        
+        Returns:
+            Tuple of (acceptance rate array, dictionary of component score arrays); the
+            dictionary holds at least the requested components
+        """
+        profile = compile_profile(user_profile)
+        key, version = self._component_cache_key("vectorized", profile, universities)
+        cached = self.component_cache.get(key, version)
+        if cached is not None and all(c in cached["components"] for c in components):
+            return cached["acceptance_rates"], cached["components"]
+        
+        features = self._features_for(universities)
+        if cached is None:
+            cached = {"acceptance_rates": self.get_acceptance_rate_array(features), "components": {}}
+            self.component_cache.put(key, version, cached)
+        missing = [c for c in components if c not in cached["components"]]
+        cached["components"].update(
+            self._vectorized().component_scores(profile, features, cached["acceptance_rates"], missing))
+        return cached["acceptance_rates"], cached["components"]
+    
+    def _get_recommendations_vectorized(self, user_profile: Dict, universities: List[Dict], weights, top_n: int) -> List[Dict]:
+        """Vectorized counterpart of the get_recommendations scoring loop"""
+        # Skip invalid entries and duplicate names like the scalar loop does
+        unique_unis = []
+        seen_names = set()
+        for uni in universities:
+            if not uni or "name" not in uni or uni["name"] in seen_names:
+                continue
+            unique_unis.append(uni)
+            seen_names.add(uni["name"])
+        
+        if not unique_unis:
+            return []
+        
+        # A weights-only change reuses the cached component scores; components
+        # without weight are left out of the ranking
+        weights = weights or self.default_weights
+        plan = scoring_plan(weights)
+        acceptance_rates, all_components = self._score_vectorized(user_profile, unique_unis, plan.active)
+        all_scores = np.broadcast_to(sigmoid_match_scores(all_components, weights), len(unique_unis))
+        
+        # Partial selection of the top N; equal scores keep catalog order like the scalar heap
+        ranked = top_k_indices(all_scores, top_n)
+        scores = all_scores[ranked]
+        components = {component: score[ranked] for component, score in all_components.items()}
+        
+        # Skipped components not cached yet are scored for the top N only
+        skipped = [c for c in plan.skipped if c not in components]
+        if skipped and len(ranked):
+            features = self._features_for([unique_unis[row] for row in ranked])
+            components.update(self._vectorized().component_scores(
+                user_profile, features, acceptance_rates[ranked], skipped))
+        
+        recommendations = []
+        for i, row in enumerate(ranked):
+            uni = unique_unis[row]
+            uni_with_score = uni.copy()
+            uni_with_score["match_score"] = round(float(scores[i]) * 100, 1)
+            uni_with_score["component_scores"] = {
+                component: round(min(max(float(components[component][i]) / scale, 0), 1) * 100, 1)
+                for component, scale in COMPONENT_SCALES.items()
+            }
+            if "id" in uni:
+                uni_with_score["accurate_acceptance_rate"] = float(acceptance_rates[row])
+            recommendations.append(uni_with_score)
+        
+        return recommendations
+    
+    def _match_universities_vectorized(self, user_profile: Dict, universities: List[Dict], weights: Dict[str, float]) -> List[Dict]:
+        """Vectorized counterpart of the match_universities loop"""
+        universities = [university for university in universities if university]
+        if not universities:
+            return []
+        
+        acceptance_rates, components = self._score_vectorized(user_profile, universities)
+        scores = weighted_match_scores(components, weights)
+        
+        result = []
+        for row, university in enumerate(universities):
+            university_with_scores = university.copy()
+            if university.get('id'):
+                university_with_scores['accurate_acceptance_rate'] = float(acceptance_rates[row])
+            university_with_scores['match_score'] = round(float(scores[row]) * 100, 1)
+            university_with_scores['component_scores'] = {
+                component: round(min(float(components[component][row]) / scale * 100, 100), 1)
+                for component, scale in COMPONENT_SCALES.items()
+            }
+            result.append(university_with_scores)
+        
+        return result
+    
+    def match_universities(self, user_profile: Dict, universities: List[Dict] = None) -> List[Dict]:
         """
         Match a list of universities to a user profile and return them with match scores
 
         Args:
-            user_profile: Dictionary with user preferences
-            universities: List of university dictionaries
+            user_profile: Dictionary with user preferences (or compiled ProfileFeatures)
+            universities: List of university dictionaries (defaults to the whole catalog)
             
         Returns:
             List of universities with match_score and component_scores added
         """
         result = []
         
+        # Profile-side values are derived once and reused for every university
+        user_profile = compile_profile(user_profile)
+        
+        if universities is None:
+            universities = self.catalog.records
+        
         # Use provided weights or default weights
         weights = getattr(self, 'weights', self.default_weights)
         
-        for university in universities:
+        if self.engine == "vectorized" and not (self.use_deepseek and self.deepseek_api_key):
+            return self._match_universities_vectorized(user_profile, universities, weights)
+        
+        # Deepseek API scores are fetched concurrently up front
+        api_scores = {}
+        if self.use_deepseek and self.deepseek_api_key:
+            api_scores = self._fetch_deepseek_scores(user_profile, [university for university in universities if university])
+        
+        # Raw component scores and acceptance rates by position, cached while only the weights change
+        key, version = self._component_cache_key("scalar", user_profile, universities)
+        cached = self.component_cache.get(key, version)
+        fill_cache = cached is None
+        if fill_cache:
+            cached = {"components": [None] * len(universities), "accurate_rates": [None] * len(universities)}
+        
+        for position, university in enumerate(universities):
             # Skip if university is None or empty
             if not university:
                 continue
@@ -646,7 +995,10 @@ class UniversityMatcher:
             try:
                 # Calculate match score and component scores
                 if self.use_deepseek and self.deepseek_api_key:
-                    match_score = self.calculate_match_score_with_deepseek(user_profile, university)
+                    match_score = api_scores.get(id(university))
+                    if match_score is None:
+                        # Fallback to regular algorithm where the API gave no score
+                        match_score = self.calculate_match_score(user_profile, university)
                     
                     # Add component scores (estimated when using API)
                     component_scores = {
@@ -658,12 +1010,15 @@ class UniversityMatcher:
                     }
                 else:
                     # Calculate component scores first
+                    raw_scores = cached["components"][position]
+                    if raw_scores is None:
+                        raw_scores = cached["components"][position] = self.calculate_component_scores(user_profile, university)
                     component_scores = {
-                        "academic": self.calculate_academic_match(user_profile, university),
-                        "financial": self.calculate_financial_match(user_profile, university),
-                        "location": self.calculate_location_match(user_profile, university) / 100,  # Convert from 0-100 to 0-1
-                        "career": self.calculate_career_prospects_match(user_profile, university),
-                        "campus": self.calculate_campus_match(user_profile, university) / 100  # Convert from 0-100 to 0-1
+                        "academic": raw_scores["academic"],
+                        "financial": raw_scores["financial"],
+                        "location": raw_scores["location"] / 100,  # Convert from 0-100 to 0-1
+                        "career": raw_scores["career"],
+                        "campus": raw_scores["campus"] / 100  # Convert from 0-100 to 0-1
                     }
                     
                     # Calculate overall match score using component scores and weights
@@ -675,18 +1030,22 @@ class UniversityMatcher:
                     # Ensure match score is between 0 and 1
                     match_score = min(max(match_score, 0), 1)
                 
+                # Create a copy of the university with match scores added
+                university_with_scores = university.copy()
+                
                 # Add accurate acceptance rate if available
                 university_id = university.get('id')
                 if university_id:
-                    try:
-                        university['accurate_acceptance_rate'] = self.get_accurate_acceptance_rate(university_id)
-                    except Exception as e:
-                        print(f"Error calculating accurate acceptance rate for university {university_id}: {e}")
-                        # Use regular acceptance_rate or default value
-                        university['accurate_acceptance_rate'] = university.get('acceptance_rate', 50.0)
-                
-                # Create a copy of the university with match scores added
-                university_with_scores = university.copy()
+                    accurate_rate = cached["accurate_rates"][position]
+                    if accurate_rate is None:
+                        try:
+                            accurate_rate = self.get_accurate_acceptance_rate(university_id)
+                        except Exception as e:
+                            print(f"Error calculating accurate acceptance rate for university {university_id}: {e}")
+                            # Use regular acceptance_rate or default value
+                            accurate_rate = university.get('acceptance_rate', 50.0)
+                        cached["accurate_rates"][position] = accurate_rate
+                    university_with_scores['accurate_acceptance_rate'] = accurate_rate
                 university_with_scores['match_score'] = round(match_score * 100, 1)  # Convert to percentage and round
                 
                 # Convert component scores to percentages and ensure they're within 0-100 range
@@ -701,4 +1060,104 @@ class UniversityMatcher:
                 # Skip this university in case of error
                 continue
         
-        return result 
\ No newline at end of file
+        if fill_cache:
+            self.component_cache.put(key, version, cached)
+        
+        return result
+    
+    def match_many(self, profiles: List[Dict], universities: List[Dict] = None, top_k: int = 10,
+                   out: np.ndarray = None, memory_budget: int = MATCH_MANY_MEMORY_BUDGET) -> BatchMatchResult:
+        """
+        Match many profiles against many universities at once
+
+        Scores are the same 0-1 match scores as match_universities, computed
+        with the vectorized scorer. The universities are encoded and their
+        acceptance rates looked up once for all profiles, and identical
+        profiles are scored once. Universities are processed in chunks sized
+        so that the scoring temporaries stay within memory_budget bytes.
+
+        The score matrix is written into out. Without out, a float64 matrix is
+        allocated only if it fits in memory_budget as well; larger batches must
+        pass an array to fill, e.g. np.memmap(path, np.float32, "w+", shape=shape)
+        to keep the scores on disk.
+
+        Args:
+            profiles: User profile dictionaries (or compiled ProfileFeatures)
+            universities: List of university dictionaries (defaults to the whole catalog)
+            top_k: Number of best universities to return per profile
+            out: Optional array (e.g. a np.memmap) of shape (profiles, universities)
+                to write the scores into; a float64 array is allocated if omitted
+            memory_budget: Approximate bytes of working memory used per chunk, and
+                the largest score matrix allocated when out is omitted
+
+        Returns:
+            BatchMatchResult with the scored universities, the score matrix and
+            the per-profile top-k university indices and scores (best first)
+
+        Raises:
+            ValueError: If out has the wrong shape, or is omitted and the score
+                matrix would exceed memory_budget
+        """
+        if universities is None:
+            # The catalog's own record list, so its encoded columns are used without a copy
+            universities = self.catalog.records
+        else:
+            universities = [university for university in universities if university]
+        weights = getattr(self, 'weights', self.default_weights)
+        
+        shape = (len(profiles), len(universities))
+        if out is None:
+            matrix_bytes = shape[0] * shape[1] * np.dtype(np.float64).itemsize
+            if matrix_bytes > memory_budget:
+                raise ValueError(f"A {shape[0]} x {shape[1]} score matrix needs {matrix_bytes:,} bytes, "
+                                 f"more than the memory budget of {memory_budget:,}; pass out, e.g. a np.memmap")
+            out = np.empty(shape)
+        elif out.shape != shape:
+            raise ValueError(f"out has shape {out.shape}, expected {shape}")
+        
+        top_k = max(0, min(top_k, len(universities)))
+        top_indices = np.zeros((len(profiles), top_k), dtype=np.int64)
+        top_scores = np.zeros((len(profiles), top_k))
+        if not universities or not profiles:
+            return BatchMatchResult(universities, out, top_indices, top_scores)
+        
+        # Identical profiles share one row of work
+        compiled = [compile_profile(profile) for profile in profiles]
+        unique_profiles = list(dict.fromkeys(compiled))
+        first_row = {}
+        for row, profile in enumerate(compiled):
+            first_row.setdefault(profile, row)
+        
+        features = self._features_for(universities)
+        acceptance_rates = self.get_acceptance_rate_array(features)
+        chunk_size = max(1, memory_budget // MATCH_MANY_BYTES_PER_UNIVERSITY)
+        
+        # Best candidates so far per unique profile, in university order for equal scores
+        candidates = {profile: np.zeros(0, dtype=np.int64) for profile in unique_profiles}
+        for start in range(0, len(universities), chunk_size):
+            stop = min(start + chunk_size, len(universities))
+            if start == 0 and stop == len(universities):
+                chunk, chunk_rates = features, acceptance_rates
+            else:
+                chunk = features.slice(start, stop)
+                chunk_rates = acceptance_rates[start:stop]
+            
+            for profile in unique_profiles:
+                components = self.vectorized_scorer.component_scores(profile, chunk, chunk_rates)
+                row = first_row[profile]
+                out[row, start:stop] = weighted_match_scores(components, weights)
+                
+                # Merge the chunk into the running top-k
+                merged = np.concatenate([candidates[profile], np.arange(start, stop)])
+                candidates[profile] = merged[top_k_indices(out[row, merged], top_k)]
+        
+        for row, profile in enumerate(compiled):
+            source = first_row[profile]
+            if row != source:
+                out[row] = out[source]
+            best = candidates[profile]
+            top_indices[row, :len(best)] = best
+            top_scores[row, :len(best)] = out[source, best]
+        
+        return BatchMatchResult(universities, out, top_indices, top_scores)
+
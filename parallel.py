@@ -0,0 +1,259 @@
+from typing import List, Dict, Optional, Tuple
+import os
+import atexit
+import pickle
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+from profile_features import compile_profile
+from vectorized import UniversityFeatures, VectorizedScorer, COMPONENTS
+
+# Catalogs smaller than this are scored in-process, where the pool overhead would dominate
+PARALLEL_MIN_UNIVERSITIES = 100000
+
+# Feature sets kept published in shared memory at once (e.g. the catalog and one filtered subset)
+MAX_PUBLISHED_FEATURES = 2
+
+# Byte alignment of the arrays packed into a shared memory block
+_ALIGNMENT = 64
+
+
+def _pack_layout(arrays: Dict) -> Tuple[List, int]:
+    """Assigns aligned offsets to arrays packed into one block; returns (layout, total size)"""
+    layout, offset = [], 0
+    for key, array in arrays.items():
+        layout.append((key, array.dtype.str, array.shape, offset))
+        offset += -(-array.nbytes // _ALIGNMENT) * _ALIGNMENT
+    return layout, offset
+
+
+def _array_views(buf, layout: List) -> Dict:
+    """NumPy views of the arrays packed into a block"""
+    return {key: np.ndarray(shape, dtype=np.dtype(dtype), buffer=buf, offset=offset)
+            for key, dtype, shape, offset in layout}
+
+
+class SharedFeatures:
+    """
+    UniversityFeatures split into contiguous shards and copied once into a
+    shared memory block, so worker processes can score their shard in place.
+
+    The block holds every shard's arrays followed by pickled metadata
+    (layout, shard bounds, category values and major vocabulary). Workers
+    only need the small handle tuple to attach to it.
+    """
+
+    def __init__(self, features: UniversityFeatures, shards: int):
+        edges = np.linspace(0, features.size, max(1, shards) + 1).astype(int)
+        self.bounds = [(int(start), int(stop)) for start, stop in zip(edges[:-1], edges[1:]) if stop > start]
+        self.size = features.size
+
+        arrays = {}
+        for shard, (start, stop) in enumerate(self.bounds):
+            part = features if stop - start == features.size else features.take(np.arange(start, stop))
+            for name, array in part.arrays().items():
+                arrays[(shard, name)] = array
+
+        layout, meta_offset = _pack_layout(arrays)
+        meta = pickle.dumps({
+            "layout": layout,
+            "bounds": self.bounds,
+            "categories": features.categories,
+            "vocab": features.majors.vocab,
+            "raw_entries": features.majors.raw_entries
+        })
+        self.shm = SharedMemory(create=True, size=meta_offset + len(meta))
+        views = _array_views(self.shm.buf, layout)
+        for key, array in arrays.items():
+            views[key][...] = array
+        del views
+        self.shm.buf[meta_offset:meta_offset + len(meta)] = meta
+
+        self.handle = (self.shm.name, meta_offset, len(meta))
+        self.users = 0
+        self.stale = False
+
+    def close(self):
+        """Releases the shared memory block"""
+        self.shm.close()
+        self.shm.unlink()
+
+
+# Worker process state: attached blocks by name, with the shard features built from them
+_attached = {}
+_worker_scorer = VectorizedScorer()
+
+
+def _attach(handle: Tuple, shard: int):
+    """Features of one shard of a published block (worker side), attached on first use"""
+    name, meta_offset, meta_length = handle
+    entry = _attached.get(name)
+    if entry is None:
+        while len(_attached) >= MAX_PUBLISHED_FEATURES:
+            shm, _, shards = _attached.pop(next(iter(_attached)))
+            shards.clear()
+            try:
+                shm.close()
+            except BufferError:
+                pass  # Views still referenced; the mapping is released when they are collected
+        shm = SharedMemory(name=name)
+        meta = pickle.loads(bytes(shm.buf[meta_offset:meta_offset + meta_length]))
+        entry = _attached[name] = (shm, meta, {})
+
+    shm, meta, shards = entry
+    features = shards.get(shard)
+    if features is None:
+        layout = [item for item in meta["layout"] if item[0][0] == shard]
+        arrays = {key[1]: view for key, view in _array_views(shm.buf, layout).items()}
+        start, stop = meta["bounds"][shard]
+        features = shards[shard] = UniversityFeatures.from_arrays(
+            stop - start, arrays, meta["categories"], meta["vocab"], meta["raw_entries"])
+    return features, meta["bounds"][shard]
+
+
+def _score_shard(handle: Tuple, shard: int, call_name: str, size: int, profile, subset: bool):
+    """
+    Scores one shard in a worker process
+
+    The call block holds the acceptance rates in its first row; the
+    component scores are written to the following rows. For a subset of the
+    published features, the block ends with the subset's rows in them, and
+    only the subset rows that fall in this shard are scored.
+    """
+    features, (start, stop) = _attach(handle, shard)
+    call = SharedMemory(name=call_name)
+    buffers = np.ndarray((1 + len(COMPONENTS), size), dtype=np.float64, buffer=call.buf)
+    base_rows = rates = None
+    try:
+        if subset:
+            base_rows = np.ndarray((size,), dtype=np.int64, buffer=call.buf, offset=buffers.nbytes)
+            positions = np.flatnonzero((base_rows >= start) & (base_rows < stop))
+            if not len(positions):
+                return
+            features = features.take(base_rows[positions] - start)
+        else:
+            positions = slice(start, stop)
+        rates = buffers[0, positions]
+        components = _worker_scorer.component_scores(profile, features, rates)
+        for i, component in enumerate(COMPONENTS):
+            buffers[i + 1, positions] = components[component]
+    finally:
+        del buffers, base_rows, rates
+        call.close()
+
+
+class ParallelScorer:
+    """
+    Drop-in replacement for VectorizedScorer that scores large feature sets
+    in a pool of worker processes.
+
+    Each feature set is published once into shared memory, split into one
+    shard per worker. A call sends only the profile and the acceptance rates
+    to the workers, which score their shard in place. Subsets made with
+    UniversityFeatures.take() (e.g. filtered catalogs) are scored by row
+    against the block of the features they were taken from, so filtering
+    neither republishes nor evicts the catalog. Feature sets smaller than
+    min_universities are scored in-process.
+    """
+
+    def __init__(self, workers: int = None, min_universities: int = PARALLEL_MIN_UNIVERSITIES):
+        self.workers = workers or os.cpu_count() or 1
+        self.min_universities = min_universities
+        self.local_scorer = VectorizedScorer()
+        self._lock = threading.Lock()
+        self._pool = None
+        self._published = {}
+        atexit.register(self.close)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # Spawned workers do not inherit the web server's threads and locks
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    def _acquire(self, features: UniversityFeatures) -> SharedFeatures:
+        """Shared copy of a feature set, published on first use"""
+        with self._lock:
+            entry = self._published.pop(id(features), None)
+            if entry is not None and entry[0] is not features:
+                self._retire(entry[1])
+                entry = None
+            if entry is None:
+                entry = (features, SharedFeatures(features, self.workers))
+            self._published[id(features)] = entry
+
+            # Evict the least recently used feature sets once no call uses them
+            while len(self._published) > MAX_PUBLISHED_FEATURES:
+                _, evicted = self._published.pop(next(iter(self._published)))
+                self._retire(evicted)
+
+            shared = entry[1]
+            shared.users += 1
+            return shared
+
+    def _retire(self, shared: SharedFeatures):
+        """Frees a published feature set now, or after its last running call (lock held)"""
+        shared.stale = True
+        if not shared.users:
+            shared.close()
+
+    def _release(self, shared: SharedFeatures):
+        with self._lock:
+            shared.users -= 1
+            if shared.stale and not shared.users:
+                shared.close()
+
+    def _run(self, features: UniversityFeatures, acceptance_rates: np.ndarray, profile,
+             base_rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Scores every shard; returns the component scores, one row per component
+
+        With base_rows, only those rows of features are scored, in that order.
+        """
+        shared = self._acquire(features)
+        size = len(acceptance_rates)
+        rows = 1 + len(COMPONENTS)
+        call = SharedMemory(create=True, size=(rows + (base_rows is not None)) * max(size, 1) * 8)
+        buffers = np.ndarray((rows, size), dtype=np.float64, buffer=call.buf)
+        try:
+            buffers[0] = acceptance_rates
+            if base_rows is not None:
+                np.ndarray((size,), dtype=np.int64, buffer=call.buf, offset=buffers.nbytes)[...] = base_rows
+            pool = self._get_pool()
+            futures = [pool.submit(_score_shard, shared.handle, shard, call.name, size, profile, base_rows is not None)
+                       for shard in range(len(shared.bounds))]
+            for future in futures:
+                future.result()
+            return buffers[1:].copy()
+        finally:
+            del buffers
+            call.close()
+            call.unlink()
+            self._release(shared)
+
+    def component_scores(self, user_profile: Dict, features: UniversityFeatures,
+                         acceptance_rates: Optional[np.ndarray] = None,
+                         components=COMPONENTS) -> Dict[str, np.ndarray]:
+        """Same as VectorizedScorer.component_scores, scored by the worker pool (which scores all components)"""
+        if features.size < self.min_universities:
+            return self.local_scorer.component_scores(user_profile, features, acceptance_rates, components)
+        if acceptance_rates is None:
+            acceptance_rates = features.acceptance_rate
+
+        # Subsets are scored against the published block of the features they were taken from
+        base, base_rows = (features, None) if features.parent is None else (features.parent, features.parent_rows)
+        scores = dict(zip(COMPONENTS, self._run(base, acceptance_rates, compile_profile(user_profile), base_rows)))
+        return {component: scores[component] for component in components}
+
+    def close(self):
+        """Shuts down the worker pool and releases all shared memory"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+            for _, shared in self._published.values():
+                self._retire(shared)
+            self._published = {}
@@ -0,0 +1,109 @@
+from typing import Dict
+import os
+import time
+import hashlib
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Defaults, overridable through environment variables
+DEFAULT_ITERATIONS = 100000                         # PASSWORD_HASH_ITERATIONS: PBKDF2 iterations of new hashes
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)       # PASSWORD_HASH_WORKERS: passwords hashed at once
+DEFAULT_MAX_QUEUE = 32                              # PASSWORD_HASH_QUEUE: calls waiting for a worker before rejecting
+
+# Latencies kept for the percentile metrics
+LATENCY_WINDOW = 1000
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue is full; the caller should ask the user to retry"""
+
+
+class PasswordHasher:
+    """
+    Bounded pool of threads that hash passwords with PBKDF2-SHA256.
+
+    hashlib.pbkdf2_hmac releases the GIL, so the workers hash in parallel
+    while web threads keep serving other routes. At most workers hashes run
+    at once and at most max_queue calls wait for a worker; further calls are
+    rejected with PasswordHasherBusy instead of piling up. The latency of
+    every call (queue wait included) is recorded for stats().
+    """
+
+    def __init__(self, iterations: int = DEFAULT_ITERATIONS, workers: int = DEFAULT_WORKERS,
+                 max_queue: int = DEFAULT_MAX_QUEUE):
+        self.iterations = iterations
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_queue)
+        self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+
+    @classmethod
+    def from_env(cls) -> "PasswordHasher":
+        """Creates a hasher configured by the PASSWORD_HASH_* environment variables"""
+        return cls(
+            iterations=int(os.environ.get("PASSWORD_HASH_ITERATIONS", DEFAULT_ITERATIONS)),
+            workers=int(os.environ.get("PASSWORD_HASH_WORKERS", DEFAULT_WORKERS)),
+            max_queue=int(os.environ.get("PASSWORD_HASH_QUEUE", DEFAULT_MAX_QUEUE))
+        )
+
+    def hash(self, password: str, salt: str, iterations: int = None) -> str:
+        """
+        Hashes a password on the pool, waiting for the result
+
+        Args:
+            password: The plain text password
+            salt: Salt of the hash
+            iterations: PBKDF2 iterations, the configured count if not provided
+
+        Returns:
+            Hex digest of the password hash
+
+        Raises:
+            PasswordHasherBusy: If workers + max_queue calls are already in progress
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordHasherBusy("Too many password hashes in progress")
+
+        start = time.perf_counter()
+        with self._lock:
+            self.in_flight += 1
+        try:
+            future = self._pool.submit(hashlib.pbkdf2_hmac, 'sha256', password.encode('utf-8'),
+                                       salt.encode('utf-8'), iterations or self.iterations)
+            return future.result().hex()
+        finally:
+            latency = time.perf_counter() - start
+            with self._lock:
+                self.in_flight -= 1
+                self.calls += 1
+                self._latencies.append(latency)
+            self._slots.release()
+
+    def stats(self) -> Dict:
+        """Call and rejection counts, calls in progress and latencies (ms) of recent calls"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = {
+                "calls": self.calls,
+                "rejected": self.rejected,
+                "in_flight": self.in_flight,
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "iterations": self.iterations
+            }
+        for name, fraction in (("p50_ms", 0.5), ("p95_ms", 0.95)):
+            stats[name] = latencies[int(fraction * (len(latencies) - 1))] * 1000 if latencies else 0.0
+        stats["max_ms"] = latencies[-1] * 1000 if latencies else 0.0
+        return stats
+
+    def close(self):
+        """Shuts down the worker threads"""
+        self._pool.shutdown()
@@ -0,0 +1,115 @@
+from typing import Dict, Optional, Tuple, NamedTuple, Union
+import json
+from indexes import normalize_user_majors
+
+
+def academic_strength(gpa: float, sat: float) -> float:
+    """Combines GPA and SAT into the academic strength used by the academic match"""
+    # Enhanced normalization of GPA with non-linear scaling (gives bonus to very high GPAs)
+    if gpa > 4.0:  # Handle weighted GPAs gracefully
+        gpa = 4.0
+    gpa_normalized = (gpa / 4.0) ** 0.8
+
+    # SAT score percentile approximation (rough mapping of scores to percentiles)
+    if sat >= 1500: sat_percentile = 0.99
+    elif sat >= 1400: sat_percentile = 0.94
+    elif sat >= 1300: sat_percentile = 0.86
+    elif sat >= 1200: sat_percentile = 0.74
+    elif sat >= 1100: sat_percentile = 0.58
+    elif sat >= 1000: sat_percentile = 0.40
+    elif sat >= 900: sat_percentile = 0.27
+    elif sat >= 800: sat_percentile = 0.15
+    else: sat_percentile = max(0.01, sat / 1600 * 0.15)  # Minimum percentile
+
+    # Academic strength combines GPA and SAT with greater weight to GPA
+    return (gpa_normalized * 0.6) + (sat_percentile * 0.4)
+
+
+class ProfileFeatures(NamedTuple):
+    """
+    Profile-side values used by the scoring engines, derived once per profile.
+
+    Instances are immutable and hashable, so they can be shared across
+    threads and used as cache keys. The original profile is kept as
+    canonical JSON in payload.
+    """
+    has_test_scores: bool
+    academic_strength: float
+    has_preferred_majors: bool
+    majors: Tuple[str, ...]
+    has_budget: bool
+    budget: float
+    locations: Tuple[str, ...]
+    location_components: Tuple[Tuple[str, ...], ...]
+    environment: str
+    environment_lower: str
+    region: str
+    country: str
+    size: str
+    university_type: str
+    religious_affiliation: str
+    strict_budget: bool
+    importance_weights: Optional[Tuple[Tuple[str, float], ...]]
+    payload: str
+
+    def to_dict(self) -> Dict:
+        """The original user profile dictionary"""
+        return json.loads(self.payload)
+
+    def scoring_key(self) -> "ProfileFeatures":
+        """The profile without importance weights and payload; equal for profiles with equal component scores"""
+        return self._replace(importance_weights=None, payload="")
+
+
+def compile_profile(user_profile: Union[Dict, ProfileFeatures]) -> ProfileFeatures:
+    """
+    Compiles a user profile dictionary into ProfileFeatures
+
+    Args:
+        user_profile: Dictionary with user preferences, or an already compiled profile
+
+    Returns:
+        ProfileFeatures for the profile
+    """
+    if isinstance(user_profile, ProfileFeatures):
+        return user_profile
+
+    has_test_scores = "gpa" in user_profile and "sat_score" in user_profile
+    strength = academic_strength(user_profile["gpa"], user_profile["sat_score"]) if has_test_scores else 0.0
+
+    majors = user_profile.get("preferred_majors")
+    if majors is None:
+        majors = []
+
+    # Location preferences can be a list or a comma-separated string
+    preferred_locations = user_profile.get("preferred_locations") or []
+    if isinstance(preferred_locations, str):
+        preferred_locations = [loc.strip() for loc in preferred_locations.split(',')]
+    locations = tuple(loc.lower() for loc in preferred_locations)
+
+    environment = user_profile.get("preferred_environment") or ""
+
+    importance_weights = user_profile.get("importance_weights")
+    if importance_weights is not None:
+        importance_weights = tuple(sorted(importance_weights.items()))
+
+    return ProfileFeatures(
+        has_test_scores=has_test_scores,
+        academic_strength=strength,
+        has_preferred_majors="preferred_majors" in user_profile,
+        majors=tuple(normalize_user_majors(majors)),
+        has_budget="budget" in user_profile,
+        budget=user_profile.get("budget"),
+        locations=locations,
+        location_components=tuple(tuple(loc.split(", ")) for loc in locations),
+        environment=environment,
+        environment_lower=environment.lower(),
+        region=user_profile.get("preferred_region") or "",
+        country=user_profile.get("preferred_country") or "",
+        size=user_profile.get("preferred_size") or "",
+        university_type=user_profile.get("preferred_university_type") or "",
+        religious_affiliation=user_profile.get("preferred_religious_affiliation") or "",
+        strict_budget=bool(user_profile.get("strict_budget", False)),
+        importance_weights=importance_weights,
+        payload=json.dumps(user_profile, sort_keys=True, default=str)
+    )
@@ -0,0 +1,89 @@
+from typing import List, Tuple
+from collections.abc import Mapping
+from functools import lru_cache
+import sqlite3
+from sys import intern
+
+
+class Record(Mapping):
+    """
+    Query result row with one slot per column.
+
+    A record reads like the row dictionary it replaces (record["name"],
+    record.get("name"), "name" in record, keys() and items()), and Jinja
+    templates can also use record.name. It takes a fraction of a
+    dictionary's memory because the column names live on the class.
+    Records are read-only, since catalog records are shared between
+    requests; copy() returns a plain dictionary to modify, and dict(record)
+    converts a record at a JSON boundary.
+    """
+
+    __slots__ = ()
+    _fields: Tuple[str, ...] = ()
+    _field_set = frozenset()
+
+    def __init__(self, *values):
+        for name, value in zip(self._fields, values):
+            object.__setattr__(self, name, value)
+
+    @classmethod
+    def from_row(cls, cursor, row) -> "Record":
+        """sqlite3 row factory; repeated strings (statuses, programs, countries) share one object"""
+        return cls(*[intern(value) if type(value) is str else value for value in row])
+
+    def __getitem__(self, key):
+        if key in self._field_set:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        if key in self._field_set:
+            return getattr(self, key)
+        return default
+
+    def __contains__(self, key) -> bool:
+        return key in self._field_set
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} records are read-only; modify a copy()")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} records are read-only; modify a copy()")
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    def copy(self) -> dict:
+        """Plain dictionary with the record's fields"""
+        return {name: getattr(self, name) for name in self._fields}
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({', '.join(f'{name}={getattr(self, name)!r}' for name in self._fields)})"
+
+
+@lru_cache(maxsize=None)
+def record_type(name: str, fields: Tuple[str, ...]) -> type:
+    """
+    Record class with the given column names, created once per name and columns
+
+    Args:
+        name: Class name, e.g. the entity the rows describe
+        fields: Column names, which must be identifiers that do not shadow Record methods
+
+    Returns:
+        Record subclass with one slot per column
+    """
+    for field in fields:
+        if not field.isidentifier() or hasattr(Record, field):
+            raise ValueError(f"Invalid record field name: {field}")
+    return type(name, (Record,), {"__slots__": fields, "_fields": fields, "_field_set": frozenset(fields),
+                               "__module__": __name__})
+
+
+def fetch_records(cursor: sqlite3.Cursor, name: str) -> List[Record]:
+    """Fetches the remaining rows of a cursor as records of one class"""
+    cursor.row_factory = record_type(name, tuple(col[0] for col in cursor.description)).from_row
+    return cursor.fetchall()
@@ -0,0 +1,112 @@
+from typing import List, Dict
+import os
+import json
+import time
+import hashlib
+import threading
+from profile_features import compile_profile
+
+# Defaults, overridable through environment variables
+DEFAULT_MAX_ENTRIES = 100000        # DEEPSEEK_CACHE_SIZE: cached scores kept before LRU eviction
+DEFAULT_TTL = 24 * 60 * 60          # DEEPSEEK_CACHE_TTL: seconds a cached score stays valid
+DEFAULT_TOUCH_INTERVAL = 60         # DEEPSEEK_CACHE_TOUCH_INTERVAL: resolution of an entry's last-used time
+
+
+def profile_hash(user_profile: Dict) -> str:
+    """Canonical hash of a user profile, equal for equal profiles whatever their key order"""
+    return hashlib.sha256(compile_profile(user_profile).payload.encode()).hexdigest()
+
+
+def university_key(university: Dict) -> str:
+    """Key of a university row version: its ID and a hash of all its column values"""
+    row = json.dumps(dict(university), sort_keys=True, default=str)
+    return f"{university.get('id')}:{hashlib.sha256(row.encode()).hexdigest()[:32]}"
+
+
+class ScoreCache:
+    """
+    Persistent cache of Deepseek API match scores.
+
+    Scores are stored in the match_score_cache table, keyed by a hash of the
+    profile and a hash of the university row, so any change to either is a
+    miss. Entries expire after ttl seconds and the least recently used ones
+    are evicted beyond max_entries. A hit only updates an entry's last-used
+    time once it is touch_interval seconds old, so repeated hits read the
+    table without writing to it. Hit and miss counts are kept per cache.
+    """
+
+    def __init__(self, db, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL, clock=time.time,
+                 touch_interval: float = DEFAULT_TOUCH_INTERVAL):
+        self.db = db
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.touch_interval = touch_interval
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, db) -> "ScoreCache":
+        """Creates a cache with limits read from the DEEPSEEK_CACHE_* environment variables"""
+        return cls(
+            db,
+            max_entries=int(os.environ.get("DEEPSEEK_CACHE_SIZE", DEFAULT_MAX_ENTRIES)),
+            ttl=float(os.environ.get("DEEPSEEK_CACHE_TTL", DEFAULT_TTL)),
+            touch_interval=float(os.environ.get("DEEPSEEK_CACHE_TOUCH_INTERVAL", DEFAULT_TOUCH_INTERVAL))
+        )
+
+    def get_many(self, user_profile: Dict, universities: List[Dict]) -> Dict[int, float]:
+        """
+        Looks up cached scores of many universities
+
+        Args:
+            user_profile: Dictionary with user preferences, or a compiled profile
+            universities: List of university dictionaries
+
+        Returns:
+            Dictionary mapping id() of each cached university dictionary to its score
+        """
+        if not universities:
+            return {}
+        now = self.clock()
+        key = profile_hash(user_profile)
+        keys = [university_key(university) for university in universities]
+        cached = self.db.get_cached_match_scores(key, list(set(keys)), now - self.ttl)
+        stale = [k for k, (_, last_used) in cached.items() if last_used <= now - self.touch_interval]
+        if stale:
+            self.db.touch_cached_match_scores(key, stale, now)
+
+        scores = {id(university): cached[k][0] for university, k in zip(universities, keys) if k in cached}
+        with self._lock:
+            self.hits += len(scores)
+            self.misses += len(universities) - len(scores)
+        return scores
+
+    def put_many(self, user_profile: Dict, universities: List[Dict], scores: List[float]):
+        """Stores the scores of many universities, skipping missing (None) scores"""
+        entries = {university_key(university): score
+                   for university, score in zip(universities, scores) if score is not None}
+        if not entries:
+            return
+        now = self.clock()
+        self.db.save_cached_match_scores(profile_hash(user_profile), entries, now)
+        self.db.evict_cached_match_scores(self.max_entries, now - self.ttl)
+
+    def stats(self) -> Dict:
+        """Hit and miss counters, with the hit rate and number of stored entries"""
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "entries": self.db.count_cached_match_scores()
+        }
+
+    def clear(self):
+        """Removes every cached score and resets the counters"""
+        self.db.clear_cached_match_scores()
+        with self._lock:
+            self.hits = self.misses = 0
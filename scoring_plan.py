@@ -0,0 +1,38 @@
+from typing import Dict, Optional, Tuple, NamedTuple
+from functools import lru_cache
+from vectorized import COMPONENTS
+
+
+class ScoringPlan(NamedTuple):
+    """
+    Components a weight vector needs, derived once per weight vector.
+
+    Components with a zero (or, without a default, missing) weight do not
+    change the match score and are left out of active; they are only
+    computed where they are displayed.
+    """
+    weights: Tuple[Tuple[str, float], ...]
+    active: Tuple[str, ...]
+    skipped: Tuple[str, ...]
+
+
+@lru_cache(maxsize=1024)
+def _build_plan(weights: Tuple[Tuple[str, float], ...], default_weight: Optional[float]) -> ScoringPlan:
+    weight_map = dict(weights)
+    active = tuple(component for component in COMPONENTS if weight_map.get(component, default_weight))
+    skipped = tuple(component for component in COMPONENTS if component not in active)
+    return ScoringPlan(weights, active, skipped)
+
+
+def scoring_plan(weights: Dict[str, float], default_weight: Optional[float] = None) -> ScoringPlan:
+    """
+    Scoring plan of a weight vector, cached per weight vector
+
+    Args:
+        weights: Weight per component
+        default_weight: Weight of components missing from weights (None leaves them out)
+
+    Returns:
+        ScoringPlan with the active and skipped components in COMPONENTS order
+    """
+    return _build_plan(tuple(sorted(weights.items())), default_weight)
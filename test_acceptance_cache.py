@@ -0,0 +1,63 @@
+def _count_application_reads(matcher, monkeypatch):
+    reads = []
+    get_applications = matcher.db.get_university_applications
+    monkeypatch.setattr(matcher.db, "get_university_applications",
+                        lambda university_id, **kwargs: reads.append(university_id) or get_applications(university_id, **kwargs))
+    return reads
+
+
+def _add_application(db, university_id, status, applicant_id="cache-test"):
+    db.conn.execute(
+        "INSERT INTO applications (applicant_id, university_id, program, status, submission_date) "
+        "VALUES (?, ?, 'Engineering', ?, '2024-01-01')",
+        (applicant_id, university_id, status))
+    db.conn.commit()
+
+
+def test_rates_are_calculated_once(matcher, monkeypatch):
+    reads = _count_application_reads(matcher, monkeypatch)
+    university_ids = sorted(matcher.db.get_cached_acceptance_rates())
+
+    first = [matcher.get_accurate_acceptance_rate(uid) for uid in university_ids]
+    second = [matcher.get_accurate_acceptance_rate(uid) for uid in university_ids]
+    matcher.get_acceptance_rate_array(matcher.catalog.features)
+
+    assert first == second
+    assert sorted(reads) == university_ids
+
+
+def test_application_changes_invalidate_only_that_university(matcher, monkeypatch):
+    university_ids = sorted(matcher.db.get_cached_acceptance_rates())
+    before = {uid: matcher.get_accurate_acceptance_rate(uid) for uid in university_ids}
+    reads = _count_application_reads(matcher, monkeypatch)
+
+    changed = university_ids[0]
+    for i in range(50):
+        _add_application(matcher.db, changed, "admitted", f"cache-test-{i}")
+    rates = matcher.get_acceptance_rate_array(matcher.catalog.features)
+
+    assert reads == [changed]
+    assert rates[matcher.catalog.row_of(changed)] != before[changed]
+    assert matcher.get_accurate_acceptance_rate(changed) == rates[matcher.catalog.row_of(changed)]
+
+
+def test_removing_all_applications_falls_back_to_stored_rate(matcher):
+    university_id = sorted(matcher.db.get_cached_acceptance_rates())[0]
+    matcher.get_accurate_acceptance_rate(university_id)
+
+    matcher.db.conn.execute("DELETE FROM applications WHERE university_id = ?", (university_id,))
+    matcher.db.conn.commit()
+
+    expected = matcher._validate_acceptance_rate(matcher.catalog.get(university_id)["acceptance_rate"])
+    assert matcher.get_accurate_acceptance_rate(university_id) == expected
+    assert matcher.db.get_cached_acceptance_rate(university_id) is None
+
+
+def test_stale_rate_is_not_stored(matcher):
+    university_id = sorted(matcher.db.get_cached_acceptance_rates())[0]
+    _, generation = matcher.db.get_cached_acceptance_rate(university_id)
+
+    _add_application(matcher.db, university_id, "rejected")
+
+    assert not matcher.db.save_cached_acceptance_rate(university_id, 12.5, generation)
+    assert matcher.db.get_cached_acceptance_rate(university_id)[0] is None
@@ -0,0 +1,45 @@
+from admission_analytics import AdmissionRateCalculator
+
+
+def _grouped_applications(db):
+    return db.conn.execute('''SELECT university_id, program, substr(submission_date, 1, 7), status, COUNT(*)
+        FROM applications GROUP BY 1, 2, 3, 4 ORDER BY 1, 2, 3, 4''').fetchall()
+
+
+def _stats(db):
+    return db.conn.execute("SELECT * FROM application_stats ORDER BY 1, 2, 3, 4").fetchall()
+
+
+def test_triggers_keep_stats_in_step_with_applications(db):
+    assert _stats(db) == _grouped_applications(db)
+
+    db.conn.execute('''INSERT INTO applications (applicant_id, university_id, program, status, submission_date)
+        VALUES ('new_applicant', 1, 'Astronomy', 'admitted', '2024-02-10')''')
+    db.conn.execute("UPDATE applications SET status = 'rejected' WHERE id IN (1, 2, 3)")
+    db.conn.execute("UPDATE applications SET submission_date = '2020-01-01' WHERE id = 4")
+    db.conn.execute("DELETE FROM applications WHERE university_id = 2")
+    db.conn.commit()
+
+    assert _stats(db) == _grouped_applications(db)
+    assert db.get_application_status_counts(2) == {}
+    assert db.get_application_status_counts(1, "program")["Astronomy"] == {"admitted": 1}
+
+
+def test_count_rates_match_calculator(db, university_with_applications):
+    calculator = AdmissionRateCalculator()
+    university_id = university_with_applications
+    applications = [dict(app) for app in db.get_university_applications(university_id)]
+    calculator.load_applications(applications)
+
+    for exclude_incomplete in (True, False):
+        assert calculator.rate_from_status_counts(db.get_application_status_counts(university_id),
+                                                  exclude_incomplete) == \
+            calculator.calculate_admission_rate(exclude_incomplete=exclude_incomplete)
+
+    assert calculator.trends_from_counts(db.get_application_status_counts(university_id, "month")) == \
+        calculator.analyze_trends(interval="month")
+    assert calculator.trends_from_counts(db.get_application_status_counts(university_id, "year")) == \
+        calculator.analyze_trends(interval="year")
+
+    program_rates = calculator.stratified_rates_from_counts(db.get_application_status_counts(university_id, "program"))
+    assert program_rates == calculator.calculate_stratified_rates("program")
@@ -0,0 +1,146 @@
+import pytest
+from catalog import UniversityCatalog
+from indexes import location_text_points
+
+
+def test_catalog_mirrors_universities_table(db):
+    catalog = UniversityCatalog(db)
+    universities = db.get_all_universities()
+
+    assert len(catalog) == len(universities)
+    assert catalog.features.size == len(universities)
+    for university in universities:
+        record = catalog.get(university["id"])
+        assert record["name"] == university["name"]
+        assert catalog.columns["tuition_fee"][catalog.row_of(university["id"])] == university["tuition_fee"]
+
+
+def test_catalog_reloads_only_when_table_changes(db):
+    catalog = UniversityCatalog(db)
+    records = catalog.records
+
+    # Writes to other tables leave the catalog untouched
+    db.register_user("catalog_user", "catalog@example.com", "password123")
+    assert catalog.records is records
+
+    db.conn.execute("UPDATE universities SET tuition_fee = 1234 WHERE id = 1")
+    db.conn.commit()
+    assert catalog.records is not records
+    assert catalog.get(1)["tuition_fee"] == 1234
+
+
+def test_catalog_normalizes_text_columns(db):
+    db.conn.execute("UPDATE universities SET environment = '  Urban ', religious_affiliation = '' WHERE id = 1")
+    db.conn.commit()
+    catalog = UniversityCatalog(db)
+
+    assert catalog.get(1)["environment"] == "Urban"
+    assert catalog.get(1)["religious_affiliation"] is None
+    assert "" not in catalog.distinct_values("religious_affiliation")
+
+
+@pytest.mark.parametrize("major", ["Engineering", "computer science", "Design", "Arts"])
+def test_major_index_matches_substring_filter(db, major):
+    catalog = UniversityCatalog(db)
+    expected = {u["id"] for u in db.get_all_universities()
+                if major.lower() in (u.get("major_strengths") or "").lower()}
+
+    assert catalog.ids_for_rows(catalog.majors.rows_containing(major)) == expected
+
+
+@pytest.mark.parametrize("low, high", [(None, 20), (10, 50), (30, None), (5, 5), (90, 10)])
+def test_filter_index_ranges_match_linear_scan(db, low, high):
+    catalog = UniversityCatalog(db)
+    expected = {u["id"] for u in db.get_all_universities()
+                if u["acceptance_rate"] is not None
+                and (low is None or u["acceptance_rate"] >= low)
+                and (high is None or u["acceptance_rate"] <= high)}
+
+    assert catalog.ids_for_rows(catalog.filters.range_rows("acceptance_rate", low, high)) == expected
+
+
+def test_filter_index_buckets_match_linear_scan(db):
+    db.conn.execute("UPDATE universities SET religious_affiliation = NULL, tuition_fee = NULL WHERE id = 2")
+    db.conn.commit()
+    catalog = UniversityCatalog(db)
+    universities = db.get_all_universities()
+
+    for column in ("country", "environment", "campus_size", "religious_affiliation"):
+        for value in {u[column] for u in universities}:
+            expected = {u["id"] for u in universities if u[column] == value}
+            assert catalog.ids_for_rows(catalog.filters.equal_rows(column, value)) == expected
+    assert len(catalog.filters.equal_rows("country", "Atlantis")) == 0
+
+    # Missing tuition never passes a tuition filter
+    assert 2 not in catalog.ids_for_rows(catalog.filters.range_rows("tuition_fee", high=10 ** 9))
+
+
+def _location_text_points(preferred_locations, uni_location):
+    """The per-university location text rule of calculate_location_match"""
+    uni_location = (uni_location or "").lower()
+    if any(loc in uni_location for loc in preferred_locations):
+        return 25
+    uni_location_components = uni_location.split(", ")
+    return 15 * sum(1 for loc in preferred_locations
+                    if any(component in uni_location_components for component in loc.split(", ")))
+
+
+@pytest.mark.parametrize("preferred_locations", [
+    ("california",), ("cambridge, ma", "new york"), ("ma",), ("london, uk", "uk", "boston, ma"), ("",), ("zz",)
+])
+def test_location_index_matches_text_rule(db, preferred_locations):
+    catalog = UniversityCatalog(db)
+    components = tuple(tuple(loc.split(", ")) for loc in preferred_locations)
+
+    for location in list(catalog.distinct_values("location")) + [None, "Cambridge, MA, USA"]:
+        assert location_text_points(location, preferred_locations, components) == \
+            _location_text_points(preferred_locations, location)
+        row = catalog.locations.location_ids.get(location)
+        if row is not None:
+            assert catalog.locations.text_points(preferred_locations, components)[row] == \
+                _location_text_points(preferred_locations, location)
+        assert catalog.locations.matches_any(location, preferred_locations) == \
+            any(loc in (location or "").lower() for loc in preferred_locations)
+
+
+def test_records_read_like_row_dictionaries(db, university_with_applications):
+    university = db.get_all_universities()[0]
+    record = UniversityCatalog(db).get(university["id"])
+
+    assert record == dict(university) and university["name"] == university.name
+    assert "name" in record and "match_score" not in record
+    assert record.get("match_score", 0) == 0
+    # Records are shared between requests and cannot be modified
+    with pytest.raises(TypeError):
+        record["match_score"] = 1.0
+    with pytest.raises(TypeError):
+        record["name"] = "Renamed"
+    with pytest.raises(AttributeError):
+        record.name = "Renamed"
+
+    # Copies are plain dictionaries that can take extra fields
+    copy = record.copy()
+    copy["match_score"] = 1.0
+    assert type(copy) is dict and copy["name"] == record["name"]
+
+    applications = db.get_university_applications(university_with_applications)
+    assert applications and applications[0].status in ("admitted", "rejected", "incomplete", "pending")
+
+
+def test_pinned_catalog_checks_version_once(db, monkeypatch):
+    catalog = UniversityCatalog(db)
+    first = catalog.records
+
+    checks = []
+    get_table_version = db.get_table_version
+    monkeypatch.setattr(db, "get_table_version", lambda table: checks.append(table) or get_table_version(table))
+    with catalog.pinned() as snapshot:
+        db.conn.execute("UPDATE universities SET tuition_fee = 1234 WHERE id = 1")
+        db.conn.commit()
+        # The pinned snapshot stays consistent even though the table changed
+        assert catalog.records is first and catalog.features is snapshot.features
+        assert catalog.get(1)["tuition_fee"] != 1234 and catalog.version == snapshot.version
+        assert len(checks) == 1
+
+    assert catalog.get(1)["tuition_fee"] == 1234
+    assert catalog.records is not first and catalog.row_of(1) == 0
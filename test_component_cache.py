@@ -0,0 +1,72 @@
+import pytest
+from matcher import UniversityMatcher
+from component_cache import ComponentCache
+from test_vectorized import PROFILES
+
+WEIGHTS = {"academic": 0.1, "financial": 0.1, "location": 0.5, "career": 0.2, "campus": 0.1}
+
+
+def _count_scoring(matcher, monkeypatch):
+    calls = []
+    scalar = matcher.calculate_component_scores
+    vectorized = matcher.vectorized_scorer.component_scores
+    monkeypatch.setattr(matcher, "calculate_component_scores",
+                        lambda *args: calls.append("scalar") or scalar(*args))
+    monkeypatch.setattr(matcher.vectorized_scorer, "component_scores",
+                        lambda *args: calls.append("vectorized") or vectorized(*args))
+    return calls
+
+
+@pytest.mark.parametrize("engine", ["scalar", "vectorized"])
+def test_weights_change_reuses_component_scores(db, monkeypatch, engine):
+    matcher = UniversityMatcher(db, engine=engine)
+    calls = _count_scoring(matcher, monkeypatch)
+    universities = matcher.catalog.records[5:60]
+    matcher.get_recommendations(PROFILES[0], top_n=10)
+    matcher.match_universities(PROFILES[0], universities)
+    calls.clear()
+
+    # Different weights, same profile otherwise: no university is rescored
+    profile = dict(PROFILES[0], importance_weights=WEIGHTS)
+    recommendations = matcher.get_recommendations(profile, top_n=10)
+    matcher.set_weights(WEIGHTS)
+    matched = matcher.match_universities(profile, list(universities))
+    assert calls == []
+
+    fresh = UniversityMatcher(db, engine=engine)
+    fresh.component_cache = ComponentCache(0)
+    assert recommendations == fresh.get_recommendations(profile, top_n=10)
+    fresh.set_weights(WEIGHTS)
+    assert matched == fresh.match_universities(profile, universities)
+
+
+def test_profile_and_data_changes_rescore(db, monkeypatch):
+    matcher = UniversityMatcher(db, engine="vectorized")
+    calls = _count_scoring(matcher, monkeypatch)
+    matcher.match_universities(PROFILES[0])
+    matcher.match_universities(PROFILES[1])
+    assert len(calls) == 2
+
+    db.conn.execute("UPDATE universities SET tuition_fee = tuition_fee + 1 WHERE id = 1")
+    db.conn.commit()
+    matcher.match_universities(PROFILES[0])
+    db.conn.execute("INSERT INTO applications (applicant_id, university_id, program, status, submission_date) "
+                    "VALUES ('component-cache', 1, 'Engineering', 'admitted', '2024-01-01')")
+    db.conn.commit()
+    matcher.match_universities(PROFILES[0])
+    assert len(calls) == 4
+    # Entries of older data versions are dropped
+    assert len(matcher.component_cache) == 1
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = ComponentCache(2)
+    cache.put("a", 1, {"value": "a"})
+    cache.put("b", 1, {"value": "b"})
+    cache.get("a", 1)
+    cache.put("c", 1, {"value": "c"})
+
+    assert cache.get("b", 1) is None
+    assert cache.get("a", 1) == {"value": "a"}
+    assert cache.get("a", 2) is None
+    assert (cache.hits, cache.misses) == (2, 2)
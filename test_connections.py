@@ -0,0 +1,40 @@
+import threading
+from db import UniversityDatabase
+
+
+def _in_thread(function):
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(value=function()))
+    thread.start()
+    thread.join()
+    return result["value"]
+
+
+def test_connections_are_per_thread_in_wal_mode(db):
+    assert db.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert db.conn is db.conn
+    assert _in_thread(lambda: id(db.conn)) != id(db.conn)
+    assert _in_thread(lambda: db.conn.execute("PRAGMA synchronous").fetchone()[0]) == 1  # NORMAL
+
+
+def test_finished_thread_connection_is_reused(db):
+    first = _in_thread(lambda: id(db.conn))
+    assert _in_thread(lambda: id(db.conn)) == first
+    assert len(db._connections) == 2
+
+
+def test_reads_proceed_during_write(db):
+    count = len(db.get_all_universities())
+    db.conn.execute("DELETE FROM universities")  # Write transaction left open
+
+    # Readers see the last committed state without waiting for the writer
+    assert _in_thread(lambda: len(db.get_all_universities())) == count
+    db.conn.commit()
+    assert _in_thread(lambda: len(db.get_all_universities())) == 0
+
+
+def test_memory_database_shares_one_connection():
+    db = UniversityDatabase(":memory:")
+    db.insert_sample_data()
+    assert _in_thread(lambda: len(db.get_all_universities())) == len(db.get_all_universities()) > 0
+    db.close()
@@ -5,6 +5,9 @@ from db import UniversityDatabase
 if os.path.exists("universities.db"):
     print("Removing existing database...")
     os.remove("universities.db")
+for journal_file in ("universities.db-wal", "universities.db-shm"):
+    if os.path.exists(journal_file):
+        os.remove(journal_file)
 
 # Create the database and insert sample data
 print("Creating new database with updated schema...")
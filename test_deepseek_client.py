@@ -0,0 +1,177 @@
+import json
+import gzip
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import pytest
+from matcher import UniversityMatcher
+from deepseek_client import DeepseekClient, CircuitBreaker
+from test_vectorized import PROFILES
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Stand-in for the Deepseek match API; behaviour is set on the server"""
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        payload = json.loads(body)
+        with server.lock:
+            server.payloads.append(payload)
+            server.requests += 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        time.sleep(server.delay)
+        with server.lock:
+            server.in_flight -= 1
+
+        if server.status != 200:
+            body = b"unavailable"
+        elif server.body is not None:
+            body = server.body
+        elif "universities" in payload:
+            body = json.dumps({"match_scores": [{"id": u["id"], "match_score": len(u["name"]) / 100}
+                                                for u in reversed(payload["universities"])]}).encode()
+        else:
+            body = json.dumps({"match_score": len(payload["university"]["name"]) / 100}).encode()
+        self.send_response(server.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = server.requests = server.in_flight = server.max_in_flight = 0
+    server.delay = 0
+    server.status = 200
+    server.body = None
+    server.payloads = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/v1/match"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+UNIVERSITIES = [{"id": i, "name": "U" * (i + 1)} for i in range(12)]
+
+
+def test_scores_are_fetched_concurrently_over_pooled_connections(server):
+    server.delay = 0.1
+    client = DeepseekClient(server.url, "key", max_concurrency=4)
+
+    start = time.perf_counter()
+    scores = client.score_many(PROFILES[0], UNIVERSITIES)
+    elapsed = time.perf_counter() - start
+    client.score_many(PROFILES[0], UNIVERSITIES)
+    client.close()
+
+    assert scores == [len(u["name"]) / 100 for u in UNIVERSITIES]
+    assert server.max_in_flight == 4
+    assert elapsed < 0.1 * len(UNIVERSITIES) / 2
+    # Keep-alive connections are reused across requests and batches
+    assert server.connections <= 4
+
+
+def test_timeouts_and_latency_budget_give_local_fallback(server):
+    server.delay = 0.5
+    client = DeepseekClient(server.url, "key", max_concurrency=2, timeout=0.1, latency_budget=5,
+                            breaker=CircuitBreaker(failure_threshold=100))
+    assert client.score_many(PROFILES[0], UNIVERSITIES[:4]) == [None] * 4
+
+    client = DeepseekClient(server.url, "key", max_concurrency=1, timeout=5, latency_budget=0.2)
+    start = time.perf_counter()
+    scores = client.score_many(PROFILES[0], UNIVERSITIES[:4])
+    assert time.perf_counter() - start < 0.45
+    assert scores.count(None) >= 3
+    client.close()
+
+
+def test_batched_requests_map_scores_back_by_id(server, db):
+    universities = db.get_all_universities()
+
+    single = DeepseekClient(server.url, "key")
+    batched = DeepseekClient(server.url, "key", batch_size=50, compress=True)
+    expected = single.score_many(PROFILES[0], universities)
+    assert batched.score_many(PROFILES[0], universities) == expected
+    assert expected == [len(u["name"]) / 100 for u in universities]
+
+    assert batched.requests_sent == -(-len(universities) // 50)
+    untrimmed = sum(len(json.dumps({"user_profile": PROFILES[0], "university": dict(u)})) for u in universities)
+    assert batched.bytes_sent * 10 < untrimmed
+    single.close()
+    batched.close()
+
+
+def test_requests_carry_only_scoring_preferences(server):
+    profile = dict(PROFILES[0], importance_weights={"academic": 1.0}, strict_budget=True,
+                   profile_name="My Profile", preferred_region="", theme="dark")
+    client = DeepseekClient(server.url, "key", batch_size=2)
+    client.score(profile, UNIVERSITIES[0])
+    client.score_batch(profile, UNIVERSITIES[:2])
+    client.close()
+
+    for payload in server.payloads:
+        assert payload["user_profile"] == PROFILES[0]
+
+
+def test_circuit_breaker_skips_api_during_cooldown(server):
+    server.status = 503
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=3, cooldown=30, clock=lambda: now[0])
+    client = DeepseekClient(server.url, "key", max_concurrency=1, breaker=breaker)
+
+    assert client.score_many(PROFILES[0], UNIVERSITIES) == [None] * len(UNIVERSITIES)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert server.requests == 3
+
+    # A single trial request after the cool-down closes the circuit again
+    now[0] = 31
+    server.status = 200
+    assert client.score(PROFILES[0], UNIVERSITIES[0]) == 0.01
+    assert breaker.state == CircuitBreaker.CLOSED
+    client.close()
+
+
+@pytest.mark.parametrize("body", [b"[0.9]", b'"ok"', b"null", b'{"match_scores": 0.9}'])
+def test_malformed_responses_give_local_fallback(server, body):
+    server.body = body
+    client = DeepseekClient(server.url, "key", max_concurrency=2, batch_size=3)
+    assert client.score_many(PROFILES[0], UNIVERSITIES[:3]) == [None] * 3
+    if body.startswith(b"{"):
+        assert client.score(PROFILES[0], UNIVERSITIES[0]) == 0.5
+    else:
+        assert client.score(PROFILES[0], UNIVERSITIES[0]) is None
+    client.close()
+
+
+def test_matcher_falls_back_to_local_scores(server, db):
+    local = UniversityMatcher(db).get_recommendations(PROFILES[0], top_n=10)
+
+    matcher = UniversityMatcher(db)
+    matcher.use_deepseek = True
+    matcher.deepseek_api_key = "key"
+    matcher.deepseek_api_url = server.url
+    api = matcher.get_recommendations(PROFILES[0], top_n=5)
+    assert [u["match_score"] for u in api] == [round(len(u["name"]) / 100 * 100, 1) for u in api]
+
+    server.status = 500
+    matcher.score_cache.clear()
+    assert [u["name"] for u in matcher.get_recommendations(PROFILES[0], top_n=10)] == [u["name"] for u in local]
@@ -0,0 +1,83 @@
+import json
+import pytest
+from db import UniversityDatabase
+from ingest import read_rows, clean_application, ingest
+
+FIELDS = ("applicant_id", "university_id", "program", "status", "submission_date", "gpa", "sat_score")
+
+
+ROWS = [
+    ("new_1", "1", "Physics", "admitted", "2024-03-01", "3.9", "1500"),
+    ("new_2", "1", "Physics", " Rejected ", "2024-03-02", "", ""),
+    ("new_1", "1", "Physics", "rejected", "2024-04-01", "3.9", "1500"),  # Duplicate in the file
+    ("sample_applicant_1_0", "1", "Computer Science", "rejected", "2024-01-01", "", ""),  # Duplicate of stored data
+    ("new_3", "2", "Physics", "waitlisted", "2024-03-01", "", ""),  # Unknown status
+    ("new_4", "2", "", "pending", "2024-03-01", "", ""),  # Missing program
+    ("new_5", "2", "Physics", "pending", "03/01/2024", "", ""),  # Bad date
+    ("new_6", "2", "Physics", "pending", "2024-03-01", "high", ""),  # Bad GPA
+    ("new_7", "2", "Physics", "incomplete", "2024-05-01", "3.1", "1100"),
+]
+
+
+def test_clean_application_applies_calculator_rules():
+    assert clean_application(dict(zip(FIELDS, ROWS[1]))) == \
+        ("new_2", 1, "Physics", "rejected", "2024-03-02", None, None, None)
+    for row in ROWS[4:8]:
+        assert clean_application(dict(zip(FIELDS, row))) is None
+    assert clean_application({"applicant_id": "x", "university_id": 1, "program": "Physics",
+                              "status": "admitted"}) is None
+
+
+@pytest.mark.parametrize("file_format", ["csv", "jsonl"])
+def test_ingest_streams_batches_and_skips_duplicates(db, tmp_path, file_format):
+    path = tmp_path / f"applications.{file_format}"
+    if file_format == "csv":
+        path.write_text("\n".join([",".join(FIELDS)] + [",".join(row) for row in ROWS]) + "\n")
+    else:
+        path.write_text("\n".join([json.dumps(dict(zip(FIELDS, row))) for row in ROWS] + ["not json"]) + "\n")
+    before = db.get_application_status_counts(1, "program").get("Physics", {})
+
+    stats = ingest(db, read_rows(str(path)), batch_size=2, progress_every=0)
+
+    assert stats["read"] == len(ROWS) + (file_format == "jsonl")
+    assert (stats["inserted"], stats["duplicates"]) == (3, 2)
+    assert stats["invalid"] == stats["read"] - 5
+    assert before == {}
+    assert db.get_application_status_counts(1, "program")["Physics"] == {"admitted": 1, "rejected": 1}
+    assert db.get_application_status_counts(2, "program")["Physics"] == {"incomplete": 1}
+
+    # Importing the same file again inserts nothing
+    assert ingest(db, read_rows(str(path)), batch_size=100, progress_every=0)["inserted"] == 0
+
+
+def test_index_migration_removes_duplicate_applications(tmp_path):
+    path = str(tmp_path / "universities.db")
+    db = UniversityDatabase(path)
+    db.insert_sample_data()
+    db.conn.execute("DROP INDEX idx_applications_applicant_university_program")
+    db.conn.execute("UPDATE schema_versions SET version = 3 WHERE name = 'schema'")
+    db.conn.execute('''INSERT INTO applications (applicant_id, university_id, program, status, submission_date)
+        SELECT applicant_id, university_id, program, 'pending', submission_date FROM applications WHERE id = 1''')
+    db.conn.commit()
+    db.close()
+
+    db = UniversityDatabase(path)
+    assert db.conn.execute("SELECT COUNT(*) FROM applications WHERE applicant_id = 'sample_applicant_1_0'").fetchone()[0] == 1
+    assert db.conn.execute("SELECT status FROM applications WHERE applicant_id = 'sample_applicant_1_0'").fetchone()[0] == "admitted"
+    db.close()
+
+
+def test_ingest_refreshes_read_replica(make_db):
+    db = make_db("replica.db", read_replica=True)
+    replica = db.read_conn
+    rows = [dict(zip(FIELDS, row)) for row in ROWS]
+
+    assert ingest(db, iter(rows), batch_size=2, progress_every=0)["inserted"] == 3
+    assert db.read_conn is not replica
+    assert db.get_application_status_counts(1, "program")["Physics"] == {"admitted": 1, "rejected": 1}
+    assert {app["applicant_id"] for app in db.get_university_applications(2)} >= {"new_7"}
+
+    # A single batch refreshes the replica by itself
+    db.insert_applications([("new_8", 2, "Physics", "pending", "2024-06-01", None, None, None)])
+    assert "new_8" in {app["applicant_id"] for app in db.get_university_applications(2)}
+    db.close()
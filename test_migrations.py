@@ -0,0 +1,110 @@
+import sqlite3
+import threading
+from db import UniversityDatabase, SCHEMA_MIGRATIONS, SAMPLE_DATA_VERSION
+
+
+def test_seeding_runs_once(tmp_path):
+    db = UniversityDatabase(str(tmp_path / "universities.db"))
+    db.insert_sample_data()
+    versions = db.get_schema_versions()
+    assert versions == {"schema": len(SCHEMA_MIGRATIONS), "sample_data": SAMPLE_DATA_VERSION}
+
+    table_version = db.get_table_version("universities")
+    db.insert_sample_data()
+    assert db.get_table_version("universities") == table_version
+    db.close()
+
+    # A restarted process neither migrates nor seeds again
+    db = UniversityDatabase(str(tmp_path / "universities.db"))
+    db.insert_sample_data()
+    assert db.get_table_version("universities") == table_version
+    assert db.conn.execute("SELECT COUNT(*) FROM users WHERE username = 'demo_user'").fetchone()[0] == 1
+
+    db.insert_sample_data(force=True)
+    assert db.get_table_version("universities") > table_version
+    db.close()
+
+
+def test_concurrent_processes_seed_once(tmp_path):
+    path = str(tmp_path / "universities.db")
+    UniversityDatabase(path).close()
+    errors = []
+
+    def start():
+        try:
+            db = UniversityDatabase(path)
+            db.insert_sample_data()
+            db.close()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=start) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    db = UniversityDatabase(path)
+    names = [u["name"] for u in db.get_all_universities()]
+    assert len(names) == len(set(names)) > 0
+    assert db.conn.execute("SELECT COUNT(*) FROM applications").fetchone()[0] == 1500
+    db.close()
+
+
+def test_unversioned_database_is_migrated_and_seeded(tmp_path):
+    path = str(tmp_path / "universities.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE universities (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL)")
+    conn.commit()
+    conn.close()
+
+    db = UniversityDatabase(path)
+    assert db.get_schema_versions() == {"schema": len(SCHEMA_MIGRATIONS)}
+    assert db.get_all_universities() == []
+    db.close()
+
+
+def test_user_queries_use_indexes(tmp_path):
+    db = UniversityDatabase(str(tmp_path / "universities.db"))
+    for _, index_checks in SCHEMA_MIGRATIONS:
+        assert db.check_query_plans(index_checks)
+    db.close()
+
+
+def test_index_migration_removes_duplicate_saved_recommendations(tmp_path):
+    path = str(tmp_path / "universities.db")
+    db = UniversityDatabase(path)
+    db.insert_sample_data()
+    db.conn.execute("DROP INDEX idx_saved_recommendations_user_profile_university")
+    db.conn.execute("UPDATE schema_versions SET version = 1 WHERE name = 'schema'")
+    db.conn.executemany(
+        "INSERT INTO saved_recommendations (user_id, profile_id, university_id, match_score, created_at) VALUES (1, 1, 1, ?, '')",
+        [(50.0,), (75.0,)])
+    db.conn.commit()
+    db.close()
+
+    db = UniversityDatabase(path)
+    assert [r["match_score"] for r in db.get_saved_recommendations(1)] == [75.0]
+    assert db.save_recommendation(1, 1, 1, 80.0)
+    assert [r["match_score"] for r in db.get_saved_recommendations(1, 1)] == [80.0]
+    db.close()
+
+
+def test_save_recommendations_bulk_upserts(tmp_path):
+    db = UniversityDatabase(str(tmp_path / "universities.db"))
+    db.insert_sample_data()
+    ids = [u["id"] for u in db.get_all_universities()[:3]]
+
+    assert db.save_recommendations_bulk(1, 1, [{"university_id": i, "match_score": 50.0} for i in ids])
+    changes = db.conn.total_changes
+    assert db.save_recommendations_bulk(1, 1, [
+        {"university_id": ids[0], "match_score": 90.0, "notes": "first choice"},
+        {"university_id": ids[1], "match_score": 60.0}
+    ])
+    assert db.conn.total_changes - changes == 2
+
+    saved = db.get_saved_recommendations(1, 1)
+    assert [(r["university_id"], r["match_score"], r["notes"]) for r in saved] == \
+        [(ids[0], 90.0, "first choice"), (ids[1], 60.0, None), (ids[2], 50.0, None)]
+    db.close()
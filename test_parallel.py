@@ -0,0 +1,51 @@
+import pytest
+import numpy as np
+from matcher import UniversityMatcher
+from test_vectorized import PROFILES, EXTRA_UNIVERSITIES
+
+
+@pytest.fixture
+def matcher(db):
+    matcher = UniversityMatcher(db, engine="vectorized")
+    yield matcher
+    matcher.set_parallel(0)
+
+
+def test_parallel_scoring_matches_in_process(matcher):
+    universities = matcher.db.get_all_universities() + EXTRA_UNIVERSITIES
+    expected = [(matcher.get_recommendations(profile, top_n=15), matcher.match_universities(profile, universities))
+                for profile in PROFILES]
+
+    matcher.set_parallel(3, min_universities=1)
+    for profile, (recommendations, matches) in zip(PROFILES, expected):
+        assert matcher.get_recommendations(profile, top_n=15) == recommendations
+        assert matcher.match_universities(profile, universities) == matches
+
+    # The catalog is published once and reused across calls
+    assert len(matcher.parallel_scorer._published) <= 2
+
+
+def test_small_catalogs_are_scored_in_process(matcher):
+    matcher.set_parallel(2)
+    matcher.get_recommendations(PROFILES[0])
+
+    assert matcher.parallel_scorer._pool is None
+
+
+def test_filtered_subsets_reuse_the_published_catalog(matcher):
+    features = matcher.catalog.features
+    rates = matcher.get_acceptance_rate_array(features)
+    subsets = [np.arange(0, features.size, 2), np.arange(features.size - 1, 0, -3), np.array([3, 1])]
+    expected = [matcher.vectorized_scorer.component_scores(PROFILES[0], features.take(rows), rates[rows])
+                for rows in subsets]
+
+    matcher.set_parallel(3, min_universities=1)
+    scorer = matcher.parallel_scorer
+    for rows, local in zip(subsets, expected):
+        # Subsets of subsets are scored against the catalog too
+        subset = features.take(np.arange(features.size)).take(rows)
+        scores = scorer.component_scores(PROFILES[0], subset, rates[rows])
+        for component, values in local.items():
+            np.testing.assert_allclose(scores[component], values)
+
+    assert [entry[0] for entry in scorer._published.values()] == [features]
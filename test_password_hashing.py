@@ -0,0 +1,98 @@
+import hashlib
+import threading
+import pytest
+from password_hashing import PasswordHasher, PasswordHasherBusy
+
+
+@pytest.fixture
+def db(make_db, monkeypatch):
+    monkeypatch.setenv("PASSWORD_HASH_ITERATIONS", "1000")
+    return make_db(sample_data=False)
+
+
+def test_hashes_match_pbkdf2_and_are_measured():
+    hasher = PasswordHasher(iterations=1000, workers=2)
+    try:
+        assert hasher.hash("password123", "salt") == \
+            hashlib.pbkdf2_hmac('sha256', b"password123", b"salt", 1000).hex()
+        assert hasher.hash("password123", "salt", 2000) == \
+            hashlib.pbkdf2_hmac('sha256', b"password123", b"salt", 2000).hex()
+        stats = hasher.stats()
+        assert (stats["calls"], stats["rejected"], stats["in_flight"]) == (2, 0, 0)
+        assert 0 < stats["p50_ms"] <= stats["max_ms"]
+    finally:
+        hasher.close()
+
+
+def test_calls_beyond_the_queue_limit_are_rejected(monkeypatch):
+    release = threading.Event()
+    pbkdf2_hmac = hashlib.pbkdf2_hmac
+    monkeypatch.setattr(hashlib, "pbkdf2_hmac", lambda *args: (release.wait(), pbkdf2_hmac(*args))[1])
+    hasher = PasswordHasher(iterations=1000, workers=1, max_queue=1)
+
+    # One call runs and one waits in the queue; the next one is rejected
+    calls = [threading.Thread(target=hasher.hash, args=("password123", "salt")) for _ in range(2)]
+    for call in calls:
+        call.start()
+    while hasher.stats()["in_flight"] < 2:
+        pass
+    try:
+        with pytest.raises(PasswordHasherBusy):
+            hasher.hash("password123", "salt")
+        assert hasher.stats()["rejected"] == 1
+    finally:
+        release.set()
+        for call in calls:
+            call.join()
+        hasher.close()
+    assert (hasher.stats()["calls"], hasher.stats()["in_flight"]) == (2, 0)
+
+
+def test_iterations_are_stored_per_user_and_upgraded_on_login(db):
+    assert db.register_user("hash_user", "hash@example.com", "password123")
+    stored = db.conn.execute("SELECT password_hash, password_iterations FROM users WHERE username = 'hash_user'").fetchone()
+    assert stored[1] == 1000
+
+    # Raising the cost keeps existing users able to log in, and rehashes them at the new cost
+    db.password_hasher.iterations = 2000
+    assert db.authenticate_user("hash_user", "password123")["username"] == "hash_user"
+    upgraded = db.conn.execute("SELECT password_hash, password_iterations FROM users WHERE username = 'hash_user'").fetchone()
+    assert upgraded[1] == 2000 and upgraded[0] != stored[0]
+    assert db.authenticate_user("hash_user", "password123")
+    assert db.authenticate_user("hash_user", "wrong password") is None
+
+
+def test_busy_pool_is_not_reported_as_bad_credentials(db):
+    assert db.register_user("busy_user", "busy@example.com", "password123")
+    db.password_hasher.close()
+    db.password_hasher = PasswordHasher(iterations=1000, workers=1, max_queue=0)
+    db.password_hasher._slots.acquire()
+
+    with pytest.raises(PasswordHasherBusy):
+        db.authenticate_user("busy_user", "password123")
+    with pytest.raises(PasswordHasherBusy):
+        db.register_user("busy_user2", "busy2@example.com", "password123")
+
+    db.password_hasher._slots.release()
+    assert db.authenticate_user("busy_user", "password123")
+
+
+def test_busy_pool_during_rehash_keeps_the_old_hash(db, monkeypatch):
+    assert db.register_user("rehash_user", "rehash@example.com", "password123")
+    stored = db.conn.execute("SELECT password_hash, salt, password_iterations FROM users WHERE username = 'rehash_user'").fetchone()
+
+    # The password is verified, then the pool fills up before the rehash
+    hashes = []
+    hash_password = db.password_hasher.hash
+
+    def hash_then_busy(*args):
+        if hashes:
+            raise PasswordHasherBusy("Too many password hashes in progress")
+        hashes.append(args)
+        return hash_password(*args)
+
+    monkeypatch.setattr(db.password_hasher, "hash", hash_then_busy)
+    db.password_hasher.iterations = 2000
+    assert db.authenticate_user("rehash_user", "password123")["username"] == "rehash_user"
+    assert db.conn.execute("SELECT password_hash, salt, password_iterations FROM users WHERE username = 'rehash_user'").fetchone() == stored
+    assert db.conn.execute("SELECT last_login FROM users WHERE username = 'rehash_user'").fetchone()[0]
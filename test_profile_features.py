@@ -0,0 +1,34 @@
+import pytest
+from profile_features import compile_profile
+from test_vectorized import PROFILES
+
+
+def test_compiled_profile_is_hashable_and_canonical():
+    profile = dict(PROFILES[0])
+    reordered = dict(reversed(list(profile.items())))
+
+    compiled = compile_profile(profile)
+    assert compile_profile(reordered) == compiled
+    assert hash(compile_profile(reordered)) == hash(compiled)
+    assert compile_profile(compiled) is compiled
+    assert compiled.to_dict() == profile
+    assert compiled.locations == ("california", "cambridge, ma")
+
+
+@pytest.mark.parametrize("engine", ["scalar", "vectorized"])
+@pytest.mark.parametrize("profile", PROFILES)
+def test_compiled_profile_scores_like_dict(matcher, engine, profile):
+    matcher.set_engine(engine)
+    compiled = compile_profile(profile)
+
+    assert matcher.get_recommendations(compiled, top_n=10) == matcher.get_recommendations(profile, top_n=10)
+    assert matcher.match_universities(compiled) == matcher.match_universities(profile)
+
+
+def test_deepseek_fallback_accepts_compiled_profile(matcher):
+    matcher.deepseek_api_key = ""
+    university = matcher.catalog.records[0]
+    compiled = compile_profile(PROFILES[1])
+
+    assert matcher.calculate_match_score_with_deepseek(compiled, university) == \
+        matcher.calculate_match_score(PROFILES[1], university)
@@ -0,0 +1,105 @@
+import sqlite3
+import threading
+import pytest
+from db import UniversityDatabase, REPLICA_TABLES
+from catalog import UniversityCatalog
+from matcher import UniversityMatcher
+
+
+@pytest.fixture
+def db(make_db):
+    return make_db(read_replica=True)
+
+
+def test_replica_serves_catalog_reads(db, university_with_applications):
+    assert db.read_conn is not db.conn
+    assert len(db.get_all_universities()) == db.conn.execute("SELECT COUNT(*) FROM universities").fetchone()[0]
+    assert db.get_university_applications(university_with_applications)
+
+    # Only the catalog tables are copied, and the copy is read-only
+    with pytest.raises(sqlite3.OperationalError):
+        db.read_conn.execute("SELECT * FROM users")
+    with pytest.raises(sqlite3.OperationalError):
+        db.read_conn.execute("DELETE FROM universities")
+
+
+def test_replica_holds_only_catalog_schema(db):
+    db.conn.execute("CREATE TABLE bulk (payload BLOB)")
+    db.conn.executemany("INSERT INTO bulk VALUES (randomblob(10000))", [()] * 500)
+    db.conn.commit()
+    db.refresh_replica()
+
+    objects = db.read_conn.execute("SELECT type, name FROM sqlite_master WHERE name NOT LIKE 'sqlite_%'").fetchall()
+    assert {name for kind, name in objects if kind == "table"} == set(REPLICA_TABLES)
+    assert ("index", "idx_applications_applicant_university_program") in objects
+    assert not [name for kind, name in objects if kind == "trigger"]
+    # No pages are spent on tables that are not replicated
+    assert db.read_conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+    assert db.read_conn.execute("PRAGMA page_count").fetchone()[0] * 10 < db.conn.execute("PRAGMA page_count").fetchone()[0]
+
+
+def test_threads_read_through_their_own_replica_connections(db):
+    def read():
+        result.update(conn=db.read_conn, universities=len(db.get_all_universities()))
+
+    result = {}
+    thread = threading.Thread(target=read)
+    thread.start()
+    thread.join()
+    assert result["conn"] is not db.read_conn
+    assert result["universities"] == len(db.get_all_universities())
+
+    # After a refresh, the connections of finished threads are closed
+    db.refresh_replica()
+    db.read_conn
+    with pytest.raises(sqlite3.ProgrammingError):
+        result["conn"].execute("SELECT 1")
+
+
+def test_replica_refreshes_after_catalog_writes(db):
+    catalog = UniversityCatalog(db)
+    first = db.get_all_universities()[0]
+    db.conn.execute("UPDATE universities SET tuition_fee = 1234 WHERE id = ?", (first["id"],))
+    db.conn.commit()
+    assert db.get_university(first["id"])["tuition_fee"] == first["tuition_fee"]
+
+    db.refresh_replica()
+    assert db.get_university(first["id"])["tuition_fee"] == 1234
+    assert catalog.get(first["id"])["tuition_fee"] == 1234
+
+    # Reseeding refreshes the replica by itself
+    db.insert_sample_data(force=True)
+    assert db.get_university(first["id"]) is None
+
+
+def test_user_writes_leave_replica_untouched(db):
+    replica = db.read_conn
+    db.register_user("replica_user", "replica@example.com", "password123")
+    assert db.read_conn is replica
+
+    recommendations = UniversityMatcher(db).get_recommendations({"gpa": 3.5, "budget": 40000}, top_n=3)
+    assert len(recommendations) == 3
+
+
+def test_acceptance_rate_cache_ignores_stale_replica(tmp_path, db):
+    matcher = UniversityMatcher(db)
+    university_id = 1
+    before = matcher.get_accurate_acceptance_rate(university_id)
+
+    # Applications written behind the replica's back still count towards the cached rate
+    db.conn.executemany(
+        "INSERT INTO applications (applicant_id, university_id, program, status, submission_date) "
+        "VALUES (?, ?, 'Engineering', 'admitted', '2024-01-01')",
+        [(f"replica_applicant_{i}", university_id) for i in range(2000)])
+    db.conn.commit()
+    calculator = matcher.admission_calculator
+    calculator.load_applications(db.get_university_applications(university_id, use_replica=False))
+    expected = matcher._validate_acceptance_rate(calculator.calculate_admission_rate()[0])
+
+    assert expected != before
+    assert matcher.get_accurate_acceptance_rate(university_id) == expected
+    db.refresh_replica()
+    assert matcher.get_accurate_acceptance_rate(university_id) == expected
+    reopened = UniversityDatabase(str(tmp_path / "universities.db"), read_replica=True)
+    assert UniversityMatcher(reopened).get_accurate_acceptance_rate(university_id) == expected
+    reopened.close()
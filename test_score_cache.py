@@ -0,0 +1,106 @@
+from db import UniversityDatabase
+from matcher import UniversityMatcher
+from score_cache import ScoreCache
+from test_vectorized import PROFILES
+
+
+class CountingClient:
+    """Deepseek client stand-in that counts the universities it is asked to score"""
+
+    def __init__(self):
+        self.scored = 0
+
+    def score_many(self, user_profile, universities):
+        self.scored += len(universities)
+        return [len(university["name"]) / 100 for university in universities]
+
+
+def deepseek_matcher(db, score_cache):
+    matcher = UniversityMatcher(db, score_cache=score_cache)
+    matcher.use_deepseek = True
+    matcher.deepseek_api_key = "key"
+    client = CountingClient()
+    matcher._deepseek_client = lambda: client
+    return matcher, client
+
+
+def test_repeated_requests_are_served_from_cache(db, tmp_path):
+    matcher, client = deepseek_matcher(db, ScoreCache(db))
+    first = matcher.get_recommendations(PROFILES[0], top_n=5)
+    scored = client.scored
+    assert scored > 0
+
+    # Same profile with its keys in another order, from a new connection to the same file
+    reopened = UniversityDatabase(str(tmp_path / "universities.db"))
+    cache = ScoreCache(reopened)
+    matcher, client = deepseek_matcher(reopened, cache)
+    assert matcher.get_recommendations(dict(reversed(list(PROFILES[0].items()))), top_n=5) == first
+    assert client.scored == 0
+    assert cache.stats()["hits"] == scored and cache.stats()["misses"] == 0
+    reopened.close()
+
+
+def test_changed_university_row_is_a_miss(db):
+    cache = ScoreCache(db)
+    matcher, client = deepseek_matcher(db, cache)
+    matcher.match_universities(PROFILES[1])
+    client.scored = 0
+
+    db.conn.execute("UPDATE universities SET tuition_fee = tuition_fee + 1 WHERE id = 1")
+    db.conn.commit()
+    matcher.match_universities(PROFILES[1])
+    assert client.scored == 1
+
+
+def test_entries_expire_and_least_recently_used_are_evicted(db):
+    now = [1000.0]
+    cache = ScoreCache(db, max_entries=3, ttl=60, clock=lambda: now[0], touch_interval=0)
+    universities = db.get_all_universities()[:4]
+
+    cache.put_many(PROFILES[0], universities[:3], [0.1, 0.2, 0.3])
+    now[0] += 1
+    assert len(cache.get_many(PROFILES[0], universities[:1])) == 1  # Most recently used
+    now[0] += 1
+    cache.put_many(PROFILES[0], universities[3:], [0.4])
+
+    cached = cache.get_many(PROFILES[0], universities)
+    assert sorted(cached.values()) == [0.1, 0.3, 0.4]
+    assert cache.stats()["entries"] == 3
+
+    now[0] += 61
+    assert cache.get_many(PROFILES[0], universities) == {}
+    cache.put_many(PROFILES[1], universities[:2], [None, 0.5])
+    assert cache.stats()["entries"] == 1
+
+
+def test_hits_touch_entries_once_per_interval(db, monkeypatch):
+    now = [1000.0]
+    cache = ScoreCache(db, ttl=600, clock=lambda: now[0], touch_interval=60)
+    universities = db.get_all_universities()[:3]
+    cache.put_many(PROFILES[0], universities, [0.1, 0.2, 0.3])
+
+    touched = []
+    touch = db.touch_cached_match_scores
+    monkeypatch.setattr(db, "touch_cached_match_scores",
+                        lambda *args: touched.append(len(args[1])) or touch(*args))
+    for _ in range(5):
+        now[0] += 10
+        assert len(cache.get_many(PROFILES[0], universities)) == 3
+    assert touched == []
+
+    now[0] += 20
+    cache.get_many(PROFILES[0], universities)
+    cache.get_many(PROFILES[0], universities)
+    assert touched == [3]
+
+
+def test_entry_count_is_kept_without_counting(db):
+    cache = ScoreCache(db, max_entries=2)
+    universities = db.get_all_universities()[:3]
+    cache.put_many(PROFILES[0], universities[:2], [0.1, 0.2])
+    cache.put_many(PROFILES[0], universities[:2], [0.3, 0.4])  # Replaced, not added
+    assert cache.stats()["entries"] == 2
+    cache.put_many(PROFILES[1], universities, [0.5, 0.6, 0.7])
+    assert cache.stats()["entries"] == 2 == db.conn.execute("SELECT COUNT(*) FROM match_score_cache").fetchone()[0]
+    cache.clear()
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,18 @@
+from scoring_plan import scoring_plan
+
+
+def test_scoring_plan_skips_zero_weights():
+    plan = scoring_plan({"campus": 0.0, "academic": 0.6, "career": 0.4, "location": 0})
+
+    assert plan.active == ("academic", "career")
+    assert plan.skipped == ("financial", "location", "campus")
+
+
+def test_scoring_plan_default_weight():
+    assert scoring_plan({"campus": 0}, default_weight=0.2).skipped == ("campus",)
+    assert scoring_plan({"campus": 0}).active == ()
+
+
+def test_scoring_plan_cached_per_weight_vector():
+    weights = {"academic": 0.5, "financial": 0.5}
+    assert scoring_plan(weights) is scoring_plan(dict(reversed(list(weights.items()))))
@@ -0,0 +1,208 @@
+import tracemalloc
+import pytest
+import numpy as np
+from vectorized import top_k_indices, sigmoid_match_scores
+
+PROFILES = [
+    {
+        "gpa": 3.8,
+        "sat_score": 1400,
+        "preferred_majors": ["Computer Science", "Engineering"],
+        "budget": 40000,
+        "preferred_locations": ["California", "Cambridge, MA"],
+        "preferred_environment": "Urban"
+    },
+    {
+        "gpa": 3.2,
+        "sat_score": 1150,
+        "preferred_majors": "Business, Fine Arts, political science",
+        "budget": 0,
+        "preferred_locations": "Atlanta, GA, London",
+        "preferred_environment": "College town",
+        "preferred_region": "South",
+        "preferred_country": "USA",
+        "preferred_size": "Large (15,000-30,000 students)",
+        "preferred_university_type": "Public Research",
+        "preferred_religious_affiliation": "None"
+    },
+    {
+        "preferred_majors": [],
+        "budget": 25000,
+        "preferred_religious_affiliation": "Catholic"
+    },
+]
+
+# Hand-made rows exercising missing values and rows without an ID
+EXTRA_UNIVERSITIES = [
+    {"name": "No ID University", "acceptance_rate": None, "tuition_fee": None, "academic_rank": 1200,
+     "location": "Boston, MA", "environment": "Suburban", "major_strengths": "Engineering,,Robotics"},
+    {"id": 9999, "name": "Unknown ID University", "acceptance_rate": 0.3, "academic_rank": 0,
+     "location": "Paris, France", "major_strengths": None, "diversity_score": None},
+]
+
+
+def _match(matcher, engine, profile, universities):
+    matcher.set_engine(engine)
+    return matcher.match_universities(profile, [dict(u) for u in universities])
+
+
+@pytest.mark.parametrize("profile", PROFILES)
+def test_match_universities_matches_scalar(matcher, profile):
+    universities = matcher.db.get_all_universities() + EXTRA_UNIVERSITIES
+    matcher.set_weights({"academic": 3, "financial": 2, "location": 2, "career": 2, "campus": 1})
+
+    scalar = _match(matcher, "scalar", profile, universities)
+    vectorized = _match(matcher, "vectorized", profile, universities)
+
+    assert len(scalar) == len(vectorized)
+    for expected, actual in zip(scalar, vectorized):
+        assert actual["name"] == expected["name"]
+        assert actual["match_score"] == pytest.approx(expected["match_score"], abs=0.11)
+        for component, score in expected["component_scores"].items():
+            assert actual["component_scores"][component] == pytest.approx(score, abs=0.11)
+        assert actual.get("accurate_acceptance_rate") == pytest.approx(expected.get("accurate_acceptance_rate"))
+
+
+@pytest.mark.parametrize("profile", PROFILES)
+def test_get_recommendations_matches_scalar(matcher, profile):
+    matcher.set_engine("scalar")
+    scalar = matcher.get_recommendations(profile, top_n=10)
+    matcher.set_engine("vectorized")
+    vectorized = matcher.get_recommendations(profile, top_n=10)
+
+    assert [u["name"] for u in vectorized] == [u["name"] for u in scalar]
+    for expected, actual in zip(scalar, vectorized):
+        assert actual["match_score"] == pytest.approx(expected["match_score"], abs=0.11)
+        assert actual["component_scores"] == pytest.approx(expected["component_scores"], abs=0.11)
+
+
+def test_unknown_engine_is_rejected(matcher):
+    with pytest.raises(ValueError):
+        matcher.set_engine("gpu")
+
+
+@pytest.mark.parametrize("k", [0, 1, 3, 7, 20])
+def test_top_k_indices_matches_stable_sort(k):
+    scores = np.array([0.5, 0.9, np.nan, 0.5, 0.9, 0.1, 0.5, 1.0, np.nan, 0.5])
+    valid = np.flatnonzero(~np.isnan(scores))
+    expected = valid[np.argsort(-scores[valid], kind="stable")][:k]
+
+    assert top_k_indices(scores, k).tolist() == expected.tolist()
+
+
+@pytest.mark.parametrize("engine", ["scalar", "vectorized"])
+def test_get_recommendations_top_n_is_prefix_of_full_ranking(matcher, engine):
+    matcher.set_engine(engine)
+    full = matcher.get_recommendations(PROFILES[0], top_n=100)
+
+    assert len(full) == len(matcher.catalog)
+    assert matcher.get_recommendations(PROFILES[0], top_n=3) == full[:3]
+
+
+def test_match_many_matches_per_profile_path(matcher):
+    matcher.set_engine("vectorized")
+    universities = matcher.db.get_all_universities() + EXTRA_UNIVERSITIES
+    profiles = PROFILES + [PROFILES[0]]
+
+    result = matcher.match_many(profiles, universities, top_k=5)
+
+    assert result.scores.shape == (len(profiles), len(universities))
+    for row, profile in enumerate(profiles):
+        expected = matcher.match_universities(profile, universities)
+        assert [round(score * 100, 1) for score in result.scores[row].tolist()] == [u["match_score"] for u in expected]
+
+        ranked = np.argsort(-result.scores[row], kind="stable")[:5]
+        assert result.top_indices[row].tolist() == ranked.tolist()
+        assert result.top_scores[row].tolist() == result.scores[row][ranked].tolist()
+
+
+def test_match_many_chunks_give_same_result(matcher):
+    whole = matcher.match_many(PROFILES, top_k=4)
+    chunked = matcher.match_many(PROFILES, top_k=4, memory_budget=3 * 512,
+                                 out=np.zeros((len(PROFILES), len(matcher.catalog)), dtype=np.float32))
+
+    assert np.allclose(chunked.scores, whole.scores)
+    assert chunked.top_indices.tolist() == whole.top_indices.tolist()
+
+
+def test_match_many_refuses_oversized_score_matrix(matcher):
+    shape = (len(PROFILES), len(matcher.catalog))
+    with pytest.raises(ValueError):
+        matcher.match_many(PROFILES, memory_budget=shape[0] * shape[1] * 8 - 1)
+
+    out = np.zeros(shape, dtype=np.float32)
+    assert matcher.match_many(PROFILES, memory_budget=1024, out=out).scores is out
+
+
+def test_match_many_memory_stays_within_budget(matcher):
+    # Grow the catalog to 24,000+ universities
+    columns = ", ".join(row[1] for row in matcher.db.conn.execute("PRAGMA table_info(universities)") if row[1] != "id")
+    for _ in range(8):
+        matcher.db.conn.execute(f"INSERT INTO universities ({columns}) SELECT {columns} FROM universities")
+    matcher.db.conn.commit()
+    size = len(matcher.catalog)
+    out = np.zeros((len(PROFILES), size))
+
+    def peak(memory_budget):
+        matcher.match_many(PROFILES, out=out, memory_budget=memory_budget)  # Warm the catalog and rate caches
+        tracemalloc.start()
+        try:
+            matcher.match_many(PROFILES, out=out, memory_budget=memory_budget)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    # Besides the chunk, only a few arrays of one value per university are allocated
+    budget = 64 * 1024
+    assert peak(budget) < budget + 64 * size < peak(size * 1024)
+
+
+@pytest.mark.parametrize("engine", ["scalar", "vectorized"])
+def test_strict_budget_prefilters_by_tuition(matcher, engine):
+    matcher.set_engine(engine)
+    profile = dict(PROFILES[0], budget=30000, strict_budget=True)
+    affordable = [u for u in matcher.db.get_all_universities()
+                  if u["tuition_fee"] is not None and u["tuition_fee"] <= 36000]
+
+    recommendations = matcher.get_recommendations(profile, top_n=1000)
+
+    assert sorted(u["id"] for u in recommendations) == sorted(u["id"] for u in affordable)
+
+
+@pytest.mark.parametrize("profile", PROFILES)
+def test_scalar_upper_bound_pruning_keeps_top_n(matcher, profile):
+    weights = {"academic": 0.5, "financial": 0.3, "location": 0.0, "career": 0.2, "campus": 0.0}
+    matcher.set_engine("vectorized")
+    expected = matcher.get_recommendations(profile, weights=weights, top_n=3)
+
+    matcher.set_engine("scalar")
+    pruned = matcher.get_recommendations(profile, weights=weights, top_n=3)
+    assert matcher.last_pruned > 0
+    assert [u["name"] for u in pruned] == [u["name"] for u in expected]
+    assert pruned == matcher.get_recommendations(profile, weights=weights, top_n=100)[:3]
+
+
+@pytest.mark.parametrize("engine", ["scalar", "vectorized"])
+def test_zero_weight_components_scored_for_results_only(matcher, monkeypatch, engine):
+    profile = PROFILES[0]
+    weights = {"academic": 0.5, "financial": 0.3, "location": 0.0, "career": 0.2, "campus": 0.0}
+    matcher.set_engine("vectorized")
+    features = matcher.catalog.features
+    components = matcher._vectorized().component_scores(profile, features, matcher.get_acceptance_rate_array(features))
+    rows = top_k_indices(sigmoid_match_scores(components, weights), 3)
+    scores = sigmoid_match_scores(components, weights)[rows]
+    components = {component: score[rows] for component, score in components.items()}
+    matcher.component_cache.clear()
+
+    calls = []
+    campus_match = matcher.calculate_campus_match
+    monkeypatch.setattr(matcher, "calculate_campus_match", lambda *args: calls.append(1) or campus_match(*args))
+    matcher.set_engine(engine)
+    recommendations = matcher.get_recommendations(profile, weights=weights, top_n=3)
+
+    assert [u["name"] for u in recommendations] == [matcher.catalog.records[row]["name"] for row in rows]
+    assert [u["match_score"] for u in recommendations] == [round(float(s) * 100, 1) for s in scores]
+    assert [u["component_scores"]["campus"] for u in recommendations] == \
+        [round(min(max(float(s) / 100, 0), 1) * 100, 1) for s in components["campus"]]
+    if engine == "scalar":
+        assert len(calls) == 3
@@ -0,0 +1,446 @@
+from typing import List, Dict, Optional, Sequence
+import math
+import numpy as np
+from indexes import MajorIndex, LocationIndex
+from profile_features import ProfileFeatures, compile_profile
+
+# Order of the component score arrays produced by VectorizedScorer
+COMPONENTS = ("academic", "financial", "location", "career", "campus")
+
+# Categorical university columns that are dictionary-encoded into integer codes
+CATEGORICAL_COLUMNS = ("location", "environment", "region", "country",
+                       "campus_size", "university_type", "religious_affiliation")
+
+# Per-row arrays of UniversityFeatures besides the categorical codes and the major index
+ROW_ARRAYS = ("has_id", "ids", "acceptance_rate", "tuition", "scholarship",
+              "job_placement", "diversity", "rank_match")
+
+# University columns read by the scoring engine
+FEATURE_COLUMNS = ("id", "acceptance_rate", "tuition_fee", "academic_rank", "scholarship_percent",
+                   "job_placement", "diversity_score", "major_strengths") + CATEGORICAL_COLUMNS
+
+
+def _numeric_column(values: Sequence, default: float) -> np.ndarray:
+    """Converts a column to float64, replacing None/NaN with the scalar matcher's default"""
+    if isinstance(values, np.ndarray):
+        column = values.astype(np.float64)
+    else:
+        column = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    column[np.isnan(column)] = default
+    return column
+
+
+def _encode_column(values: Sequence):
+    """Dictionary-encodes a column, returning (codes, categories)"""
+    lookup = {}
+    codes = np.empty(len(values), dtype=np.int32)
+    for i, value in enumerate(values):
+        code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(lookup)
+        codes[i] = code
+    return codes, list(lookup)
+
+
+def _rank_match(ranks: Sequence) -> np.ndarray:
+    """Vectorized version of the rank scaling in calculate_academic_match"""
+    rank = np.array([r if isinstance(r, (int, float)) else np.nan for r in ranks], dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        log_scaled = 1 - (np.log10(np.clip(rank, 1, 200)) / math.log10(200))
+        points_based = np.minimum(rank / 1500, 1.0)
+        rank_match = np.where(rank > 1000, points_based, log_scaled)
+    # Missing or invalid ranks default to the median
+    return np.where(np.isnan(rank) | (rank <= 0), 0.5, rank_match)
+
+
+def validate_acceptance_rates(rates: np.ndarray) -> np.ndarray:
+    """
+    Vectorized version of UniversityMatcher._validate_acceptance_rate
+
+    Args:
+        rates: Raw acceptance rates as percentages, with NaN for missing values
+
+    Returns:
+        Adjusted acceptance rates
+    """
+    rates = np.array(rates, dtype=np.float64)
+    missing = np.isnan(rates)
+
+    # Decimal errors (e.g. 0.35 instead of 35%)
+    decimal = (rates < 1.0) & (rates > 0)
+    rates[decimal] *= 100
+
+    # Inverted percentages (e.g. selectivity instead of acceptance)
+    inverted = rates > 95
+    rates[inverted] = 100 - rates[inverted]
+
+    rates = np.clip(rates, 1.0, 95.0)
+    rates[missing] = 50.0
+    return rates
+
+
+class UniversityFeatures:
+    """
+    Column arrays for a set of universities, encoded once so that a whole
+    catalog can be scored with NumPy operations instead of per-row dict lookups
+    """
+
+    # Features a subset was taken from, and its rows there (None unless made by take())
+    parent = None
+    parent_rows = None
+
+    def __init__(self, columns: Dict[str, Sequence]):
+        """
+        Args:
+            columns: Dictionary mapping column names (see FEATURE_COLUMNS) to
+                equally sized sequences. Missing columns are treated as all None.
+        """
+        self.size = len(next(iter(columns.values()))) if columns else 0
+
+        def column(name):
+            return columns[name] if name in columns else [None] * self.size
+
+        ids = column("id")
+        self.has_id = np.array([uid is not None for uid in ids], dtype=bool)
+        self.ids = np.array([-1 if uid is None else uid for uid in ids], dtype=np.int64)
+
+        # Numeric columns with the same None defaults as the scalar matcher
+        self.acceptance_rate = _numeric_column(column("acceptance_rate"), 50.0)
+        self.tuition = _numeric_column(column("tuition_fee"), 0)
+        self.scholarship = _numeric_column(column("scholarship_percent"), 0)
+        self.job_placement = _numeric_column(column("job_placement"), 80)
+        self.diversity = _numeric_column(column("diversity_score"), 0.7)
+        self.rank_match = _rank_match(column("academic_rank"))
+
+        # Categorical columns
+        self.codes = {}
+        self.categories = {}
+        for name in CATEGORICAL_COLUMNS:
+            self.codes[name], self.categories[name] = _encode_column(column(name))
+
+        self.majors = MajorIndex(column("major_strengths"))
+        self._locations = None
+
+    @classmethod
+    def from_records(cls, universities: List[Dict]) -> "UniversityFeatures":
+        """Builds the column arrays from a list of university dictionaries"""
+        return cls({name: [uni.get(name) for uni in universities] for name in FEATURE_COLUMNS})
+
+    def take(self, rows: Sequence[int]) -> "UniversityFeatures":
+        """
+        Select a subset of rows without re-encoding the columns
+
+        Args:
+            rows: Distinct row positions to keep, in the desired order
+
+        Returns:
+            A UniversityFeatures object for the selected rows
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        subset = object.__new__(UniversityFeatures)
+        subset.size = len(rows)
+        for name in ROW_ARRAYS:
+            setattr(subset, name, getattr(self, name)[rows])
+        subset.codes = {name: codes[rows] for name, codes in self.codes.items()}
+        subset.categories = self.categories
+        subset.majors = self.majors.take(rows)
+        subset._locations = self._locations
+        if self.parent is not None:
+            subset.parent, subset.parent_rows = self.parent, self.parent_rows[rows]
+        else:
+            subset.parent, subset.parent_rows = self, rows
+        return subset
+
+    def slice(self, start: int, stop: int) -> "UniversityFeatures":
+        """
+        Select the contiguous rows start:stop; the row arrays are views, not copies
+
+        Args:
+            start: First row to keep
+            stop: Row after the last one to keep
+
+        Returns:
+            A UniversityFeatures object for the selected rows, like take(range(start, stop))
+        """
+        subset = object.__new__(UniversityFeatures)
+        subset.size = stop - start
+        for name in ROW_ARRAYS:
+            setattr(subset, name, getattr(self, name)[start:stop])
+        subset.codes = {name: codes[start:stop] for name, codes in self.codes.items()}
+        subset.categories = self.categories
+        subset.majors = self.majors.slice(start, stop)
+        subset._locations = self._locations
+        if self.parent is not None:
+            subset.parent, subset.parent_rows = self.parent, self.parent_rows[start:stop]
+        else:
+            subset.parent, subset.parent_rows = self, np.arange(start, stop)
+        return subset
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """
+        The arrays backing the features, by name: ROW_ARRAYS, "codes:<column>"
+        for categorical codes and "majors:<name>" for the major index
+        """
+        arrays = {name: getattr(self, name) for name in ROW_ARRAYS}
+        arrays.update({f"codes:{name}": codes for name, codes in self.codes.items()})
+        arrays.update({f"majors:{name}": array for name, array in self.majors.postings_arrays().items()})
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, size: int, arrays: Dict[str, np.ndarray], categories: Dict[str, List],
+                    vocab: List[str], raw_entries: Dict[str, int]) -> "UniversityFeatures":
+        """Rebuilds features around existing arrays (see arrays()) without copying them"""
+        features = object.__new__(cls)
+        features.size = size
+        for name in ROW_ARRAYS:
+            setattr(features, name, arrays[name])
+        features.codes = {name: arrays[f"codes:{name}"] for name in CATEGORICAL_COLUMNS}
+        features.categories = categories
+        features.majors = MajorIndex.from_postings(
+            size, arrays["majors:has_majors"], vocab, raw_entries, arrays["majors:posting_rows"],
+            arrays["majors:posting_counts"], arrays["majors:offsets"])
+        features._locations = None
+        return features
+
+    @property
+    def locations(self) -> LocationIndex:
+        """Index over the distinct values of the location column, built on first use"""
+        if self._locations is None:
+            self._locations = LocationIndex(self.categories["location"])
+        return self._locations
+
+    def category_values(self, column: str, func, dtype=np.float64) -> np.ndarray:
+        """Evaluates func once per distinct value of a categorical column and broadcasts it to rows"""
+        table = np.array([func(value) for value in self.categories[column]], dtype=dtype)
+        if not len(table):
+            return np.zeros(self.size, dtype=dtype)
+        return table[self.codes[column]]
+
+
+def _affordability(cost: np.ndarray, budget: float) -> np.ndarray:
+    """Vectorized affordability curve shared by both terms of calculate_financial_match"""
+    if budget > 0:
+        under = np.minimum(1.0, 0.9 + np.maximum(0, (budget - cost) / budget) * 0.1)
+        with np.errstate(over="ignore"):
+            over = np.maximum(0, 0.9 * np.exp(-2 * ((cost - budget) / budget)))
+    else:
+        under = np.full(cost.shape, 0.9)
+        over = np.full(cost.shape, 0.9 * math.exp(-2 * 1.0))
+    return np.where(cost <= budget, under, over)
+
+
+class VectorizedScorer:
+    """
+    Scores every university in a UniversityFeatures object for one profile at once.
+    Component scores use the same scales as the scalar calculate_*_match methods
+    (location and campus in 0-100, the others in 0-1).
+    """
+
+    def component_scores(self, user_profile: Dict, features: UniversityFeatures,
+                         acceptance_rates: Optional[np.ndarray] = None,
+                         components=COMPONENTS) -> Dict[str, np.ndarray]:
+        """
+        Calculate component scores for all universities
+
+        Args:
+            user_profile: Dictionary with user preferences, or compiled ProfileFeatures
+            features: Encoded university columns
+            acceptance_rates: Acceptance rate per university used for the selectivity
+                match; defaults to the stored acceptance_rate column
+            components: Components to calculate (defaults to all five)
+
+        Returns:
+            Dictionary mapping component names to score arrays
+        """
+        profile = compile_profile(user_profile)
+        if acceptance_rates is None:
+            acceptance_rates = features.acceptance_rate
+        scorers = {
+            "academic": lambda: self.academic_scores(profile, features, acceptance_rates),
+            "financial": lambda: self.financial_scores(profile, features),
+            "location": lambda: self.location_scores(profile, features),
+            "career": lambda: self.career_scores(profile, features),
+            "campus": lambda: self.campus_scores(profile, features)
+        }
+        return {component: scorers[component]() for component in components}
+
+    def academic_scores(self, profile: ProfileFeatures, features: UniversityFeatures,
+                        acceptance_rates: np.ndarray) -> np.ndarray:
+        """Vectorized calculate_academic_match"""
+        academic = np.zeros(features.size)
+
+        if profile.has_test_scores:
+            selectivity_differential = profile.academic_strength - (1 - (acceptance_rates / 100))
+            with np.errstate(over="ignore"):
+                admit_match = 1 / (1 + np.exp(-5 * (selectivity_differential + 0.1)))
+            academic = (features.rank_match * 0.55) + (admit_match * 0.45)
+
+        if profile.has_preferred_majors and features.majors.has_majors.any():
+            if profile.majors:
+                major_match = features.majors.academic_match_scores(profile.majors)
+                academic = np.where(features.majors.has_majors, (academic * 0.65) + (major_match * 0.35), academic)
+
+        return academic
+
+    def financial_scores(self, profile: ProfileFeatures, features: UniversityFeatures) -> np.ndarray:
+        """Vectorized calculate_financial_match"""
+        if not profile.has_budget:
+            return np.full(features.size, 0.5)
+
+        budget = profile.budget
+        affordability = _affordability(features.tuition, budget)
+        effective_tuition = features.tuition * (1 - (features.scholarship / 100) * 0.5)
+        scholarship_affordability = _affordability(effective_tuition, budget)
+
+        return (affordability * 0.6) + (scholarship_affordability * 0.4)
+
+    def location_scores(self, profile: ProfileFeatures, features: UniversityFeatures) -> np.ndarray:
+        """Vectorized calculate_location_match (0-100)"""
+        if not profile.locations:
+            return np.full(features.size, 70.0)
+
+        preferred_environment = profile.environment
+        preferred_region = profile.region
+        preferred_country = profile.country
+
+        # Country match
+        country_match = features.category_values(
+            "country", lambda country: bool(preferred_country and country and preferred_country == country), bool)
+        match_score = np.where(country_match, 25.0, 0.0)
+
+        # Regional match, with partial credit for the same country
+        if preferred_region:
+            has_region = features.category_values("region", bool, bool)
+            same_region = features.category_values("region", lambda region: region == preferred_region, bool)
+            match_score += np.where(has_region & same_region, 30, np.where(has_region & country_match, 15, 0))
+
+        # Location text match, falling back to city/state components
+        match_score += features.locations.text_points(profile.locations, profile.location_components)[
+            features.codes["location"]]
+
+        # Environment match
+        if preferred_environment:
+            def environment_match(uni_environment):
+                if not uni_environment:
+                    return 0
+                if profile.environment_lower == uni_environment.lower():
+                    return 20
+                if (("Urban" in preferred_environment and "Suburban" in uni_environment) or
+                        ("Suburban" in preferred_environment and "Urban" in uni_environment)):
+                    return 10
+                if (("Rural" in preferred_environment and "College town" in uni_environment) or
+                        ("College town" in preferred_environment and "Rural" in uni_environment)):
+                    return 10
+                return 0
+
+            match_score += features.category_values("environment", environment_match)
+
+        return np.minimum(100, match_score)
+
+    def career_scores(self, profile: ProfileFeatures, features: UniversityFeatures) -> np.ndarray:
+        """Vectorized calculate_career_prospects_match"""
+        job_placement_score = features.job_placement / 100
+
+        if profile.has_preferred_majors:
+            user_majors = profile.majors
+            major_matches = features.majors.career_match_counts(user_majors)
+            major_match_ratio = major_matches / max(len(user_majors), 1) if user_majors else 0
+
+            job_placement_score = np.where(features.majors.has_majors,
+                                           job_placement_score * (0.8 + 0.2 * major_match_ratio),
+                                           job_placement_score)
+
+        return np.minimum(job_placement_score, 1.0)
+
+    def campus_scores(self, profile: ProfileFeatures, features: UniversityFeatures) -> np.ndarray:
+        """Vectorized calculate_campus_match (0-100)"""
+        base_score = np.full(features.size, 70.0)
+
+        if profile.environment:
+            preferred_lower = profile.environment_lower
+
+            def environment_match(uni_environment):
+                if not uni_environment:
+                    return 0
+                if preferred_lower == uni_environment.lower():
+                    return 20
+                if preferred_lower in uni_environment.lower() or uni_environment.lower() in preferred_lower:
+                    return 10
+                return 0
+
+            base_score += features.category_values("environment", environment_match)
+
+        preferred_size = profile.size
+        if preferred_size:
+            def size_match(campus_size):
+                if not campus_size:
+                    return 0
+                if preferred_size == campus_size:
+                    return 20
+                if ("Small" in preferred_size and "Small" in campus_size) or \
+                   ("Medium" in preferred_size and "Medium" in campus_size) or \
+                   ("Large" in preferred_size and ("Large" in campus_size or "Very Large" in campus_size)):
+                    return 10
+                return 0
+
+            base_score += features.category_values("campus_size", size_match)
+
+        preferred_type = profile.university_type
+        if preferred_type:
+            base_score += features.category_values(
+                "university_type", lambda university_type: 20 if university_type == preferred_type else 0)
+
+        preferred_religious = profile.religious_affiliation
+        if preferred_religious:
+            def religious_match(university_religious):
+                if preferred_religious == "None":
+                    return 0 if university_religious else 10
+                return 10 if university_religious == preferred_religious else 0
+
+            base_score += features.category_values("religious_affiliation", religious_match)
+
+        base_score += 10 * features.diversity
+
+        return np.minimum(100, base_score)
+
+
+def weighted_match_scores(components: Dict[str, np.ndarray], weights: Dict[str, float]) -> np.ndarray:
+    """Vectorized overall score used by match_universities (weighted sum of 0-1 components)"""
+    match_score = 0
+    for component in COMPONENTS:
+        score = components[component]
+        if component in ("location", "campus"):
+            score = score / 100  # Convert from 0-100 to 0-1
+        match_score = match_score + score * weights.get(component, 0.2)
+    return np.clip(match_score, 0, 1)
+
+
+def sigmoid_match_scores(components: Dict[str, np.ndarray], weights: Dict[str, float]) -> np.ndarray:
+    """Vectorized calculate_match_score (weighted sum of raw components through a sigmoid)"""
+    total_score = 0
+    for component in COMPONENTS:
+        if component in weights and component in components:
+            total_score = total_score + components[component] * weights[component]
+    with np.errstate(over="ignore"):
+        normalized_score = 1 / (1 + np.exp(-6 * (total_score - 0.5)))
+    return np.clip(normalized_score, 0, 1)
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores in descending order, skipping NaN scores.
+
+    Equal scores keep their original order, like a stable sort of the whole
+    array, but only the k selected scores are sorted.
+    """
+    valid = np.flatnonzero(~np.isnan(scores))
+    if k <= 0 or not len(valid):
+        return valid[:0]
+    if k < len(valid):
+        # k-th highest score, then everything above it plus the first ties
+        threshold = np.partition(scores[valid], len(valid) - k)[len(valid) - k]
+        above = valid[scores[valid] > threshold]
+        ties = valid[scores[valid] == threshold][:k - len(above)]
+        valid = np.concatenate([above, ties])
+        valid.sort()
+    return valid[np.argsort(-scores[valid], kind="stable")]
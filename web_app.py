@@ -2,7 +2,11 @@ from flask import Flask, render_template, request, jsonify, redirect, url_for, s
 import os
 import json
 from db import UniversityDatabase
+from catalog import UniversityCatalog
+from indexes import intersect_rows
 from matcher import UniversityMatcher
+from score_cache import ScoreCache
+from password_hashing import PasswordHasherBusy
 from admission_analytics import AdmissionRateCalculator
 import matplotlib
 matplotlib.use('Agg')  # Set the backend to Agg for server environment
@@ -10,7 +14,6 @@ import matplotlib.pyplot as plt
 import base64
 from io import BytesIO
 import numpy as np
-import threading
 import pandas as pd
 from datetime import datetime
 import functools
@@ -33,13 +36,22 @@ def format_number(value):
     except (ValueError, TypeError):
         return value
 
-# Initialize database and matcher
-db = UniversityDatabase()
-db.insert_sample_data()
-matcher = UniversityMatcher(db)
+# Initialize database, in-memory catalog and matcher
+# Catalog reads go to an in-memory replica unless SQLITE_READ_REPLICA is false
+db = UniversityDatabase(read_replica=os.environ.get("SQLITE_READ_REPLICA", "true").lower() == "true")
+db.insert_sample_data()  # Seeds only when the sample data version is behind
+catalog = UniversityCatalog(db)
+score_cache = ScoreCache.from_env(db)
+matcher = UniversityMatcher(db, catalog=catalog, score_cache=score_cache)
 
-# Add a lock for thread safety
-db_lock = threading.Lock()
+@app.before_request
+def pin_catalog():
+    """Checks the catalog version once per request, so the whole request sees one catalog snapshot"""
+    catalog.pin()
+
+@app.teardown_request
+def unpin_catalog(exception=None):
+    catalog.unpin()
 
 def get_user_profile():
     """Get user profile from session or create a default one"""
@@ -102,7 +114,10 @@ def login():
         password = request.form['password']
         
         # Authenticate user
-        user = db.authenticate_user(username, password)
+        try:
+            user = db.authenticate_user(username, password)
+        except PasswordHasherBusy:
+            return render_template('login.html', error="The server is busy, please try again in a moment"), 503
         
         if user:
             # Store user info in session
@@ -134,7 +149,10 @@ def register():
             return render_template('register.html', error="Password must be at least 8 characters long")
         
         # Register user
-        success = db.register_user(username, email, password)
+        try:
+            success = db.register_user(username, email, password)
+        except PasswordHasherBusy:
+            return render_template('register.html', error="The server is busy, please try again in a moment"), 503
         
         if success:
             return redirect(url_for('login', success="Registration successful! Please login with your new account."))
@@ -190,13 +208,10 @@ def save_profile():
     if profile_id:
         # If recommendations exist, save them too
         if 'recommendations' in session:
-            for uni in session['recommendations']:
-                db.save_recommendation(
-                    user_id, 
-                    profile_id, 
-                    uni['id'], 
-                    uni['match_score']
-                )
+            db.save_recommendations_bulk(user_id, profile_id, [
+                {"university_id": uni['id'], "match_score": uni['match_score']}
+                for uni in session['recommendations']
+            ])
         
         flash("Profile saved successfully!", "success")
         return redirect(url_for('dashboard'))
@@ -223,8 +238,8 @@ def profile():
             preferred_majors = request.form.getlist('preferred_majors')
             if not preferred_majors and 'majors' in request.form:
                 # Fallback to old format if present
-            majors = request.form['majors']
-            preferred_majors = [m.strip() for m in majors.split(",") if m.strip()]
+                majors = request.form['majors']
+                preferred_majors = [m.strip() for m in majors.split(",") if m.strip()]
             
             budget = int(request.form.get('budget', 30000))
             
@@ -232,8 +247,8 @@ def profile():
             preferred_locations = request.form.getlist('preferred_locations')
             if not preferred_locations and 'locations' in request.form:
                 # Fallback to old format if present
-            locations = request.form['locations']
-            preferred_locations = [loc.strip() for loc in locations.split(",") if loc.strip()]
+                locations = request.form['locations']
+                preferred_locations = [loc.strip() for loc in locations.split(",") if loc.strip()]
             
             environment = request.form.get('preferred_environment', 'Urban')
             
@@ -360,6 +375,46 @@ def profile():
     
     return render_template('profile.html', edit_profile=edit_profile)
 
+def filter_catalog_rows(filters):
+    """
+    Catalog rows that pass the recommendation filters, looked up in the
+    catalog's range and hash indexes
+    
+    Args:
+        filters: Filter values from the request
+        
+    Returns:
+        Sorted row positions, or None if no filter is set
+    """
+    index = catalog.filters
+    row_sets = []
+    
+    for column in ('location', 'environment', 'country', 'region', 'campus_size', 'university_type'):
+        if filters[column]:
+            row_sets.append(index.equal_rows(column, filters[column]))
+    
+    if filters['domestic_only']:
+        row_sets.append(index.equal_rows('country', 'USA'))
+    
+    if filters['min_acceptance'] or filters['max_acceptance']:
+        min_acceptance = float(filters['min_acceptance']) if filters['min_acceptance'] else None
+        max_acceptance = float(filters['max_acceptance']) if filters['max_acceptance'] else None
+        row_sets.append(index.range_rows('acceptance_rate', min_acceptance, max_acceptance))
+    
+    if filters['max_tuition']:
+        row_sets.append(index.range_rows('tuition_fee', high=float(filters['max_tuition'])))
+    
+    if filters['religious_affiliation']:
+        # 'None' selects universities without a religious affiliation
+        affiliation = filters['religious_affiliation']
+        row_sets.append(index.equal_rows('religious_affiliation', None if affiliation == 'None' else affiliation))
+    
+    if filters['major']:
+        # Case-insensitive substring match through the catalog's major index
+        row_sets.append(catalog.majors.rows_containing(filters['major']))
+    
+    return intersect_rows(row_sets) if row_sets else None
+
 @app.route('/recommendations')
 def recommendations():
     """Generate university recommendations based on user profile"""
@@ -383,8 +438,9 @@ def recommendations():
         'major': request.args.get('major', '')
     }
     
-    # Get all universities from database
-    universities = db.get_all_universities()
+    # Apply the filters through the catalog's indexes, so only rows that can be shown are scored
+    rows = filter_catalog_rows(filters)
+    universities = catalog.records if rows is None else catalog.records_for_rows(rows)
     
     # If there is a profile, calculate match scores
     if has_profile:
@@ -404,62 +460,15 @@ def recommendations():
         # Sort by match score (descending)
         universities.sort(key=lambda u: u.get('match_score', 0), reverse=True)
     
-    # Filter results based on request parameters
-    if filters['location']:
-        universities = [u for u in universities if u['location'] == filters['location']]
-        
-    if filters['environment']:
-        universities = [u for u in universities if u['environment'] == filters['environment']]
-        
-    if filters['min_acceptance']:
-        min_acceptance = float(filters['min_acceptance'])
-        universities = [u for u in universities if u['acceptance_rate'] >= min_acceptance]
-        
-    if filters['max_acceptance']:
-        max_acceptance = float(filters['max_acceptance'])
-        universities = [u for u in universities if u['acceptance_rate'] <= max_acceptance]
-        
-    if filters['max_tuition']:
-        max_tuition = float(filters['max_tuition'])
-        universities = [u for u in universities if u['tuition_fee'] <= max_tuition]
-    
-    if filters['domestic_only']:
-        universities = [u for u in universities if u.get('country', '') == 'USA']
-    
-    if filters['country']:
-        universities = [u for u in universities if u.get('country', '') == filters['country']]
-        
-    if filters['region']:
-        universities = [u for u in universities if u.get('region', '') == filters['region']]
-        
-    if filters['campus_size']:
-        universities = [u for u in universities if u.get('campus_size', '') == filters['campus_size']]
-        
-    if filters['university_type']:
-        universities = [u for u in universities if u.get('university_type', '') == filters['university_type']]
-        
-    if filters['religious_affiliation']:
-        if filters['religious_affiliation'] == 'None':
-            universities = [u for u in universities if not u.get('religious_affiliation')]
-        else:
-            universities = [u for u in universities if u.get('religious_affiliation') == filters['religious_affiliation']]
-    
-    if filters['major']:
-        # Filter by major (case-insensitive substring match)
-        major_filter = filters['major'].lower()
-        universities = [u for u in universities if major_filter in u.get('major_strengths', '').lower()]
-    
     # Get unique values for filter dropdowns
-    all_locations = sorted(list({u['location'] for u in db.get_all_universities() if 'location' in u}))
-    all_environments = sorted(list({u['environment'] for u in db.get_all_universities() if 'environment' in u}))
+    all_locations = catalog.distinct_values('location')
+    all_environments = catalog.distinct_values('environment')
     
     # Get unique regions organized by country
     all_regions = []
     regions_by_country = {}
-    for uni in db.get_all_universities():
-        if 'region' in uni and 'country' in uni and uni['region'] and uni['country']:
-            country = uni['country']
-            region = uni['region']
+    for region, country in zip(catalog.columns['region'], catalog.columns['country']):
+        if region and country:
             if country not in regions_by_country:
                 regions_by_country[country] = set()
             regions_by_country[country].add(region)
@@ -469,24 +478,22 @@ def recommendations():
             all_regions.append({"name": region, "country": country})
     
     # Get unique countries
-    all_countries = sorted(list({u['country'] for u in db.get_all_universities() if 'country' in u}))
+    all_countries = catalog.distinct_values('country')
     
     # Get unique campus sizes
-    all_campus_sizes = sorted(list({u['campus_size'] for u in db.get_all_universities() if 'campus_size' in u}))
+    all_campus_sizes = catalog.distinct_values('campus_size')
     
     # Get unique university types
-    all_university_types = sorted(list({u['university_type'] for u in db.get_all_universities() if 'university_type' in u}))
+    all_university_types = catalog.distinct_values('university_type')
     
     # Get unique religious affiliations
-    all_religious_affiliations = sorted(list({u['religious_affiliation'] for u in db.get_all_universities() 
-                                            if 'religious_affiliation' in u and u['religious_affiliation']}))
+    all_religious_affiliations = catalog.distinct_values('religious_affiliation')
     
     # Get all majors (from all universities' major_strengths)
     all_majors = set()
-    for uni in db.get_all_universities():
-        if 'major_strengths' in uni and uni['major_strengths']:
-            majors = uni['major_strengths'].split(',')
-            all_majors.update(majors)
+    for major_strengths in catalog.columns['major_strengths']:
+        if major_strengths:
+            all_majors.update(major_strengths.split(','))
     all_majors = sorted(list(all_majors))
     
     # Check if we're using the Deepseek API
@@ -538,7 +545,7 @@ def compare():
         # Initialize recommendations if not in session
         try:
             user_profile = get_user_profile()
-            matcher = UniversityMatcher(db)
+            matcher = UniversityMatcher(db, catalog=catalog, score_cache=score_cache)
             recommendations = matcher.get_recommendations(user_profile, top_n=100)
             session['recommendations'] = recommendations
         except Exception as e:
@@ -601,7 +608,7 @@ def api_settings():
         
         # Refresh matcher to pick up new settings
         global matcher
-        matcher = UniversityMatcher(db)
+        matcher = UniversityMatcher(db, catalog=catalog, score_cache=score_cache)
         
         return redirect(url_for('index'))
     
@@ -612,14 +619,15 @@ def api_settings():
         "deepseek_api_url": os.environ.get("DEEPSEEK_API_URL", "https://api.deepseek.com/v1/match")
     }
     
-    return render_template('api_settings.html', settings=current_settings)
+    return render_template('api_settings.html', settings=current_settings, cache_stats=score_cache.stats(),
+                           password_stats=db.password_hasher.stats())
 
 @app.route('/admin/admission-analytics', methods=['GET', 'POST'])
 @login_required
 def admin_admission_analytics():
     """Admin dashboard for admission rate analytics"""
     # Get all universities for the dropdown
-    universities = db.get_all_universities()
+    universities = catalog.records
     
     # Get form parameters
     selected_university_id = request.form.get('university_id', '1')  # Default to first university
@@ -641,16 +649,23 @@ def admin_admission_analytics():
     # Get validation results
     validation = calculator.validate_data_consistency()
     
+    # Rates come from the trigger-maintained application_stats counts
     # Calculate overall admission rate
-    admission_rate, details = calculator.calculate_admission_rate(
+    admission_rate, details = calculator.rate_from_status_counts(
+        db.get_application_status_counts(selected_university_id),
         exclude_incomplete=not include_incomplete
     )
     
     # Calculate program-specific rates
-    program_results = calculator.calculate_stratified_rates("program")
+    program_results = calculator.stratified_rates_from_counts(
+        db.get_application_status_counts(selected_university_id, "program"))
     
-    # Calculate temporal trends
-    time_results = calculator.analyze_trends(interval=time_interval)
+    # Calculate temporal trends (counts are kept per month; days and weeks need the applications)
+    if time_interval in ("month", "year"):
+        time_results = calculator.trends_from_counts(
+            db.get_application_status_counts(selected_university_id, time_interval))
+    else:
+        time_results = calculator.analyze_trends(interval=time_interval)
     
     # Generate charts
     overall_chart = generate_admission_pie_chart(details["status_breakdown"])
@@ -1067,7 +1082,7 @@ def generate_comparison_chart(universities, user_profile=None):
     if user_profile:
         plt.title(f"University Comparison\nBased on Your Academic Profile (GPA: {user_profile['gpa']}, SAT: {user_profile['sat_score']})", 
                  size=15, y=1.1)
-            else:
+    else:
         plt.title("University Comparison", size=15, y=1.1)
     
     # Add legend
@@ -1184,11 +1199,12 @@ def generate_personalized_insights(universities, user_profile):
         
         # Check location preference
         if 'preferred_locations' in user_profile and user_profile['preferred_locations']:
-            uni_location = uni.get('location', '').lower()
             uni_region = uni.get('region', '').lower()
             preferred_locations = [loc.lower() for loc in user_profile['preferred_locations']]
             
-            if any(loc in uni_location or loc in uni_region for loc in preferred_locations):
+            # Location text is matched through the catalog's location token index
+            if (catalog.locations.matches_any(uni.get('location', ''), preferred_locations) or
+                    any(loc in uni_region for loc in preferred_locations)):
                 uni_insights.append({
                     'type': 'positive',
                     'category': 'location',